@@ -0,0 +1,55 @@
+from sqlalchemy import text
+from ..database import async_engine
+from .indexview_crud import view_data_query, filter_view_data_query, join_view_data_query
+from .indexview_crud import view_page_query, make_view_page
+from typing import List, Dict, Any, Optional
+
+# Async counterparts of the read paths in indexview_crud, used when USE_ASYNC_DB is enabled.
+
+async def _fetch_all(query: str) -> List[Dict[str, Any]]:
+    async with async_engine.connect() as conn:
+        result = await conn.execute(text(query))
+        return [dict(row._mapping) for row in result]
+
+async def list_indexes_crud() -> List[Dict[str, Any]]:
+    query = """
+        SELECT indexname AS indexname, tablename AS tablename, indexdef AS indexdef
+        FROM pg_indexes 
+        WHERE schemaname NOT IN ('pg_catalog', 'information_schema');
+    """
+    return await _fetch_all(query)
+
+async def list_views_crud() -> List[Dict[str, Any]]:
+    query = """
+        SELECT schemaname, viewname, definition 
+        FROM pg_views 
+        WHERE schemaname NOT IN ('pg_catalog', 'information_schema');
+    """
+    return await _fetch_all(query)
+
+async def view_data_crud(view_name: str) -> List[Dict[str, Any]]:
+    return await _fetch_all(view_data_query(view_name))
+
+async def filter_view_data_crud(view_name: str, condition: str) -> List[Dict[str, Any]]:
+    return await _fetch_all(filter_view_data_query(view_name, condition))
+
+async def join_view_data_crud(view_name: str, table_name: str, condition: str) -> List[Dict[str, Any]]:
+    return await _fetch_all(join_view_data_query(view_name, table_name, condition))
+
+async def view_page_crud(base_query: str, columns: Optional[List[str]] = None, order_by: Optional[List[str]] = None,
+                         limit: Optional[int] = None, offset: Optional[int] = None,
+                         after: Optional[List[Any]] = None, joined: bool = False) -> Dict[str, Any]:
+    query, params = view_page_query(base_query, columns, order_by, limit, offset, after, joined)
+    async with async_engine.connect() as conn:
+        result = await conn.execute(text(query), params)
+        rows = [dict(row._mapping) for row in result]
+    return make_view_page(rows, limit, offset, order_by)
+
+async def stream_view_rows(base_query: str, columns: Optional[List[str]] = None, order_by: Optional[List[str]] = None,
+                           chunk_size: int = 1000, joined: bool = False):
+    query, params = view_page_query(base_query, columns, order_by, joined=joined)
+    async with async_engine.connect() as conn:
+        result = await conn.stream(text(query), params)
+        async for partition in result.partitions(chunk_size):
+            for row in partition:
+                yield dict(row._mapping)
@@ -0,0 +1,54 @@
+from sqlalchemy import text
+from fastapi.concurrency import run_in_threadpool
+from ..database import async_engine
+from .. import schema_cache
+from .selectop_crud import build_select_query, format_query
+from .export_crud import result_type_codes
+from typing import List, Optional, Dict, Any, Tuple
+
+# Async counterparts of selectop_crud, used when USE_ASYNC_DB is enabled.
+
+async def select_data(
+    table: str,
+    columns: Optional[List[str]] = None,
+    where: Optional[Dict[str, Any]] = None,
+    order_by: Optional[str] = None,
+    order: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    group_by: Optional[str] = None,
+    having: Optional[str] = None,
+    distinct: bool = False,
+    join: Optional[List[Dict[str, str]]] = None,
+    aggregate: Optional[Dict[str, str]] = None
+) -> Tuple[List[Dict[str, Any]], str]:
+    # Building may read the schema cache (a catalog query on a miss), so keep it off the loop.
+    plan, query_params = await run_in_threadpool(
+        build_select_query,
+        table, columns, where, order_by, order, limit, offset,
+        group_by, having, distinct, join, aggregate
+    )
+    # asyncpg keeps its own per-connection prepared statement cache keyed on the SQL,
+    # which the shape-cached statement keeps stable.
+    async with async_engine.connect() as connection:
+        result = await connection.execute(plan.statement, query_params)
+        rows = result.fetchall()
+        cols = result.keys()
+        data = [dict(zip(cols, row)) for row in rows]
+
+    return data, format_query(plan.display_sql, query_params)
+
+
+async def select_rows(*args, **kwargs) -> Tuple[List[str], List[Any], List[tuple], str]:
+    plan, query_params = await run_in_threadpool(build_select_query, *args, **kwargs)
+    async with async_engine.connect() as connection:
+        result = await connection.execute(plan.statement, query_params)
+        keys = list(result.keys())
+        type_codes = result_type_codes(result)
+        rows = [tuple(row) for row in result.fetchall()]
+    return keys, type_codes, rows, format_query(plan.display_sql, query_params)
+
+
+async def get_table_names() -> List[str]:
+    # The schema cache is shared with the sync engine; it only hits the catalog when stale.
+    return await run_in_threadpool(schema_cache.get_table_names)
@@ -0,0 +1,61 @@
+from sqlalchemy import text
+from fastapi.concurrency import run_in_threadpool
+from ..database import async_engine
+from .. import result_cache
+from .tableop_crud import (
+    build_insert_row_query,
+    build_update_row_query,
+    build_delete_row_query,
+    build_table_page_query,
+    make_table_page,
+)
+from .export_crud import result_type_codes
+from typing import List, Optional, Dict, Any, Tuple
+
+# Async counterparts of the row-level tableop_crud functions, used when USE_ASYNC_DB is enabled.
+# Query building (and the schema cache lookups it does) stays shared with the sync module.
+
+async def insert_row(table_name: str, row_data: dict):
+    query, params = await run_in_threadpool(build_insert_row_query, table_name, row_data)
+    async with async_engine.begin() as conn:
+        await conn.execute(text(query), params)
+    result_cache.invalidate_table(table_name)
+
+async def update_row(table_name: str, condition: dict, new_values: dict):
+    query, params = await run_in_threadpool(build_update_row_query, table_name, condition, new_values)
+    async with async_engine.begin() as conn:
+        await conn.execute(text(query), params)
+    result_cache.invalidate_table(table_name)
+
+async def delete_row(table_name: str, condition: dict):
+    query, params = await run_in_threadpool(build_delete_row_query, table_name, condition)
+    async with async_engine.begin() as conn:
+        await conn.execute(text(query), params)
+    result_cache.invalidate_table(table_name)
+
+async def get_table_data(table_name: str) -> List[Dict[str, Any]]:
+    async with async_engine.connect() as conn:
+        result = await conn.execute(text(f"SELECT * FROM {table_name}"))
+        return [dict(row._mapping) for row in result]
+
+async def get_table_rows(table_name: str) -> Tuple[List[str], List[Any], List[tuple]]:
+    async with async_engine.connect() as conn:
+        result = await conn.execute(text(f"SELECT * FROM {table_name}"))
+        keys = list(result.keys())
+        type_codes = result_type_codes(result)
+        return keys, type_codes, [tuple(row) for row in result.fetchall()]
+
+async def get_table_page(table_name: str, limit: int = 100, after: Optional[List[Any]] = None) -> Dict[str, Any]:
+    query, params, primary_key = await run_in_threadpool(build_table_page_query, table_name, limit, after)
+    async with async_engine.connect() as conn:
+        result = await conn.execute(text(query), params)
+        rows = [dict(row._mapping) for row in result]
+    return make_table_page(rows, limit, primary_key)
+
+async def stream_table_rows(table_name: str, chunk_size: int = 1000):
+    query = text(f"SELECT * FROM {table_name}")
+    async with async_engine.connect() as conn:
+        result = await conn.stream(query, execution_options={"yield_per": chunk_size})
+        async for partition in result.partitions():
+            for row in partition:
+                yield dict(row._mapping)
@@ -0,0 +1,75 @@
+import json
+from sqlalchemy import text
+from ..database import engine
+from typing import Optional, Dict, Any, List
+
+# -----------------------------------
+# EXPLAIN / EXPLAIN ANALYZE
+# -----------------------------------
+
+def _collect_nodes(plan: Dict[str, Any], nodes: List[Dict[str, Any]], depth: int = 0):
+    node = {
+        "depth": depth,
+        "node_type": plan.get("Node Type"),
+        "relation": plan.get("Relation Name"),
+        "index": plan.get("Index Name"),
+        "total_cost": plan.get("Total Cost"),
+        "plan_rows": plan.get("Plan Rows"),
+        "actual_rows": plan.get("Actual Rows"),
+        "actual_total_time_ms": plan.get("Actual Total Time"),
+    }
+    nodes.append({k: v for k, v in node.items() if v is not None})
+    for child in plan.get("Plans", []):
+        _collect_nodes(child, nodes, depth + 1)
+
+def summarize_plan(document) -> Dict[str, Any]:
+    """
+    Turn the output of EXPLAIN (FORMAT JSON) into the plan tree plus headline numbers.
+    """
+    if isinstance(document, str):
+        document = json.loads(document)
+    top = document[0]
+    plan = top["Plan"]
+    nodes: List[Dict[str, Any]] = []
+    _collect_nodes(plan, nodes)
+
+    summary = {
+        "plan": plan,
+        "nodes": nodes,
+        "total_cost": plan.get("Total Cost"),
+        "planning_time_ms": top.get("Planning Time"),
+        "execution_time_ms": top.get("Execution Time"),
+    }
+    if "Shared Hit Blocks" in plan:
+        hit = plan.get("Shared Hit Blocks", 0)
+        read = plan.get("Shared Read Blocks", 0)
+        summary["buffers"] = {
+            "shared_hit": hit,
+            "shared_read": read,
+            "shared_dirtied": plan.get("Shared Dirtied Blocks", 0),
+            "shared_written": plan.get("Shared Written Blocks", 0),
+            "temp_read": plan.get("Temp Read Blocks", 0),
+            "temp_written": plan.get("Temp Written Blocks", 0),
+            "hit_ratio": round(hit / (hit + read), 4) if hit + read else None,
+        }
+    return summary
+
+# EXPLAIN ANALYZE discards the rows it produces, so returning data with it means running
+# the query a second time: double the cost, and the rows come from a later snapshot
+# than the one the plan and timings describe.
+ANALYZE_WITH_DATA_NOTE = (
+    "The rows come from a second execution after EXPLAIN ANALYZE; they may differ from "
+    "the analyzed run. Set include_data to false to run the query once."
+)
+
+def explain_query(statement, params: Optional[Dict[str, Any]] = None, analyze: bool = False) -> Dict[str, Any]:
+    """
+    EXPLAIN a SELECT (a SQL string or text() clause). With `analyze` the statement is
+    executed (ANALYZE, BUFFERS) and then rolled back, so timings and buffer hits are real.
+    """
+    sql = statement.text if hasattr(statement, "text") else str(statement)
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    with engine.connect() as conn:
+        document = conn.execute(text(f"EXPLAIN ({options}) {sql}"), params or {}).scalar()
+        conn.rollback()
+    return summarize_plan(document)
@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+from decimal import Decimal
+from typing import List, Dict, Any, Iterator, Iterable, Tuple
+
+# -----------------------------------
+# Streaming Export Encoders
+# -----------------------------------
+# Each encoder consumes (column names, type codes, rows) chunks from a server-side
+# cursor and yields bytes, so only one chunk is ever held in memory.
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ValueError("The 'arrow' and 'parquet' formats require the pyarrow package.")
+
+def _plain_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+def export_csv(chunks: Iterable[Tuple[List[str], List[Any], list]]) -> Iterator[bytes]:
+    header_written = False
+    for keys, _, rows in chunks:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if not header_written:
+            writer.writerow(keys)
+            header_written = True
+        for row in rows:
+            writer.writerow(["" if v is None else _plain_value(v) for v in row])
+        yield buf.getvalue().encode("utf-8")
+
+def export_ndjson(chunks: Iterable[Tuple[List[str], List[Any], list]]) -> Iterator[bytes]:
+    for keys, _, rows in chunks:
+        yield "".join(json.dumps(dict(zip(keys, row)), default=str) + "\n" for row in rows).encode("utf-8")
+
+# PostgreSQL type OIDs (psycopg2 type_code) -> Arrow type factory name.
+# numeric is exported as float64; anything unlisted is exported as text.
+_PG_ARROW_TYPES = {
+    16: "bool_",
+    20: "int64",
+    21: "int16",
+    23: "int32",
+    26: "int64",
+    700: "float32",
+    701: "float64",
+    1700: "float64",
+    25: "string",
+    1042: "string",
+    1043: "string",
+    17: "binary",
+    1082: "date32",
+}
+
+def _arrow_type(pa, type_code):
+    if type_code == 1114:
+        return pa.timestamp("us")
+    if type_code == 1184:
+        return pa.timestamp("us", tz="UTC")
+    return getattr(pa, _PG_ARROW_TYPES.get(type_code, "string"))()
+
+def _text_value(value):
+    if value is None or isinstance(value, str):
+        return value
+    value = _plain_value(value)
+    return value if isinstance(value, str) else str(value)
+
+def _arrow_column(pa, values, arrow_type):
+    if pa.types.is_string(arrow_type):
+        values = [_text_value(v) for v in values]
+    elif pa.types.is_floating(arrow_type):
+        values = [None if v is None else float(v) if isinstance(v, Decimal) else v for v in values]
+    return pa.array(values, type=arrow_type)
+
+def _record_batches(chunks: Iterable[Tuple[List[str], List[Any], list]]):
+    import pyarrow as pa
+    schema = None
+    for keys, type_codes, rows in chunks:
+        if schema is None:
+            schema = pa.schema([pa.field(k, _arrow_type(pa, t)) for k, t in zip(keys, type_codes)])
+        columns = list(zip(*rows)) if rows else [[] for _ in keys]
+        yield schema, pa.record_batch(
+            [_arrow_column(pa, list(col), field.type) for col, field in zip(columns, schema)],
+            schema=schema,
+        )
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose buffered bytes are handed out after each batch."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+def export_arrow(chunks: Iterable[Tuple[List[str], List[Any], list]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    sink = _DrainableSink()
+    writer = None
+    for schema, batch in _record_batches(chunks):
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, schema)
+        writer.write_batch(batch)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+def export_parquet(chunks: Iterable[Tuple[List[str], List[Any], list]]) -> Iterator[bytes]:
+    import pyarrow.parquet as pq
+    sink = _DrainableSink()
+    writer = None
+    for schema, batch in _record_batches(chunks):
+        if writer is None:
+            writer = pq.ParquetWriter(sink, schema)
+        # One row group per cursor chunk keeps the writer's memory bounded.
+        writer.write_batch(batch)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+EXPORTERS = {
+    "csv": export_csv,
+    "ndjson": export_ndjson,
+    "arrow": export_arrow,
+    "parquet": export_parquet,
+}
+
+# -----------------------------------
+# Columnar Responses
+# -----------------------------------
+
+def columnar_payload(keys: List[str], rows: List[tuple]) -> Dict[str, Any]:
+    """
+    Column names once and one value array per column, instead of a dict per row.
+    """
+    values = [list(col) for col in zip(*rows)] if rows else [[] for _ in keys]
+    return {"columns": keys, "values": values, "row_count": len(rows)}
+
+def arrow_ipc_bytes(keys: List[str], type_codes: List[Any], rows: List[tuple]) -> bytes:
+    require_pyarrow()
+    return b"".join(export_arrow(iter([(keys, type_codes, rows)])))
+
+def result_type_codes(result) -> List[Any]:
+    """
+    Type codes (PostgreSQL OIDs) of a result's columns; read before the rows are fetched.
+    """
+    description = result.cursor.description if result.cursor is not None else None
+    return [column[1] for column in description] if description else [None] * len(result.keys())
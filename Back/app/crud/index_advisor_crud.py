@@ -0,0 +1,327 @@
+import json
+import re
+import threading
+from collections import OrderedDict
+from sqlalchemy import text, exc
+from ..database import engine
+from .indexview_crud import create_index
+from typing import List, Optional, Dict, Any, Tuple
+
+# -----------------------------------
+# Workload Recording
+# -----------------------------------
+# Every select built by select_data is recorded by shape (table, filtered/joined/sorted
+# columns) with a hit count and the last parameter values, so candidates can be costed
+# against the queries the API actually runs.
+
+MAX_RECORDED_SHAPES = 500
+RANGE_OPERATORS = {"<", ">", "<=", ">=", "BETWEEN", "LIKE", "ILIKE"}
+
+_lock = threading.Lock()
+_workload: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+
+_QUALIFIED = re.compile(r'^"?(\w+)"?\."?(\w+)"?$')
+_BARE = re.compile(r'^"?(\w+)"?$')
+_JOIN_EQUALITY = re.compile(r'("?\w+"?\."?\w+"?)\s*=\s*("?\w+"?\."?\w+"?)')
+
+
+def _table_aliases(table: str, join_shape) -> Dict[str, str]:
+    aliases = {}
+    for ref in [table] + [join_table for _, join_table, _ in join_shape]:
+        parts = ref.split()
+        name = parts[0].split(".")[-1].strip('"')
+        aliases[name.lower()] = name
+        if len(parts) > 1:
+            aliases[parts[-1].strip('"').lower()] = name
+    return aliases
+
+
+def _column_ref(expr: str, aliases: Dict[str, str], default_table: str) -> Optional[Tuple[str, str]]:
+    expr = expr.strip()
+    match = _QUALIFIED.match(expr)
+    if match:
+        table = aliases.get(match.group(1).lower())
+        return (table, match.group(2)) if table else None
+    match = _BARE.match(expr)
+    if match:
+        return default_table, match.group(1)
+    return None  # expressions are not considered
+
+
+def _shape_columns(shape: tuple) -> Dict[str, Any]:
+    (table, _, where_shape, order_by, _, _, _, _, _, _, join_shape, _) = shape
+    aliases = _table_aliases(table, join_shape)
+    base_table = table.split()[0].split(".")[-1].strip('"')
+
+    where = []
+    for col, operator in where_shape:
+        ref = _column_ref(col, aliases, base_table)
+        if ref:
+            where.append((ref[0], ref[1], operator.upper()))
+
+    order = []
+    for part in (order_by or "").split(","):
+        tokens = part.split()
+        ref = _column_ref(tokens[0], aliases, base_table) if tokens else None
+        if ref:
+            order.append(ref)
+
+    joins = []
+    for _, _, condition in join_shape:
+        for left, right in _JOIN_EQUALITY.findall(condition or ""):
+            for side in (left, right):
+                ref = _column_ref(side, aliases, base_table)
+                if ref:
+                    joins.append(ref)
+    return {"table": base_table, "where": where, "order_by": order, "joins": joins}
+
+
+def record_select(shape: tuple, plan, query_params: Dict[str, Any]):
+    """
+    Note one execution of a select shape. Called by build_select_query.
+    """
+    with _lock:
+        entry = _workload.get(shape)
+        if entry is None:
+            try:
+                columns = _shape_columns(shape)
+            except Exception:
+                return
+            entry = _workload[shape] = {**columns, "sql": plan.display_sql, "count": 0}
+        entry["count"] += 1
+        entry["params"] = dict(query_params)
+        _workload.move_to_end(shape)
+        while len(_workload) > MAX_RECORDED_SHAPES:
+            _workload.popitem(last=False)
+
+
+def workload_summary() -> List[Dict[str, Any]]:
+    with _lock:
+        entries = list(_workload.values())
+    return [
+        {
+            "sql": e["sql"],
+            "count": e["count"],
+            "where": [f"{t}.{c} {op}" for t, c, op in e["where"]],
+            "order_by": [f"{t}.{c}" for t, c in e["order_by"]],
+            "joins": [f"{t}.{c}" for t, c in e["joins"]],
+        }
+        for e in sorted(entries, key=lambda e: e["count"], reverse=True)
+    ]
+
+
+def reset_workload():
+    with _lock:
+        _workload.clear()
+
+
+# -----------------------------------
+# Candidate Generation
+# -----------------------------------
+
+def _candidates_for(entry: Dict[str, Any]) -> List[Tuple[str, Tuple[str, ...]]]:
+    candidates = []
+    by_table: Dict[str, Dict[str, list]] = {}
+    for table, col, operator in entry["where"]:
+        kind = "eq" if operator == "=" else "range" if operator in RANGE_OPERATORS else None
+        if kind:
+            cols = by_table.setdefault(table, {"eq": [], "range": []})[kind]
+            if col not in cols:
+                cols.append(col)
+            candidates.append((table, (col,)))
+
+    for table, cols in by_table.items():
+        # Equality columns first, then one range column, else the sort columns.
+        composite = list(cols["eq"])
+        if cols["range"]:
+            composite.append(cols["range"][0])
+        else:
+            composite += [c for t, c in entry["order_by"] if t == table and c not in composite]
+        if len(composite) > 1:
+            candidates.append((table, tuple(composite[:4])))
+
+    order_tables = {t for t, _ in entry["order_by"]}
+    if len(order_tables) == 1 and not by_table:
+        table = order_tables.pop()
+        candidates.append((table, tuple(c for _, c in entry["order_by"])[:4]))
+
+    for table, col in entry["joins"]:
+        candidates.append((table, (col,)))
+    return candidates
+
+
+def _existing_index_columns(conn, tables: List[str]) -> Dict[str, List[Tuple[str, ...]]]:
+    query = text("""
+        SELECT c.relname AS table_name,
+               array(
+                   SELECT a.attname FROM unnest(x.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+                   JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = k.attnum
+                   ORDER BY k.ord
+               ) AS columns
+        FROM pg_index x
+        JOIN pg_class c ON c.oid = x.indrelid
+        WHERE c.relname = ANY(:tables)
+    """)
+    existing: Dict[str, List[Tuple[str, ...]]] = {}
+    for row in conn.execute(query, {"tables": tables}):
+        existing.setdefault(row.table_name, []).append(tuple(row.columns))
+    return existing
+
+
+def _covered(columns: Tuple[str, ...], indexes: List[Tuple[str, ...]]) -> bool:
+    return any(index[:len(columns)] == columns for index in indexes)
+
+
+def index_name_for(table: str, columns: Tuple[str, ...]) -> str:
+    return f"idx_{table}_{'_'.join(columns)}"[:63]
+
+
+# -----------------------------------
+# Evaluation
+# -----------------------------------
+
+def _plan_cost(conn, entry: Dict[str, Any]) -> float:
+    document = conn.execute(text(f"EXPLAIN (FORMAT JSON) {entry['sql']}"), entry["params"]).scalar()
+    if isinstance(document, str):
+        document = json.loads(document)
+    return document[0]["Plan"]["Total Cost"]
+
+
+def _try_plan_cost(conn, entry: Dict[str, Any]) -> Optional[float]:
+    # Recorded shapes can go stale (e.g. a dropped column); skip them instead of failing.
+    try:
+        with conn.begin_nested():
+            return _plan_cost(conn, entry)
+    except exc.DBAPIError:
+        return None
+
+
+def _has_extension(conn, name: str) -> bool:
+    return conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = :name"), {"name": name}).first() is not None
+
+
+def _top_statements(conn, limit: int = 100) -> List[Dict[str, Any]]:
+    # pg_stat_statements renamed total_time to total_exec_time in PostgreSQL 13.
+    for total in ("total_exec_time", "total_time"):
+        try:
+            with conn.begin_nested():
+                rows = conn.execute(text(
+                    f"SELECT query, calls, {total} AS total_time_ms FROM pg_stat_statements "
+                    f"ORDER BY {total} DESC LIMIT :limit"
+                ), {"limit": limit})
+                return [dict(row._mapping) for row in rows]
+        except exc.DBAPIError:
+            continue
+    return []
+
+
+def recommend_indexes(method: str = "auto", top: int = 5, min_saving_percent: float = 1.0,
+                      use_pg_stat_statements: bool = False) -> Dict[str, Any]:
+    """
+    Cost candidate indexes for the recorded workload and return the most useful ones.
+
+    method: "hypopg" costs hypothetical indexes (requires the hypopg extension); "build"
+    creates each candidate inside a transaction that is rolled back (holds a SHARE lock
+    on the table while it builds); "auto" uses hypopg when installed and otherwise only
+    ranks candidates by how often their columns are used.
+    Savings are planner cost units weighted by how often each query shape ran.
+    """
+    with _lock:
+        entries = [dict(e) for e in _workload.values()]
+    if not entries:
+        return {"method": method, "recommendations": [], "message": "No select workload recorded yet."}
+
+    candidates: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+    for i, entry in enumerate(entries):
+        for table, columns in _candidates_for(entry):
+            candidate = candidates.setdefault((table, columns), {"table": table, "columns": list(columns), "queries": set(), "uses": 0})
+            if i not in candidate["queries"]:
+                candidate["queries"].add(i)
+                candidate["uses"] += entry["count"]
+
+    with engine.connect() as conn:
+        existing = _existing_index_columns(conn, sorted({t for t, _ in candidates}))
+        candidates = {k: c for k, c in candidates.items() if not _covered(k[1], existing.get(k[0], []))}
+
+        if method == "auto":
+            method = "hypopg" if _has_extension(conn, "hypopg") else "usage"
+        elif method == "hypopg" and not _has_extension(conn, "hypopg"):
+            raise ValueError("The hypopg extension is not installed; use method 'build' or 'auto'.")
+
+        if method in ("hypopg", "build"):
+            baseline = {}
+            for i in sorted({i for c in candidates.values() for i in c["queries"]}):
+                cost = _try_plan_cost(conn, entries[i])
+                if cost is not None:
+                    baseline[i] = cost
+            conn.rollback()
+            for (table, columns), candidate in candidates.items():
+                ddl = f"CREATE INDEX ON {table} ({', '.join(columns)})"
+                saving = total = 0.0
+                try:
+                    if method == "hypopg":
+                        conn.execute(text("SELECT * FROM hypopg_create_index(:ddl)"), {"ddl": ddl})
+                    else:
+                        conn.execute(text(ddl))
+                    for i in candidate["queries"]:
+                        cost = _try_plan_cost(conn, entries[i]) if i in baseline else None
+                        if cost is None:
+                            continue
+                        saving += max(0.0, baseline[i] - cost) * entries[i]["count"]
+                        total += baseline[i] * entries[i]["count"]
+                except exc.DBAPIError:
+                    saving = total = 0.0
+                finally:
+                    conn.rollback()
+                    if method == "hypopg":
+                        # Hypothetical indexes are session state that rollback does not clear.
+                        conn.execute(text("SELECT hypopg_reset()"))
+                        conn.rollback()
+                candidate["estimated_cost_saving"] = round(saving, 2)
+                candidate["saving_percent"] = round(saving * 100 / total, 2) if total else 0.0
+            ranked = [c for c in candidates.values() if c["saving_percent"] >= min_saving_percent]
+            ranked.sort(key=lambda c: c["estimated_cost_saving"], reverse=True)
+        else:
+            ranked = sorted(candidates.values(), key=lambda c: (c["uses"], len(c["columns"])), reverse=True)
+
+        statements = _top_statements(conn) if use_pg_stat_statements and _has_extension(conn, "pg_stat_statements") else []
+        conn.rollback()
+
+    recommendations = []
+    for candidate in ranked[:top]:
+        columns = tuple(candidate["columns"])
+        rec = {
+            "table": candidate["table"],
+            "columns": candidate["columns"],
+            "index_name": index_name_for(candidate["table"], columns),
+            "definition": f"CREATE INDEX {index_name_for(candidate['table'], columns)} ON {candidate['table']} ({', '.join(columns)})",
+            "recorded_uses": candidate["uses"],
+            "queries": [entries[i]["sql"] for i in sorted(candidate["queries"])],
+        }
+        for key in ("estimated_cost_saving", "saving_percent"):
+            if key in candidate:
+                rec[key] = candidate[key]
+        if statements:
+            # Statements from the whole server that mention the table and leading column.
+            matching = [
+                s for s in statements
+                if candidate["table"].lower() in s["query"].lower() and columns[0].lower() in s["query"].lower()
+            ]
+            rec["pg_stat_statements"] = {
+                "statements": len(matching),
+                "calls": sum(s["calls"] for s in matching),
+                "total_time_ms": round(sum(s["total_time_ms"] for s in matching), 3),
+            }
+        recommendations.append(rec)
+    return {"method": method, "recommendations": recommendations}
+
+
+def apply_recommendations(recommendations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Create the recommended indexes (btree) through create_index.
+    """
+    results = []
+    for rec in recommendations:
+        name = rec.get("index_name") or index_name_for(rec["table"], tuple(rec["columns"]))
+        results.append(create_index(name, rec["table"], ", ".join(rec["columns"]), "BTREE"))
+    return results
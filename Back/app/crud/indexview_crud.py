@@ -1,26 +1,226 @@
 from fastapi import HTTPException
 from sqlalchemy import Column, Integer, String, text, Table
-from sqlalchemy import inspect
+from sqlalchemy import inspect, exc
 from ..database import engine, metadata
+from .. import result_cache, schema_cache
+from . import matview_crud, ivm_crud
 from typing import List, Optional, Dict, Any, Tuple
-
-def create_index(index_name: str, table_name: str, column_name: str, index_type: str):
+import re
+import threading
+import time
+import uuid
+
+_IDENTIFIER = re.compile(r'^"?[A-Za-z_][A-Za-z0-9_$]*"?( +(ASC|DESC))?( +NULLS +(FIRST|LAST))?$', re.IGNORECASE)
+
+
+def _index_element(element: str) -> str:
+    # Plain columns (optionally with ordering) go in as-is; anything else is an expression
+    # and CREATE INDEX requires it to be parenthesized.
+    element = element.strip()
+    if _IDENTIFIER.match(element) or (element.startswith("(") and element.endswith(")")):
+        return element
+    return f"({element})"
+
+
+def split_index_columns(column_name: str) -> List[str]:
+    # "a, lower(b), coalesce(c, d)" -> ["a", "lower(b)", "coalesce(c, d)"]
+    parts, depth, current = [], 0, ""
+    for char in column_name:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        current += char
+    parts.append(current)
+    return [p.strip() for p in parts if p.strip()]
+
+
+def build_create_index_query(index_name: str, table_name: str, columns: List[str], index_type: str = "BTREE",
+                             unique: bool = False, concurrently: bool = False,
+                             include: Optional[List[str]] = None, where: Optional[str] = None) -> str:
     # Validate index type
     valid_index_types = ["BTREE", "HASH", "GIN", "GIST", "SPGIST", "BRIN"]
     if index_type.upper() not in valid_index_types:
         raise HTTPException(status_code=400, detail="Invalid index type specified.")
+    if not columns:
+        raise HTTPException(status_code=400, detail="At least one column or expression is required.")
 
-    # Construct SQL query
-    query = f"CREATE INDEX {index_name} ON {table_name} USING {index_type} ({column_name});"
+    query = f"CREATE {'UNIQUE ' if unique else ''}INDEX {'CONCURRENTLY ' if concurrently else ''}"
+    query += f"{index_name} ON {table_name} USING {index_type} ({', '.join(_index_element(c) for c in columns)})"
+    if include:
+        query += f" INCLUDE ({', '.join(include)})"
+    if where:
+        query += f" WHERE {where}"
+    return query + ";"
 
-    try:
+
+INVALID_INDEX_SQL = "SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid"
+
+
+def _run_create_index(query: str, index_name: str, concurrently: bool, on_connect=None):
+    if not concurrently:
         with engine.connect() as conn:
+            if on_connect:
+                on_connect(conn)
             conn.execute(text(query))
             conn.commit()
-        return {"message": f"Index '{index_name}' created successfully."}
+        return
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if on_connect:
+            on_connect(conn)
+        existed = conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": index_name}).scalar()
+        try:
+            conn.execute(text(query))
+        except Exception:
+            # A failed concurrent build leaves an INVALID index behind; only drop that one,
+            # never an index of the same name that was there before.
+            if not existed:
+                try:
+                    left_invalid = conn.execute(text(INVALID_INDEX_SQL), {"name": index_name}).first()
+                    if left_invalid:
+                        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};"))
+                except Exception as cleanup_error:
+                    print(f"Could not drop invalid index {index_name}:", str(cleanup_error))
+            raise
+
+
+def create_index(index_name: str, table_name: str, column_name: str, index_type: str,
+                 columns: Optional[List[str]] = None, unique: bool = False, concurrently: bool = False,
+                 include: Optional[List[str]] = None, where: Optional[str] = None):
+    """
+    Create an index on `column_name` (a column list as text) or on `columns`, which may mix
+    columns and expressions. Supports UNIQUE, CONCURRENTLY, INCLUDE and partial (WHERE) indexes.
+    """
+    query = build_create_index_query(
+        index_name, table_name, columns or split_index_columns(column_name or ""), index_type, unique, concurrently, include, where
+    )
+
+    try:
+        _run_create_index(query, index_name, concurrently)
+        return {"message": f"Index '{index_name}' created successfully.", "query": query}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# -----------------------------------
+# Background Index Builds
+# -----------------------------------
+
+# Finished jobs kept for status queries; the oldest are forgotten beyond this.
+INDEX_JOB_HISTORY_SIZE = 50
+
+_index_jobs: Dict[str, Dict[str, Any]] = {}
+_index_jobs_lock = threading.Lock()
+
+INDEX_PROGRESS_SQL = """
+SELECT phase, blocks_total, blocks_done, tuples_total, tuples_done,
+       lockers_total, lockers_done, partitions_total, partitions_done
+FROM pg_stat_progress_create_index
+WHERE pid = :pid
+"""
+
+
+def _update_job(job: Dict[str, Any], **fields):
+    with _index_jobs_lock:
+        job.update(fields)
+
+
+def _evict_finished_jobs():
+    # Caller holds _index_jobs_lock. Jobs are in creation order, so the first finished ones are the oldest.
+    finished = [job_id for job_id, job in _index_jobs.items() if job.get("finished_at")]
+    for job_id in finished[:max(0, len(finished) - INDEX_JOB_HISTORY_SIZE)]:
+        del _index_jobs[job_id]
+
+
+def _index_job_worker(job: Dict[str, Any]):
+    def remember_pid(conn):
+        _update_job(job, pid=conn.execute(text("SELECT pg_backend_pid()")).scalar())
+
+    _update_job(job, status="running", started_at=time.time())
+    try:
+        _run_create_index(job["query"], job["index_name"], job["concurrently"], remember_pid)
+        _update_job(job, status="succeeded")
+    except Exception as e:
+        with _index_jobs_lock:
+            job["status"] = "cancelled" if job.get("cancel_requested") else "failed"
+            job["error"] = str(e)
+    finally:
+        with _index_jobs_lock:
+            job["finished_at"] = time.time()
+            _evict_finished_jobs()
+
+
+def start_index_job(index_name: str, table_name: str, columns: List[str], index_type: str = "BTREE",
+                    unique: bool = False, concurrently: bool = True,
+                    include: Optional[List[str]] = None, where: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the index on a background thread and return the job right away.
+    """
+    query = build_create_index_query(index_name, table_name, columns, index_type, unique, concurrently, include, where)
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "index_name": index_name,
+        "table_name": table_name,
+        "query": query,
+        "concurrently": concurrently,
+        "status": "pending",
+        "pid": None,
+        "created_at": time.time(),
+    }
+    with _index_jobs_lock:
+        _index_jobs[job["job_id"]] = job
+    threading.Thread(target=_index_job_worker, args=(job,), name=f"index-build-{index_name}", daemon=True).start()
+    return index_job_status(job["job_id"])
+
+
+def index_job_status(job_id: str) -> Dict[str, Any]:
+    with _index_jobs_lock:
+        job = _index_jobs.get(job_id)
+        status = dict(job) if job is not None else None
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Index job '{job_id}' not found")
+    status["progress"] = None
+    if status["status"] == "running" and status["pid"] is not None:
+        with engine.connect() as conn:
+            row = conn.execute(text(INDEX_PROGRESS_SQL), {"pid": status["pid"]}).first()
+        if row is not None:
+            progress = dict(row._mapping)
+            # The block-scan and tuple-sort phases report their own totals.
+            for unit in ("blocks", "tuples"):
+                total = progress[f"{unit}_total"]
+                progress[f"{unit}_percent"] = round(progress[f"{unit}_done"] * 100 / total, 2) if total else None
+            status["progress"] = progress
+    end = status.get("finished_at") or time.time()
+    status["elapsed_seconds"] = round(end - status["started_at"], 3) if status.get("started_at") else 0.0
+    return status
+
+
+def list_index_jobs() -> List[Dict[str, Any]]:
+    with _index_jobs_lock:
+        job_ids = list(_index_jobs)
+    statuses = []
+    for job_id in job_ids:
+        try:
+            statuses.append(index_job_status(job_id))
+        except HTTPException:
+            pass  # evicted since the ids were read
+    return statuses
+
+
+def cancel_index_job(job_id: str) -> Dict[str, Any]:
+    with _index_jobs_lock:
+        job = _index_jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Index job '{job_id}' not found")
+        if job["status"] != "running" or job["pid"] is None:
+            raise HTTPException(status_code=409, detail=f"Index job '{job_id}' is {job['status']}")
+        job["cancel_requested"] = True
+        pid = job["pid"]
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_cancel_backend(:pid)"), {"pid": pid})
+    return {"message": f"Cancellation requested for index job '{job_id}'"}
+
 def drop_index(index_name: str):
     query = f"DROP INDEX IF EXISTS {index_name};"
 
@@ -54,14 +254,18 @@ def list_indexes_crud() -> List[Dict[str, Any]]:
 
 def create_view(view_type: str, view_name: str, definition: str, with_check_option: bool = False):
     view_type = view_type.lower()
-    valid_view_types = ["simple", "materialized", "updatable", "recursive"]
+    valid_view_types = ["simple", "materialized", "updatable", "recursive", "incremental"]
     
     if view_type not in valid_view_types:
         raise HTTPException(
             status_code=400,
-            detail="Invalid view type. Choose from 'simple', 'materialized', 'updatable', 'recursive'."
+            detail="Invalid view type. Choose from 'simple', 'materialized', 'updatable', 'recursive', 'incremental'."
         )
 
+    if view_type == "incremental":
+        # Trigger-maintained summary table for simple aggregate definitions
+        return ivm_crud.create_incremental_view(view_name, definition)
+
     sql = ""
 
     if view_type == "simple":
@@ -87,6 +291,7 @@ def create_view(view_type: str, view_name: str, definition: str, with_check_opti
         with engine.connect() as conn:
             conn.execute(text(sql))
             conn.commit()
+        schema_cache.invalidate(view_name)
         return {"message": f"{view_type.capitalize()} view '{view_name}' created successfully."}
 
     except Exception as e:
@@ -94,9 +299,12 @@ def create_view(view_type: str, view_name: str, definition: str, with_check_opti
 
 def drop_view(view_type: str, view_name: str):
     view_type = view_type.lower()
-    valid_view_types = ["simple", "materialized", "updatable", "recursive"]
+    valid_view_types = ["simple", "materialized", "updatable", "recursive", "incremental"]
     if view_type not in valid_view_types:
-        raise HTTPException(status_code=400, detail="Invalid view type. Choose from simple, materialized, updatable, recursive.")
+        raise HTTPException(status_code=400, detail="Invalid view type. Choose from simple, materialized, updatable, recursive, incremental.")
+
+    if view_type == "incremental":
+        return ivm_crud.drop_incremental_view(view_name)
 
     # Use DROP MATERIALIZED VIEW for materialized views; otherwise, use DROP VIEW
     sql = ""
@@ -109,18 +317,17 @@ def drop_view(view_type: str, view_name: str):
         with engine.connect() as conn:
             conn.execute(text(sql))
             conn.commit()
+        schema_cache.invalidate(view_name)
         return {"message": f"{view_type.capitalize()} view '{view_name}' dropped successfully."}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-def refresh_materialized_view(view_name: str):
+def refresh_materialized_view(view_name: str, concurrently: Optional[bool] = None, exact_count: bool = False):
     # Refresh command is only valid for materialized views.
-    sql = f"REFRESH MATERIALIZED VIEW {view_name};"
     try:
-        with engine.connect() as conn:
-            conn.execute(text(sql))
-            conn.commit()
-        return {"message": f"Materialized view '{view_name}' refreshed successfully."}
+        return matview_crud.refresh_matview(view_name, concurrently, exact_count)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -136,39 +343,136 @@ def list_views_crud():
     """
     with engine.connect() as conn:
         result = conn.execute(text(query))
-        views = [dict(row) for row in result.fetchall()]
+        views = [dict(row._mapping) for row in result.fetchall()]
     return views
 
+def view_data_query(view_name: str) -> str:
+    return f"SELECT * FROM {view_name};"
+
+def filter_view_data_query(view_name: str, condition: str) -> str:
+    return f"SELECT * FROM {view_name} WHERE {condition};"
+
+def join_view_data_query(view_name: str, table_name: str, condition: str) -> str:
+    return f"SELECT * FROM {view_name} JOIN {table_name} ON {condition};"
+
 def view_data_crud(view_name: str):
     """
     Retrieve all data from the specified view.
     """
-    query = f"SELECT * FROM {view_name};"
+    query = view_data_query(view_name)
     with engine.connect() as conn:
         result = conn.execute(text(query))
-        data = [dict(row) for row in result.fetchall()]
+        data = [dict(row._mapping) for row in result.fetchall()]
     return data
 
 def filter_view_data_crud(view_name: str, condition: str):
     """
     Retrieve data from the specified view filtered by a SQL condition.
     """
-    query = f"SELECT * FROM {view_name} WHERE {condition};"
+    query = filter_view_data_query(view_name, condition)
     with engine.connect() as conn:
         result = conn.execute(text(query))
-        data = [dict(row) for row in result.fetchall()]
+        data = [dict(row._mapping) for row in result.fetchall()]
     return data
 
 def join_view_data_crud(view_name: str, table_name: str, condition: str):
     """
     Retrieve data by joining the view with another table.
     """
-    query = f"SELECT * FROM {view_name} JOIN {table_name} ON {condition};"
+    query = join_view_data_query(view_name, table_name, condition)
     with engine.connect() as conn:
         result = conn.execute(text(query))
-        data = [dict(row) for row in result.fetchall()]
+        data = [dict(row._mapping) for row in result.fetchall()]
     return data
 
+# -----------------------------------
+# View Data Paging and Streaming
+# -----------------------------------
+
+_CURSOR_COLUMN = re.compile(r'^[A-Za-z_"][A-Za-z0-9_$".]*$')
+
+
+def view_page_query(base_query: str, columns: Optional[List[str]] = None, order_by: Optional[List[str]] = None,
+                    limit: Optional[int] = None, offset: Optional[int] = None,
+                    after: Optional[List[Any]] = None, joined: bool = False) -> Tuple[str, Dict[str, Any]]:
+    """
+    Wrap one of the view data queries above with a column projection, ordering,
+    keyset condition (rows after the `after` values of the `order_by` columns) and LIMIT/OFFSET.
+    With `joined`, the clauses go on the join query itself instead of a subquery, where
+    duplicate column names (v.id, t.id) would be ambiguous and qualified names unknown.
+    """
+    params: Dict[str, Any] = {}
+    items = list(columns) if columns else ["*"]
+    if limit is not None and order_by and all(_CURSOR_COLUMN.match(col) for col in order_by):
+        # The cursor values are selected under their own names, so they are found even
+        # when a column is not projected or its name is shared by both sides of a join.
+        items += [f"{col} AS __cursor{i}" for i, col in enumerate(order_by)]
+    base_query = base_query.rstrip().rstrip(";")
+    if joined:
+        if not base_query.startswith("SELECT * FROM "):
+            raise ValueError("Expected a join query starting with 'SELECT * FROM'.")
+        query = f"SELECT {', '.join(items)} {base_query[len('SELECT * '):]}"
+    else:
+        query = f"SELECT {', '.join(items)} FROM ({base_query}) AS view_page"
+    if after is not None:
+        if not order_by or len(after) != len(order_by):
+            raise ValueError("Keyset pagination needs one `after` value per order_by column.")
+        placeholders = ", ".join(f":after{i}" for i in range(len(after)))
+        params.update({f"after{i}": value for i, value in enumerate(after)})
+        query += f" WHERE ({', '.join(order_by)}) > ({placeholders})"
+    if order_by:
+        query += f" ORDER BY {', '.join(order_by)}"
+    if limit is not None:
+        # One extra row tells us whether another page follows.
+        query += " LIMIT :limit"
+        params["limit"] = limit + 1
+    if offset:
+        query += " OFFSET :offset"
+        params["offset"] = offset
+    return query, params
+
+
+def make_view_page(rows: List[Dict[str, Any]], limit: Optional[int], offset: Optional[int],
+                   order_by: Optional[List[str]]) -> Dict[str, Any]:
+    cursor_keys = [f"__cursor{i}" for i in range(len(order_by or []))]
+    cursors = [[row.pop(key) for key in cursor_keys] for row in rows] if rows and cursor_keys and cursor_keys[0] in rows[0] else None
+    has_more = limit is not None and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    next_cursor = cursors[len(rows) - 1] if has_more and cursors else None
+    return {
+        "data": rows,
+        "has_more": has_more,
+        "next_offset": (offset or 0) + len(rows) if has_more else None,
+        "next_cursor": next_cursor,
+    }
+
+
+def view_page_crud(base_query: str, columns: Optional[List[str]] = None, order_by: Optional[List[str]] = None,
+                   limit: Optional[int] = None, offset: Optional[int] = None,
+                   after: Optional[List[Any]] = None, joined: bool = False) -> Dict[str, Any]:
+    """
+    One page of a view query. Pass `next_cursor` back as `after` (keyset, needs order_by)
+    or `next_offset` as `offset` to get the following page.
+    """
+    query, params = view_page_query(base_query, columns, order_by, limit, offset, after, joined)
+    with engine.connect() as conn:
+        result = conn.execute(text(query), params)
+        rows = [dict(row._mapping) for row in result]
+    return make_view_page(rows, limit, offset, order_by)
+
+
+def stream_view_rows(base_query: str, columns: Optional[List[str]] = None, order_by: Optional[List[str]] = None,
+                     chunk_size: int = 1000, joined: bool = False):
+    """
+    Yield the rows of a view query from a server-side cursor, `chunk_size` rows per fetch.
+    """
+    query, params = view_page_query(base_query, columns, order_by, joined=joined)
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(text(query), params)
+        for row in result:
+            yield dict(row._mapping)
+
 def insert_into_view_crud(view_name: str, values: list):
     """
     Insert values into an updatable view.
@@ -183,6 +487,8 @@ def insert_into_view_crud(view_name: str, values: list):
     with engine.connect() as conn:
         conn.execute(text(query))
         conn.commit()
+    # The base tables behind the view are not tracked, so drop every cached select result.
+    result_cache.clear()
     return {"message": f"Inserted into view '{view_name}' successfully."}
 
 def update_view_crud(view_name: str, set_clause: str, condition: str):
@@ -193,6 +499,8 @@ def update_view_crud(view_name: str, set_clause: str, condition: str):
     with engine.connect() as conn:
         conn.execute(text(query))
         conn.commit()
+    # The base tables behind the view are not tracked, so drop every cached select result.
+    result_cache.clear()
     return {"message": f"Updated view '{view_name}' successfully."}
 
 def delete_from_view_crud(view_name: str, condition: str):
@@ -203,17 +511,149 @@ def delete_from_view_crud(view_name: str, condition: str):
     with engine.connect() as conn:
         conn.execute(text(query))
         conn.commit()
+    # The base tables behind the view are not tracked, so drop every cached select result.
+    result_cache.clear()
     return {"message": f"Deleted from view '{view_name}' successfully."}
 
-def refresh_materialized_view_crud(view_name: str):
+# -----------------------------------
+# Bulk DML on Updatable Views
+# -----------------------------------
+# Rows are sent with bound parameters, one executemany per batch of rows that share the
+# same columns, all in one transaction: any failing batch rolls the whole request back.
+
+def _view_batches(rows: List[Dict[str, Any]], batch_size: int):
+    # Consecutive rows with the same columns share a statement.
+    batch, columns = [], None
+    for row in rows:
+        row_columns = tuple(row)
+        if batch and (row_columns != columns or len(batch) >= batch_size):
+            yield list(columns), batch
+            batch = []
+        columns = row_columns
+        batch.append(row)
+    if batch:
+        yield list(columns), batch
+
+
+def _check_view_columns(view_name: str, rows: List[Dict[str, Any]], key_columns: List[str] = ()):
+    # Keys become identifiers in the statement, so only the view's own columns are accepted.
+    try:
+        known = schema_cache.get_column_names(view_name)
+    except exc.NoSuchTableError:
+        raise HTTPException(status_code=404, detail=f"View '{view_name}' not found")
+    used = set(key_columns)
+    for row in rows:
+        used.update(row)
+    unknown = sorted(used - known)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown column(s) {unknown} for view '{view_name}'.")
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _bind_rows(batch: List[Dict[str, Any]], columns: List[str], prefix: str = "p") -> List[Dict[str, Any]]:
+    # Generated bind names (p0, p1, ...) work for any column name.
+    return [{f"{prefix}{i}": row[c] for i, c in enumerate(columns)} for row in batch]
+
+
+def _run_view_batches(view_name: str, statements) -> Dict[str, Any]:
+    report, started = [], time.perf_counter()
+    with engine.connect() as conn:
+        try:
+            for index, (query, params) in enumerate(statements):
+                batch_started = time.perf_counter()
+                result = conn.execute(text(query), params)
+                report.append({
+                    "batch": index,
+                    "rows": len(params),
+                    # psycopg2's batched executemany can't report per-row counts reliably.
+                    "rowcount": result.rowcount if conn.dialect.supports_sane_multi_rowcount else None,
+                    "elapsed_ms": round((time.perf_counter() - batch_started) * 1000, 3),
+                })
+            conn.commit()
+        except HTTPException:
+            conn.rollback()
+            raise
+        except Exception as e:
+            conn.rollback()
+            raise HTTPException(status_code=400, detail={
+                "message": f"Batch {len(report)} failed; nothing was written to view '{view_name}'.",
+                "error": str(e),
+                "completed_batches": report,
+            })
+    # The base tables behind the view are not tracked, so drop every cached select result.
+    result_cache.clear()
+    return {
+        "view_name": view_name,
+        "rows": sum(b["rows"] for b in report),
+        "batches": report,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+def bulk_insert_into_view_crud(view_name: str, rows: List[Dict[str, Any]], batch_size: int = 1000) -> Dict[str, Any]:
     """
-    Refresh a materialized view.
+    Insert many rows (column -> value) into an updatable view.
     """
-    query = f"REFRESH MATERIALIZED VIEW {view_name};"
-    with engine.connect() as conn:
-        conn.execute(text(query))
-        conn.commit()
-    return {"message": f"Materialized view '{view_name}' refreshed successfully."}
+    _check_view_columns(view_name, rows)
+
+    def statements():
+        for columns, batch in _view_batches(rows, batch_size):
+            placeholders = ", ".join(f":p{i}" for i in range(len(columns)))
+            query = f"INSERT INTO {view_name} ({', '.join(_quote(c) for c in columns)}) VALUES ({placeholders})"
+            yield query, _bind_rows(batch, columns)
+    return _run_view_batches(view_name, statements())
+
+
+def bulk_update_view_crud(view_name: str, key_columns: List[str], rows: List[Dict[str, Any]],
+                          batch_size: int = 1000) -> Dict[str, Any]:
+    """
+    Update rows of an updatable view. Each row holds the key column values that select
+    the rows to change plus the new values for the other columns it contains.
+    """
+    for row in rows:
+        missing = [k for k in key_columns if k not in row]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Row {row} is missing key column(s) {missing}.")
+    _check_view_columns(view_name, rows, key_columns)
+
+    def statements():
+        for columns, batch in _view_batches(rows, batch_size):
+            set_columns = [c for c in columns if c not in key_columns]
+            if not set_columns:
+                raise HTTPException(status_code=400, detail="Rows must contain at least one non-key column to update.")
+            bound = set_columns + list(key_columns)
+            query = (
+                f"UPDATE {view_name} SET {', '.join(f'{_quote(c)} = :p{i}' for i, c in enumerate(set_columns))} "
+                f"WHERE {' AND '.join(f'{_quote(k)} = :p{len(set_columns) + i}' for i, k in enumerate(key_columns))}"
+            )
+            yield query, _bind_rows(batch, bound)
+    return _run_view_batches(view_name, statements())
+
+
+def bulk_delete_from_view_crud(view_name: str, key_columns: List[str], keys: List[Dict[str, Any]],
+                               batch_size: int = 1000) -> Dict[str, Any]:
+    """
+    Delete the rows of an updatable view matching each key set (key column -> value).
+    """
+    for key in keys:
+        if set(key) != set(key_columns):
+            raise HTTPException(status_code=400, detail=f"Key {key} must contain exactly the columns {key_columns}.")
+    _check_view_columns(view_name, [], key_columns)
+    query = f"DELETE FROM {view_name} WHERE {' AND '.join(f'{_quote(k)} = :p{i}' for i, k in enumerate(key_columns))}"
+
+    def statements():
+        for start in range(0, len(keys), batch_size):
+            yield query, _bind_rows(keys[start:start + batch_size], key_columns)
+    return _run_view_batches(view_name, statements())
+
+def refresh_materialized_view_crud(view_name: str, concurrently: Optional[bool] = None):
+    """
+    Refresh a materialized view (concurrently when it has a unique index, unless told otherwise).
+    """
+    return matview_crud.refresh_matview(view_name, concurrently)
 
 def rename_view_crud(old_name: str, new_name: str):
     """
@@ -223,6 +663,8 @@ def rename_view_crud(old_name: str, new_name: str):
     with engine.connect() as conn:
         conn.execute(text(query))
         conn.commit()
+    schema_cache.invalidate(old_name)
+    schema_cache.invalidate(new_name)
     return {"message": f"View '{old_name}' renamed to '{new_name}' successfully."}
 
 def modify_view_crud(view_name: str, select_query: str):
@@ -233,4 +675,5 @@ def modify_view_crud(view_name: str, select_query: str):
     with engine.connect() as conn:
         conn.execute(text(query))
         conn.commit()
+    schema_cache.invalidate(view_name)
     return {"message": f"View '{view_name}' modified successfully."}
\ No newline at end of file
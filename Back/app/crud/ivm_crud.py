@@ -0,0 +1,331 @@
+from fastapi import HTTPException
+from sqlalchemy import text
+from ..database import engine
+from .. import result_cache, schema_cache
+from typing import List, Optional, Dict, Any
+import re
+import time
+
+# -----------------------------------
+# Incrementally Maintained Aggregate Views
+# -----------------------------------
+# An "incremental" view is a summary table plus a row trigger on its base table that
+# applies each insert/update/delete to the affected group instead of recomputing the
+# whole view. Eligible definitions:
+#
+#     SELECT g1, g2, SUM(x) AS s, COUNT(*) AS n, MIN(y), MAX(y)
+#     FROM base [WHERE <condition on base columns>] GROUP BY g1, g2
+#
+# Every GROUP BY column must be selected. Hidden __ivm_* columns hold the group's row
+# count (a group disappears when it reaches 0) and the non-NULL counts behind each SUM.
+# MIN/MAX are recomputed for the group only when the removed value was the extreme
+# (an index on the base table's GROUP BY columns keeps that recompute cheap).
+# Subqueries and functions whose result changes without a write to the base table
+# (now(), random(), ...) are rejected: the trigger would never see those changes.
+
+REGISTRY_TABLE = "sqlvi_incremental_views"
+
+_IDENT = r'"?[A-Za-z_][A-Za-z0-9_]*"?'
+_DEFINITION = re.compile(
+    rf"^\s*SELECT\s+(?P<items>.+?)\s+FROM\s+(?P<table>{_IDENT}(?:\.{_IDENT})?)"
+    rf"(?:\s+WHERE\s+(?P<where>.+?))?\s+GROUP\s+BY\s+(?P<group>.+?)\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_VOLATILE = re.compile(
+    r"\b(?:(now|clock_timestamp|statement_timestamp|transaction_timestamp|timeofday|current_setting|random"
+    r"|gen_random_uuid|uuid_generate_\w+|nextval|currval|lastval|setval|txid_current|pg_current_xact_id|age)\s*\("
+    r"|(current_date|current_time|current_timestamp|localtime|localtimestamp|current_user|session_user"
+    r"|current_role|current_schema)\b)",
+    re.IGNORECASE,
+)
+_ITEM = re.compile(
+    rf"^(?:(?P<func>SUM|COUNT|MIN|MAX)\s*\(\s*(?P<arg>\*|{_IDENT})\s*\)|(?P<col>{_IDENT}))"
+    rf"(?:\s+AS\s+(?P<alias>{_IDENT}))?$",
+    re.IGNORECASE,
+)
+
+
+def _not_eligible(reason: str):
+    raise HTTPException(status_code=400, detail=f"Definition is not eligible for incremental maintenance: {reason}")
+
+
+def _split(expr: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for char in expr:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        current += char
+    parts.append(current.strip())
+    return [p for p in parts if p]
+
+
+def parse_definition(definition: str) -> Dict[str, Any]:
+    match = _DEFINITION.match(definition)
+    if not match:
+        _not_eligible("expected SELECT ... FROM <table> [WHERE ...] GROUP BY ...")
+    if re.search(r"\b(JOIN|UNION|HAVING|DISTINCT|WINDOW|OVER|LIMIT|OFFSET|ORDER\s+BY)\b", definition, re.IGNORECASE):
+        _not_eligible("joins, HAVING, DISTINCT, window functions, ORDER BY and LIMIT are not supported")
+    if len(re.findall(r"\bSELECT\b", definition, re.IGNORECASE)) > 1 or re.search(r"\b(EXISTS|ANY|ALL|SOME)\s*\(", definition, re.IGNORECASE):
+        _not_eligible("subqueries are not supported (writes to the tables they read would not update the view)")
+    volatile = _VOLATILE.search(definition)
+    if volatile:
+        _not_eligible(f"'{volatile.group(1) or volatile.group(2)}' can change without a write to the base table")
+
+    group = _split(match.group("group"))
+    for col in group:
+        if not re.fullmatch(_IDENT, col):
+            _not_eligible(f"GROUP BY '{col}' is not a plain column")
+
+    columns, aggregates = [], []
+    for item in _split(match.group("items")):
+        parsed = _ITEM.match(item)
+        if not parsed:
+            _not_eligible(f"select item '{item}' is not a column or SUM/COUNT/MIN/MAX of a column")
+        if parsed.group("col"):
+            col = parsed.group("col")
+            if col not in group:
+                _not_eligible(f"'{col}' must appear in GROUP BY")
+            columns.append({"column": col, "alias": parsed.group("alias") or col})
+        else:
+            func, arg = parsed.group("func").upper(), parsed.group("arg")
+            if arg == "*" and func != "COUNT":
+                _not_eligible(f"{func}(*) is not valid")
+            alias = parsed.group("alias") or (func.lower() if arg == "*" else f"{func.lower()}_{arg.strip(chr(34))}")
+            aggregates.append({"func": func, "arg": arg, "alias": alias})
+    missing = [g for g in group if g not in [c["column"] for c in columns]]
+    if missing:
+        _not_eligible(f"GROUP BY columns {missing} must be selected")
+    if not aggregates:
+        _not_eligible("at least one aggregate is required")
+
+    table = match.group("table")
+    return {
+        "table": table,
+        "table_name": table.split(".")[-1],
+        "where": match.group("where"),
+        "group": group,
+        "columns": columns,
+        "aggregates": aggregates,
+    }
+
+
+def _nn(agg: Dict[str, Any]) -> str:
+    return f"__ivm_nn_{agg['alias'].strip(chr(34))}"
+
+
+def _select_sql(spec: Dict[str, Any], extra_where: Optional[str] = None) -> str:
+    items = [f"{c['column']} AS {c['alias']}" for c in spec["columns"]]
+    items += [f"{a['func']}({a['arg']}) AS {a['alias']}" for a in spec["aggregates"]]
+    items += [f"count({a['arg']}) AS {_nn(a)}" for a in spec["aggregates"] if a["func"] == "SUM"]
+    items.append("count(*) AS __ivm_count")
+    conditions = [f"({c})" for c in (spec["where"], extra_where) if c]
+    sql = f"SELECT {', '.join(items)} FROM {spec['table']}"
+    if conditions:
+        sql += f" WHERE {' AND '.join(conditions)}"
+    return sql + f" GROUP BY {', '.join(spec['group'])}"
+
+
+def _trigger_function_sql(view_name: str, spec: Dict[str, Any]) -> str:
+    table_name = spec["table_name"]
+    group_alias = {c["column"]: c["alias"] for c in spec["columns"]}
+
+    # "=" plus an IS NULL branch rather than IS NOT DISTINCT FROM, which cannot use an index.
+    # PL/pgSQL plans these with the record values as constants, so one branch folds away.
+    def equal(column: str, value: str) -> str:
+        return f"({column} = {value} OR ({column} IS NULL AND {value} IS NULL))"
+
+    def matches(rec: str) -> str:
+        return " AND ".join(equal(group_alias[g], f"{rec}.{g}") for g in spec["group"])
+
+    def base_group(rec: str) -> str:
+        return " AND ".join(equal(f"{table_name}.{g}", f"{rec}.{g}") for g in spec["group"])
+
+    def lock(rec: str) -> str:
+        row = ", ".join(f"{rec}.{g}" for g in spec["group"])
+        return f"PERFORM pg_advisory_xact_lock(hashtext('{view_name}:' || ROW({row})::text));"
+
+    def condition_check(rec: str) -> str:
+        if not spec["where"]:
+            return "ivm_matched := true;"
+        check = f"SELECT EXISTS (SELECT 1 FROM (SELECT ($1).*) AS {table_name} WHERE {spec['where']})"
+        return f"EXECUTE '{check.replace(chr(39), chr(39) * 2)}' INTO ivm_matched USING {rec};"
+
+    remove, add, insert_cols, insert_vals = [], [], [], []
+    for c in spec["columns"]:
+        insert_cols.append(c["alias"])
+        insert_vals.append(f"NEW.{c['column']}")
+    where = f" AND ({spec['where']})" if spec["where"] else ""
+    for a in spec["aggregates"]:
+        alias, arg, func = a["alias"], a["arg"], a["func"]
+        insert_cols.append(alias)
+        if func == "COUNT":
+            delta = "1" if arg == "*" else f"(OLD.{arg} IS NOT NULL)::int"
+            remove.append(f"{alias} = {alias} - {delta}")
+            add.append(f"{alias} = ivm_row.{alias} + {delta.replace('OLD.', 'NEW.')}")
+            insert_vals.append(delta.replace("OLD.", "NEW."))
+        elif func == "SUM":
+            nn = _nn(a)
+            remove.append(
+                f"{alias} = CASE WHEN {nn} - (OLD.{arg} IS NOT NULL)::int = 0 THEN NULL "
+                f"WHEN OLD.{arg} IS NULL THEN {alias} ELSE {alias} - OLD.{arg} END"
+            )
+            remove.append(f"{nn} = {nn} - (OLD.{arg} IS NOT NULL)::int")
+            add.append(f"{alias} = CASE WHEN NEW.{arg} IS NULL THEN ivm_row.{alias} ELSE COALESCE(ivm_row.{alias}, 0) + NEW.{arg} END")
+            add.append(f"{nn} = ivm_row.{nn} + (NEW.{arg} IS NOT NULL)::int")
+            insert_vals.append(f"NEW.{arg}")
+        else:
+            compare, combine = ("<=", "LEAST") if func == "MIN" else (">=", "GREATEST")
+            recompute = f"(SELECT {func.lower()}({arg}) FROM {spec['table']} WHERE {base_group('OLD')}{where})"
+            remove.append(f"{alias} = CASE WHEN OLD.{arg} {compare} {alias} THEN {recompute} ELSE {alias} END")
+            add.append(f"{alias} = {combine}(ivm_row.{alias}, NEW.{arg})")
+            insert_vals.append(f"NEW.{arg}")
+    for a in spec["aggregates"]:
+        if a["func"] == "SUM":
+            insert_cols.append(_nn(a))
+            insert_vals.append(f"(NEW.{a['arg']} IS NOT NULL)::int")
+    remove.append("__ivm_count = __ivm_count - 1")
+    add.append("__ivm_count = ivm_row.__ivm_count + 1")
+    insert_cols.append("__ivm_count")
+    insert_vals.append("1")
+
+    return f"""
+CREATE OR REPLACE FUNCTION {view_name}_ivm_fn() RETURNS trigger AS $$
+DECLARE
+    ivm_matched boolean;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM {view_name};
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        {condition_check('OLD')}
+        IF ivm_matched THEN
+            {lock('OLD')}
+            UPDATE {view_name} SET {', '.join(remove)} WHERE {matches('OLD')};
+            DELETE FROM {view_name} WHERE {matches('OLD')} AND __ivm_count <= 0;
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        {condition_check('NEW')}
+        IF ivm_matched THEN
+            {lock('NEW')}
+            UPDATE {view_name} AS ivm_row SET {', '.join(add)} WHERE {matches('NEW')};
+            IF NOT FOUND THEN
+                INSERT INTO {view_name} AS ivm_row ({', '.join(insert_cols)}) VALUES ({', '.join(insert_vals)})
+                ON CONFLICT ({', '.join(group_alias[g] for g in spec['group'])}) DO UPDATE SET {', '.join(add)};
+            END IF;
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def _ensure_registry(conn):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {REGISTRY_TABLE} ("
+        "view_name text PRIMARY KEY, base_table text NOT NULL, definition text NOT NULL, "
+        "created_at timestamptz NOT NULL DEFAULT now())"
+    ))
+
+
+def create_incremental_view(view_name: str, definition: str) -> Dict[str, Any]:
+    spec = parse_definition(definition)
+    group_cols = ", ".join(c["alias"] for c in spec["columns"])
+    try:
+        with engine.begin() as conn:
+            _ensure_registry(conn)
+            conn.execute(text(f"CREATE TABLE {view_name} AS {_select_sql(spec)}"))
+            # Unique so concurrent writers cannot create the same group twice; the trigger's
+            # INSERT ... ON CONFLICT uses it as the arbiter. NULL groups are only covered by
+            # NULLS NOT DISTINCT (PostgreSQL 15+).
+            nulls = " NULLS NOT DISTINCT" if int(conn.execute(text("SHOW server_version_num")).scalar()) >= 150000 else ""
+            conn.execute(text(f"CREATE UNIQUE INDEX {view_name}_ivm_group ON {view_name} ({group_cols}){nulls}"))
+            conn.execute(text(_trigger_function_sql(view_name, spec)))
+            conn.execute(text(
+                f"CREATE TRIGGER {view_name}_ivm AFTER INSERT OR UPDATE OR DELETE ON {spec['table']} "
+                f"FOR EACH ROW EXECUTE FUNCTION {view_name}_ivm_fn()"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER {view_name}_ivm_truncate AFTER TRUNCATE ON {spec['table']} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION {view_name}_ivm_fn()"
+            ))
+            conn.execute(
+                text(f"INSERT INTO {REGISTRY_TABLE} (view_name, base_table, definition) VALUES (:view, :table, :definition)"),
+                {"view": view_name, "table": spec["table"], "definition": definition},
+            )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    schema_cache.invalidate(view_name)
+    result_cache.add_dependency(spec["table"], view_name)
+    return {"message": f"Incremental view '{view_name}' created successfully.", "base_table": spec["table"]}
+
+
+def _registered(conn, view_name: str) -> Dict[str, Any]:
+    _ensure_registry(conn)
+    row = conn.execute(
+        text(f"SELECT view_name, base_table, definition FROM {REGISTRY_TABLE} WHERE view_name = :view"),
+        {"view": view_name},
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"'{view_name}' is not an incremental view")
+    return dict(row._mapping)
+
+
+def drop_incremental_view(view_name: str) -> Dict[str, Any]:
+    with engine.begin() as conn:
+        view = _registered(conn, view_name)
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {view_name}_ivm ON {view['base_table']}"))
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {view_name}_ivm_truncate ON {view['base_table']}"))
+        conn.execute(text(f"DROP FUNCTION IF EXISTS {view_name}_ivm_fn()"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {view_name}"))
+        conn.execute(text(f"DELETE FROM {REGISTRY_TABLE} WHERE view_name = :view"), {"view": view_name})
+    schema_cache.invalidate(view_name)
+    result_cache.invalidate_table(view_name)
+    return {"message": f"Incremental view '{view_name}' dropped successfully."}
+
+
+def refresh_incremental_view(view_name: str) -> Dict[str, Any]:
+    """
+    Recompute the whole summary (e.g. after bulk loads with triggers disabled).
+    """
+    started = time.time()
+    with engine.begin() as conn:
+        view = _registered(conn, view_name)
+        spec = parse_definition(view["definition"])
+        conn.execute(text(f"LOCK TABLE {view_name} IN EXCLUSIVE MODE"))
+        conn.execute(text(f"DELETE FROM {view_name}"))
+        conn.execute(text(f"INSERT INTO {view_name} {_select_sql(spec)}"))
+        rows = conn.execute(text(f"SELECT count(*) FROM {view_name}")).scalar()
+    result_cache.invalidate_table(view_name)
+    return {
+        "message": f"Incremental view '{view_name}' recomputed.",
+        "rows": rows,
+        "duration_ms": round((time.time() - started) * 1000, 3),
+    }
+
+
+def load_dependencies():
+    """
+    Register every incremental view's base table with the result cache. Called at startup.
+    """
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT to_regclass(:table)"), {"table": REGISTRY_TABLE}).scalar() is None:
+            return
+        rows = conn.execute(text(f"SELECT view_name, base_table FROM {REGISTRY_TABLE}")).fetchall()
+    for row in rows:
+        result_cache.add_dependency(row.base_table, row.view_name)
+
+
+def list_incremental_views() -> List[Dict[str, Any]]:
+    with engine.begin() as conn:
+        _ensure_registry(conn)
+        rows = conn.execute(text(f"SELECT view_name, base_table, definition, created_at FROM {REGISTRY_TABLE} ORDER BY view_name"))
+        views = [dict(row._mapping) for row in rows]
+    for view in views:
+        result_cache.add_dependency(view["base_table"], view["view_name"])
+    return views
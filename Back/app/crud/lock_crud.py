@@ -0,0 +1,175 @@
+from sqlalchemy import text
+from collections import deque
+from datetime import datetime, timezone
+from ..database import engine
+from typing import List, Optional, Dict, Any
+import threading
+
+# Every lock held or awaited by another backend, with the owning session's activity.
+# wait_seconds is measured from the session's last state change, which for a session
+# waiting on a lock is when the waiting statement started.
+LOCKS_SQL = """
+SELECT l.pid, l.locktype, l.mode, l.granted,
+       l.relation::regclass::text AS relation,
+       l.transactionid::text AS transactionid, l.virtualxid,
+       l.classid, l.objid, l.objsubid,
+       a.usename, a.application_name, a.client_addr::text AS client_addr,
+       a.state, a.wait_event_type, a.wait_event, a.query,
+       a.xact_start, a.query_start,
+       EXTRACT(EPOCH FROM now() - a.xact_start) AS xact_seconds,
+       CASE WHEN NOT l.granted THEN EXTRACT(EPOCH FROM now() - a.state_change) END AS wait_seconds
+FROM pg_locks l
+LEFT JOIN pg_stat_activity a ON a.pid = l.pid
+WHERE l.pid IS DISTINCT FROM pg_backend_pid()
+ORDER BY l.pid, l.granted DESC
+"""
+
+BLOCKING_SQL = """
+SELECT pid AS blocked, unnest(pg_blocking_pids(pid)) AS blocker
+FROM pg_stat_activity
+WHERE cardinality(pg_blocking_pids(pid)) > 0
+"""
+
+
+def _advisory_key(lock: Dict[str, Any]) -> Dict[str, Any]:
+    # pg_advisory_lock(bigint) is stored as classid/objid halves with objsubid = 1;
+    # the (int, int) form uses objsubid = 2.
+    if lock["objsubid"] == 1:
+        key = (int(lock["classid"]) << 32) | int(lock["objid"])
+        if key >= 1 << 63:
+            key -= 1 << 64
+        return {"key": key}
+    return {"key1": int(lock["classid"]), "key2": int(lock["objid"])}
+
+
+def _blocking_depth(pid: int, blocked_by: Dict[int, List[int]], seen=None) -> int:
+    seen = seen or set()
+    if pid in seen:
+        return 0  # deadlock cycle; the server will break it
+    seen.add(pid)
+    return 1 + max((_blocking_depth(b, blocked_by, seen) for b in blocked_by.get(pid, [])), default=0)
+
+
+def get_lock_graph() -> Dict[str, Any]:
+    """
+    Current locks as a graph: one node per session holding or awaiting a lock, and an
+    edge from each blocking pid to each pid it blocks.
+    """
+    with engine.connect() as conn:
+        locks = [dict(row._mapping) for row in conn.execute(text(LOCKS_SQL))]
+        edges = [dict(row._mapping) for row in conn.execute(text(BLOCKING_SQL))]
+
+    nodes: Dict[int, Dict[str, Any]] = {}
+    advisory = []
+    for lock in locks:
+        node = nodes.setdefault(lock["pid"], {
+            "pid": lock["pid"],
+            "usename": lock["usename"],
+            "application_name": lock["application_name"],
+            "client_addr": lock["client_addr"],
+            "state": lock["state"],
+            "wait_event_type": lock["wait_event_type"],
+            "wait_event": lock["wait_event"],
+            "query": lock["query"],
+            "xact_seconds": lock["xact_seconds"],
+            "wait_seconds": None,
+            "held": [],
+            "awaiting": [],
+        })
+        summary = {
+            "locktype": lock["locktype"],
+            "mode": lock["mode"],
+            "relation": lock["relation"],
+            "transactionid": lock["transactionid"],
+        }
+        if lock["locktype"] == "advisory":
+            summary.update(_advisory_key(lock))
+            advisory.append({"pid": lock["pid"], "mode": lock["mode"], "granted": lock["granted"], **_advisory_key(lock)})
+        if lock["granted"]:
+            node["held"].append(summary)
+        else:
+            node["awaiting"].append(summary)
+            node["wait_seconds"] = lock["wait_seconds"]
+
+    blocked_by: Dict[int, List[int]] = {}
+    blocking: Dict[int, List[int]] = {}
+    for edge in edges:
+        blocked_by.setdefault(edge["blocked"], []).append(edge["blocker"])
+        blocking.setdefault(edge["blocker"], []).append(edge["blocked"])
+    for node in nodes.values():
+        node["blocked_by"] = blocked_by.get(node["pid"], [])
+        node["blocking"] = blocking.get(node["pid"], [])
+
+    waits = [n["wait_seconds"] for n in nodes.values() if n["wait_seconds"] is not None]
+    return {
+        "sampled_at": datetime.now(timezone.utc).isoformat(),
+        "nodes": list(nodes.values()),
+        "edges": edges,
+        # Sessions blocking others without being blocked themselves: the ones to look at first.
+        "root_blockers": sorted(pid for pid in blocking if pid not in blocked_by),
+        "max_chain_depth": max((_blocking_depth(pid, blocked_by) for pid in blocked_by), default=0),
+        "max_wait_seconds": max(waits, default=None),
+        "advisory_locks": advisory,
+        "lock_count": len(locks),
+    }
+
+
+# -----------------------------------
+# Periodic Sampling
+# -----------------------------------
+
+class LockSampler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.interval = 5.0
+        self.samples: deque = deque(maxlen=720)
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float, max_samples: int):
+        with self._lock:
+            if self.running():
+                self.stop()
+            self.interval = interval
+            self.samples = deque(self.samples, maxlen=max_samples)
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), name="lock-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        self._thread = None
+
+    def _run(self, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                graph = get_lock_graph()
+                self.samples.append({
+                    "sampled_at": graph["sampled_at"],
+                    "lock_count": graph["lock_count"],
+                    "waiting": sum(1 for n in graph["nodes"] if n["awaiting"]),
+                    "edges": [(e["blocker"], e["blocked"]) for e in graph["edges"]],
+                    "root_blockers": graph["root_blockers"],
+                    "max_chain_depth": graph["max_chain_depth"],
+                    "max_wait_seconds": graph["max_wait_seconds"],
+                    "advisory_locks": len(graph["advisory_locks"]),
+                })
+            except Exception as e:
+                print("Lock sampling failed:", str(e))
+            stop.wait(self.interval)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running(),
+            "interval_seconds": self.interval,
+            "max_samples": self.samples.maxlen,
+            "sample_count": len(self.samples),
+        }
+
+
+sampler = LockSampler()
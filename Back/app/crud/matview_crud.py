@@ -0,0 +1,364 @@
+from fastapi import HTTPException
+from sqlalchemy import text
+from collections import deque
+from ..database import engine
+from .. import result_cache
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Optional, Dict, Any, Set
+import threading
+import time
+
+# -----------------------------------
+# Materialized View Refresh
+# -----------------------------------
+# REFRESH ... CONCURRENTLY keeps the view readable during the refresh but needs a
+# populated view with a unique, non-partial, column-only index. Every refresh made
+# through the API is timed and kept in a short per-view history.
+
+REFRESH_HISTORY_SIZE = 50
+
+_history: Dict[str, deque] = {}
+_last_success: Dict[str, float] = {}
+_view_locks: Dict[str, threading.Lock] = {}
+_state_lock = threading.Lock()
+
+UNIQUE_INDEX_SQL = """
+SELECT i.relname
+FROM pg_index x
+JOIN pg_class i ON i.oid = x.indexrelid
+WHERE x.indrelid = to_regclass(:view)
+  AND x.indisunique AND x.indisvalid
+  AND x.indpred IS NULL
+  AND NOT (0 = ANY(x.indkey::int2[]))
+ORDER BY i.relname
+LIMIT 1
+"""
+
+MATVIEWS_SQL = """
+SELECT schemaname, matviewname, ispopulated
+FROM pg_matviews
+WHERE schemaname NOT IN ('pg_catalog', 'information_schema')
+ORDER BY schemaname, matviewname
+"""
+
+
+def _view_lock(view_name: str) -> threading.Lock:
+    with _state_lock:
+        return _view_locks.setdefault(view_name, threading.Lock())
+
+
+def unique_index_for(conn, view_name: str) -> Optional[str]:
+    return conn.execute(text(UNIQUE_INDEX_SQL), {"view": view_name}).scalar()
+
+
+def _is_populated(conn, view_name: str) -> bool:
+    return bool(conn.execute(
+        text("SELECT relispopulated FROM pg_class WHERE oid = to_regclass(:view)"), {"view": view_name}
+    ).scalar())
+
+
+def _record(view_name: str, entry: Dict[str, Any]):
+    with _state_lock:
+        _history.setdefault(view_name, deque(maxlen=REFRESH_HISTORY_SIZE)).append(entry)
+        if entry["status"] == "succeeded":
+            _last_success[view_name] = entry["finished_at"]
+
+
+def refresh_matview(view_name: str, concurrently: Optional[bool] = None, exact_count: bool = False) -> Dict[str, Any]:
+    """
+    Refresh a materialized view and record how long it took and how many rows it has.
+    `concurrently`: True requires a unique index, False never uses it, None (default)
+    refreshes concurrently whenever the view qualifies.
+    Row counts are the planner's estimate (pg_class.reltuples, as of the last ANALYZE)
+    unless `exact_count` asks for a count(*), which scans the whole view again.
+    """
+    with _view_lock(view_name):
+        started = time.time()
+        entry = {"started_at": started, "concurrently": False, "status": "running"}
+        try:
+            # REFRESH ... CONCURRENTLY cannot run inside a transaction block.
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                unique_index = unique_index_for(conn, view_name)
+                eligible = unique_index is not None and _is_populated(conn, view_name)
+                if concurrently and not eligible:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"'{view_name}' needs a unique index on plain columns and must be populated "
+                               f"to be refreshed concurrently.",
+                    )
+                entry["concurrently"] = eligible if concurrently is None else concurrently
+                entry["unique_index"] = unique_index
+                keyword = "CONCURRENTLY " if entry["concurrently"] else ""
+                conn.execute(text(f"REFRESH MATERIALIZED VIEW {keyword}{view_name};"))
+                refreshed = time.time()
+                if exact_count:
+                    entry["rows"] = conn.execute(text(f"SELECT count(*) FROM {view_name}")).scalar()
+                else:
+                    estimate = conn.execute(
+                        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:view)"), {"view": view_name}
+                    ).scalar()
+                    # -1 (PostgreSQL 14+) means never analyzed.
+                    entry["rows_estimate"] = int(estimate) if estimate is not None and estimate >= 0 else None
+            entry["status"] = "succeeded"
+            entry["duration_ms"] = round((refreshed - started) * 1000, 3)
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = e.detail if isinstance(e, HTTPException) else str(e)
+            raise
+        finally:
+            entry["finished_at"] = time.time()
+            _record(view_name, entry)
+        result_cache.invalidate_table(view_name)
+    return {
+        "message": f"Materialized view '{view_name}' refreshed successfully.",
+        **{k: v for k, v in entry.items() if k != "status"},
+    }
+
+
+def refresh_matview_in_background(view_name: str, concurrently: Optional[bool] = None,
+                                  exact_count: bool = False) -> Dict[str, Any]:
+    def run():
+        try:
+            refresh_matview(view_name, concurrently, exact_count)
+        except Exception as e:
+            print(f"Background refresh of {view_name} failed:", str(e))
+
+    threading.Thread(target=run, name=f"matview-refresh-{view_name}", daemon=True).start()
+    return {"message": f"Refresh of materialized view '{view_name}' started."}
+
+
+def refresh_history(view_name: str) -> List[Dict[str, Any]]:
+    with _state_lock:
+        return list(_history.get(view_name, ()))
+
+
+def staleness_seconds(view_name: str) -> Optional[float]:
+    """
+    Seconds since the last successful refresh made by this process (None if unknown).
+    """
+    with _state_lock:
+        last = _last_success.get(view_name)
+    return round(time.time() - last, 3) if last else None
+
+
+# -----------------------------------
+# Refresh Scheduler
+# -----------------------------------
+
+class MatviewRefreshScheduler:
+    """
+    Refreshes each scheduled view every `interval_seconds`, one view at a time,
+    on a single background thread.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._schedules: Dict[str, Dict[str, Any]] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, view_name: str, interval_seconds: float, concurrently: Optional[bool] = None) -> Dict[str, Any]:
+        with self._lock:
+            self._schedules[view_name] = {
+                "interval_seconds": interval_seconds,
+                "concurrently": concurrently,
+                "next_run": time.time() + interval_seconds,
+            }
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="matview-scheduler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return self.get(view_name)
+
+    def unschedule(self, view_name: str):
+        with self._lock:
+            if self._schedules.pop(view_name, None) is None:
+                raise HTTPException(status_code=404, detail=f"No refresh schedule for '{view_name}'")
+
+    def get(self, view_name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            schedule = self._schedules.get(view_name)
+            return dict(schedule) if schedule else None
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: dict(s) for name, s in self._schedules.items()}
+
+    def _run(self):
+        while True:
+            now = time.time()
+            with self._lock:
+                due = [(name, s) for name, s in self._schedules.items() if s["next_run"] <= now]
+                upcoming = min((s["next_run"] for s in self._schedules.values()), default=now + 60)
+            for name, schedule in due:
+                try:
+                    refresh_matview(name, schedule["concurrently"])
+                except Exception as e:
+                    print(f"Scheduled refresh of {name} failed:", str(e))
+                with self._lock:
+                    schedule["next_run"] = time.time() + schedule["interval_seconds"]
+            if not due:
+                self._wake.wait(max(0.0, min(upcoming - time.time(), 60)))
+                self._wake.clear()
+
+
+scheduler = MatviewRefreshScheduler()
+
+
+def matview_status() -> List[Dict[str, Any]]:
+    """
+    Every materialized view with its concurrent-refresh eligibility, staleness,
+    schedule and most recent refresh.
+    """
+    with engine.connect() as conn:
+        views = [dict(row._mapping) for row in conn.execute(text(MATVIEWS_SQL))]
+        for view in views:
+            name = view["matviewname"] if view["schemaname"] == "public" else f"{view['schemaname']}.{view['matviewname']}"
+            view["name"] = name
+            view["unique_index"] = unique_index_for(conn, name)
+    for view in views:
+        history = refresh_history(view["name"])
+        view["can_refresh_concurrently"] = view["unique_index"] is not None and view["ispopulated"]
+        view["staleness_seconds"] = staleness_seconds(view["name"])
+        view["schedule"] = scheduler.get(view["name"])
+        view["last_refresh"] = history[-1] if history else None
+    return views
+
+
+# -----------------------------------
+# View Dependency Graph
+# -----------------------------------
+# A view's rewrite rule (pg_rewrite) has a normal pg_depend entry on every relation its
+# query reads, which gives the edges relation -> view.
+
+VIEW_NODES_SQL = """
+SELECT c.oid::regclass::text AS name, c.relkind
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('v', 'm')
+  AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+  AND n.nspname NOT LIKE 'pg_toast%'
+"""
+
+VIEW_EDGES_SQL = """
+SELECT DISTINCT source.oid::regclass::text AS source, source.relkind AS source_kind,
+       dependent.oid::regclass::text AS dependent
+FROM pg_depend d
+JOIN pg_rewrite r ON r.oid = d.objid
+JOIN pg_class dependent ON dependent.oid = r.ev_class
+JOIN pg_class source ON source.oid = d.refobjid
+JOIN pg_namespace n ON n.oid = dependent.relnamespace
+WHERE d.classid = 'pg_rewrite'::regclass
+  AND d.refclassid = 'pg_class'::regclass
+  AND d.deptype = 'n'
+  AND dependent.oid <> source.oid
+  AND dependent.relkind IN ('v', 'm')
+  AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+"""
+
+_RELKINDS = {"r": "table", "p": "partitioned_table", "v": "view", "m": "materialized_view", "f": "foreign_table"}
+
+
+def _topological_levels(nodes: List[str], parents: Dict[str, Set[str]]) -> List[List[str]]:
+    # Kahn's algorithm, grouped: every node in a level depends only on earlier levels.
+    remaining = {n: set(parents.get(n, ())) & set(nodes) for n in nodes}
+    levels = []
+    while remaining:
+        level = sorted(n for n, deps in remaining.items() if not deps)
+        if not level:
+            raise ValueError(f"Dependency cycle among {sorted(remaining)}")
+        levels.append(level)
+        for n in level:
+            del remaining[n]
+        for deps in remaining.values():
+            deps.difference_update(level)
+    return levels
+
+
+def view_dependency_graph() -> Dict[str, Any]:
+    """
+    Views and materialized views with the relations they read, topological levels,
+    and for each materialized view the materialized views it depends on (through plain views).
+    """
+    with engine.connect() as conn:
+        views = {row.name: _RELKINDS[row.relkind] for row in conn.execute(text(VIEW_NODES_SQL))}
+        edges = [dict(row._mapping) for row in conn.execute(text(VIEW_EDGES_SQL))]
+
+    nodes = dict(views)
+    parents: Dict[str, Set[str]] = {name: set() for name in views}
+    for edge in edges:
+        nodes.setdefault(edge["source"], _RELKINDS.get(edge["source_kind"], edge["source_kind"]))
+        parents.setdefault(edge["dependent"], set()).add(edge["source"])
+
+    def matview_parents(name: str, seen: Set[str]) -> Set[str]:
+        found = set()
+        for parent in parents.get(name, ()):
+            if parent in seen:
+                continue
+            seen.add(parent)
+            if nodes.get(parent) == "materialized_view":
+                found.add(parent)
+            elif nodes.get(parent) == "view":
+                found |= matview_parents(parent, seen)
+        return found
+
+    matviews = sorted(n for n, kind in views.items() if kind == "materialized_view")
+    matview_dependencies = {name: sorted(matview_parents(name, set())) for name in matviews}
+    return {
+        "nodes": [{"name": name, "kind": kind} for name, kind in sorted(nodes.items())],
+        "edges": [{"from": e["source"], "to": e["dependent"]} for e in edges],
+        "levels": _topological_levels(sorted(views), parents),
+        "matview_dependencies": matview_dependencies,
+        "matview_refresh_order": _topological_levels(
+            matviews, {k: set(v) for k, v in matview_dependencies.items()}
+        ),
+    }
+
+
+def _refresh_for_report(view_name: str, concurrently: Optional[bool]) -> Dict[str, Any]:
+    try:
+        result = refresh_matview(view_name, concurrently)
+        return {"status": "succeeded", **{k: result[k] for k in ("duration_ms", "rows", "rows_estimate", "concurrently") if k in result}}
+    except Exception as e:
+        return {"status": "failed", "error": e.detail if isinstance(e, HTTPException) else str(e)}
+
+
+def refresh_all_matviews(concurrently: Optional[bool] = None, max_workers: int = 4) -> Dict[str, Any]:
+    """
+    Refresh every materialized view after the materialized views it reads from. Views
+    whose dependencies are done are refreshed in parallel, each on its own connection;
+    a failure skips everything downstream of it.
+    """
+    graph = view_dependency_graph()
+    dependencies = graph["matview_dependencies"]
+    remaining = dict(dependencies)
+    results: Dict[str, Dict[str, Any]] = {}
+    started = time.time()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="matview-refresh-all") as pool:
+        running = {}
+        while remaining or running:
+            ready = [name for name, deps in remaining.items() if all(d in results for d in deps)]
+            for name in ready:
+                deps = remaining.pop(name)
+                failed = [d for d in deps if results[d]["status"] != "succeeded"]
+                if failed:
+                    results[name] = {"status": "skipped", "reason": f"dependency {failed} did not refresh"}
+                else:
+                    running[pool.submit(_refresh_for_report, name, concurrently)] = name
+            if not running:
+                for name in remaining:
+                    results[name] = {"status": "skipped", "reason": "dependency cycle"}
+                remaining.clear()
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+
+    return {
+        "order": graph["matview_refresh_order"],
+        "results": results,
+        "succeeded": sum(1 for r in results.values() if r["status"] == "succeeded"),
+        "failed": sum(1 for r in results.values() if r["status"] == "failed"),
+        "skipped": sum(1 for r in results.values() if r["status"] == "skipped"),
+        "elapsed_ms": round((time.time() - started) * 1000, 3),
+    }
@@ -1,10 +1,25 @@
 from fastapi import HTTPException
 from sqlalchemy import Column, Integer, String, text, Table
-from sqlalchemy import inspect
+from sqlalchemy import inspect, select, literal_column, bindparam, exc
+from sqlalchemy.dialects import postgresql
+from functools import lru_cache
+from collections import namedtuple, OrderedDict
 from ..database import engine, metadata
+from ..config import SELECT_STATEMENT_CACHE_SIZE, SELECT_PREPARED_STATEMENTS, SELECT_PREPARED_PER_CONNECTION
+from .. import schema_cache, result_cache
+from .explain_crud import explain_query
+from .export_crud import result_type_codes
+from . import index_advisor_crud
 from typing import List, Optional, Dict, Any, Tuple
 
-def select_data(
+# A built SELECT for one query shape: the executable statement, the SQL shown to the user
+# (with :name placeholders) and the $n form plus parameter order used for PREPARE.
+SelectPlan = namedtuple("SelectPlan", ["statement", "display_sql", "prepared_sql", "prepared_params"])
+
+_prepare_dialect = postgresql.psycopg2.dialect(paramstyle="numeric_dollar")
+
+
+def select_shape(
     table: str,
     columns: Optional[List[str]] = None,
     where: Optional[Dict[str, Any]] = None,
@@ -15,96 +30,276 @@ def select_data(
     group_by: Optional[str] = None,
     having: Optional[str] = None,
     distinct: bool = False,
-    join: Optional[List[Dict[str, str]]] = None,  # Accept join type
+    join: Optional[List[Dict[str, str]]] = None,
     aggregate: Optional[Dict[str, str]] = None
-) -> Tuple[List[Dict[str, Any]], str]:
+) -> Tuple[tuple, Dict[str, Any]]:
     """
-    Enhanced SQL SELECT function for PostgreSQL using SQLAlchemy.
+    Split a select request into its shape (everything except the parameter values)
+    and the bind parameters. Requests with the same shape share one cached statement.
 
     The `where` parameter accepts a dictionary where each value can either be a plain value
     (for equality) or a list/tuple of two items [operator, value] (e.g., ["=", 2]).
     """
-    sql = "SELECT "
+    query_params = {}
+    where_shape = []
+    for idx, (col, val) in enumerate((where or {}).items()):
+        # Check if val is a tuple or list with exactly 2 elements (operator, value)
+        if isinstance(val, (tuple, list)) and len(val) == 2:
+            operator, value = val
+        else:
+            operator, value = "=", val
+        where_shape.append((col, operator.strip()))
+        query_params[f"w{idx}"] = value
 
-    # Handle DISTINCT
-    if distinct:
-        sql += "DISTINCT "
+    if limit is not None:
+        query_params["limit"] = limit
+    if offset is not None:
+        query_params["offset"] = offset
+
+    join_shape = tuple(
+        (
+            join_data.get("join_type", "INNER JOIN"),  # Default to INNER JOIN
+            join_data["join_table"],
+            join_data.get("condition", ""),  # Default to empty if not provided
+        )
+        for join_data in (join or [])
+    )
+    order = order.upper() if order and order.upper() in ["ASC", "DESC"] else None
+
+    shape = (
+        table,
+        tuple(columns) if columns else None,
+        tuple(where_shape),
+        order_by,
+        order,
+        limit is not None,
+        offset is not None,
+        group_by,
+        having,
+        bool(distinct),
+        join_shape,
+        tuple(aggregate.items()) if aggregate else None,
+    )
+    return shape, query_params
+
+
+@lru_cache(maxsize=SELECT_STATEMENT_CACHE_SIZE)
+def build_select_plan(shape: tuple) -> SelectPlan:
+    """
+    Build the SELECT for a query shape with SQLAlchemy Core. Cached per shape, so the same
+    statement object (and SQLAlchemy's compiled form of it) is reused across requests.
+    """
+    (table, columns, where_shape, order_by, order, has_limit, has_offset,
+     group_by, having, distinct, join_shape, aggregate) = shape
 
     # Handle columns & aggregates
     if aggregate:
-        aggregate_columns = [f"{func}({col}) AS \"{col}_{func}\"" for col, func in aggregate.items()]
-        sql += ", ".join(aggregate_columns)
+        selected = [literal_column(f"{func}({col}) AS \"{col}_{func}\"") for col, func in aggregate]
     elif columns:
-        sql += ", ".join(columns)
+        selected = [literal_column(col) for col in columns]
     else:
-        sql += "*"
-
-    sql += f" FROM {table}"
+        selected = [literal_column("*")]
 
     # Handle JOIN
-    if join:
-        for join_data in join:
-            join_type = join_data.get("join_type", "INNER JOIN")  # Default to INNER JOIN
-            join_table = join_data["join_table"]
-            condition = join_data.get("condition", "")  # Default to empty if not provided
-        
-            if join_type.upper() == "CROSS JOIN":
-                sql += f" {join_type} {join_table}"  # CROSS JOIN doesn't require an ON condition
-            else:
-                sql += f" {join_type} {join_table} ON {condition}"
+    from_sql = table
+    for join_type, join_table, condition in join_shape:
+        if join_type.upper() == "CROSS JOIN":
+            from_sql += f" {join_type} {join_table}"  # CROSS JOIN doesn't require an ON condition
+        else:
+            from_sql += f" {join_type} {join_table} ON {condition}"
+
+    stmt = select(*selected).select_from(text(from_sql))
+
+    # Handle DISTINCT
+    if distinct:
+        stmt = stmt.distinct()
 
     # Handle WHERE conditions
-    query_params = {}
-    if where:
-        conditions = []
-        for idx, (col, val) in enumerate(where.items()):
-            placeholder = f":{col}{idx}"
-            # Check if val is a tuple or list with exactly 2 elements (operator, value)
-            if isinstance(val, (tuple, list)) and len(val) == 2:
-                operator, value = val
-                conditions.append(f"{col} {operator} {placeholder}")
-                query_params[f"{col}{idx}"] = value
-            else:
-                conditions.append(f"{col} = {placeholder}")
-                query_params[f"{col}{idx}"] = val
-        sql += " WHERE " + " AND ".join(conditions)
-
-    # Handle GROUP BY
-    if group_by:
-        sql += f" GROUP BY {group_by}"
+    for idx, (col, operator) in enumerate(where_shape):
+        stmt = stmt.where(literal_column(col).op(operator)(bindparam(f"w{idx}")))
 
-    # Handle HAVING
+    # Handle GROUP BY / HAVING
+    if group_by:
+        stmt = stmt.group_by(text(group_by))
     if having:
-        sql += f" HAVING {having}"
+        stmt = stmt.having(text(having))
 
     # Handle ORDER BY
     if order_by:
-        sql += f" ORDER BY {order_by}"
-        if order and order.upper() in ["ASC", "DESC"]:
-            sql += f" {order.upper()}"
+        stmt = stmt.order_by(text(f"{order_by} {order}" if order else order_by))
 
-    # Handle LIMIT & OFFSET using colon-style placeholders
-    if limit is not None:
-        sql += " LIMIT :limit"
-        query_params["limit"] = limit
-    if offset is not None:
-        sql += " OFFSET :offset"
-        query_params["offset"] = offset
+    # Handle LIMIT & OFFSET as bind parameters so they don't change the shape
+    if has_limit:
+        stmt = stmt.limit(bindparam("limit", type_=Integer))
+    if has_offset:
+        stmt = stmt.offset(bindparam("offset", type_=Integer))
+
+    # Executed as a reusable text() so result keys come from the cursor, as they
+    # did when this query was assembled by hand.
+    display_sql = str(stmt).replace(" \n", " ").replace("\n", " ")
+    prepared = stmt.compile(dialect=_prepare_dialect)
+    return SelectPlan(text(display_sql), display_sql, prepared.string, tuple(prepared.positiontup or ()))
+
+
+def build_select_query(*args, **kwargs) -> Tuple[SelectPlan, Dict[str, Any]]:
+    """
+    Return the cached plan for a select request together with its bind parameters.
+    Takes the same arguments as select_data.
+    """
+    shape, query_params = select_shape(*args, **kwargs)
+    plan = build_select_plan(shape)
+    index_advisor_crud.record_select(shape, plan, query_params)
+    return plan, query_params
+
+
+def format_query(sql: str, query_params: Dict[str, Any]) -> str:
+    """
+    Inline the bind parameters into the SQL text for display.
+    """
+    formatted_sql = sql
+    # Longest names first so :w1 does not clobber :w10
+    for param in sorted(query_params, key=len, reverse=True):
+        value = query_params[param]
+        formatted_sql = formatted_sql.replace(f":{param}", f"'{value}'" if isinstance(value, str) else str(value))
+    return formatted_sql
+
+
+def _prepare(connection, plan: SelectPlan, generation: tuple) -> str:
+    info = connection.connection.info
+    prepared = info["prepared_selects"]
+    while len(prepared) >= SELECT_PREPARED_PER_CONNECTION:
+        _, (evicted, _) = prepared.popitem(last=False)
+        connection.exec_driver_sql(f"DEALLOCATE {evicted}")
+    # Names come from a per-connection counter so they are never reused.
+    info["prepared_select_counter"] = info.get("prepared_select_counter", 0) + 1
+    name = f"select_plan_{info['prepared_select_counter']}"
+    connection.exec_driver_sql(f"PREPARE {name} AS {plan.prepared_sql}")
+    prepared[plan.prepared_sql] = (name, generation)
+    return name
+
+
+def _deallocate(connection, plan: SelectPlan):
+    entry = connection.connection.info["prepared_selects"].pop(plan.prepared_sql, None)
+    if entry is not None:
+        connection.exec_driver_sql(f"DEALLOCATE {entry[0]}")
+
+
+def _execute_sql(name: str, args: str) -> str:
+    return f"EXECUTE {name}({args})" if args else f"EXECUTE {name}"
+
+
+def _execute_prepared(connection, plan: SelectPlan, query_params: Dict[str, Any], tables: List[str] = ()):
+    """
+    Run the plan as a server-side prepared statement on this connection, preparing it
+    the first time the connection sees this shape. Statements prepared before DDL on
+    one of `tables` went through schema_cache.invalidate are prepared again.
+    """
+    prepared = connection.connection.info.setdefault("prepared_selects", OrderedDict())
+    generation = schema_cache.generation(list(tables))
+    entry = prepared.get(plan.prepared_sql)
+    if entry is not None and entry[1] != generation:
+        _deallocate(connection, plan)
+        entry = None
+    if entry is None:
+        name = _prepare(connection, plan, generation)
+    else:
+        name = entry[0]
+        prepared.move_to_end(plan.prepared_sql)
+
+    args = ", ".join(f":{param}" for param in plan.prepared_params)
+    params = {param: query_params[param] for param in plan.prepared_params}
+    try:
+        return connection.execute(text(_execute_sql(name, args)), params)
+    except exc.DBAPIError as e:
+        connection.rollback()
+        _deallocate(connection, plan)
+        connection.commit()
+        # 0A000 "cached plan must not change result type": DDL made outside this API
+        # changed the result columns. Prepare the statement again and retry once.
+        if getattr(e.orig, "pgcode", None) != "0A000":
+            raise
+        name = _prepare(connection, plan, generation)
+        return connection.execute(text(_execute_sql(name, args)), params)
+
+
+def select_data(
+    table: str,
+    columns: Optional[List[str]] = None,
+    where: Optional[Dict[str, Any]] = None,
+    order_by: Optional[str] = None,
+    order: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    group_by: Optional[str] = None,
+    having: Optional[str] = None,
+    distinct: bool = False,
+    join: Optional[List[Dict[str, str]]] = None,  # Accept join type
+    aggregate: Optional[Dict[str, str]] = None
+) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Enhanced SQL SELECT function for PostgreSQL using SQLAlchemy.
+    Returns the rows and the executed query with its parameters inlined.
+    """
+    plan, query_params = build_select_query(
+        table, columns, where, order_by, order, limit, offset,
+        group_by, having, distinct, join, aggregate
+    )
 
     # Execute the query
     with engine.connect() as connection:
-        result = connection.execute(text(sql), query_params)
+        if SELECT_PREPARED_STATEMENTS:
+            result = _execute_prepared(connection, plan, query_params, result_cache.referenced_tables(table, join))
+        else:
+            result = connection.execute(plan.statement, query_params)
         rows = result.fetchall()
         cols = result.keys()
         data = [dict(zip(cols, row)) for row in rows]
 
-    formatted_sql = sql
-    for param, value in query_params.items():
-        formatted_sql = formatted_sql.replace(f":{param}", f"'{value}'" if isinstance(value, str) else str(value))
-    
-    return data, formatted_sql
+    return data, format_query(plan.display_sql, query_params)
+
+
+def select_rows(*args, **kwargs) -> Tuple[List[str], List[Any], List[tuple], str]:
+    """
+    Like select_data, but returns column names, type codes and plain row tuples
+    (no per-row dicts) for the columnar and Arrow response formats.
+    """
+    plan, query_params = build_select_query(*args, **kwargs)
+    with engine.connect() as connection:
+        result = connection.execute(plan.statement, query_params)
+        keys = list(result.keys())
+        type_codes = result_type_codes(result)
+        rows = [tuple(row) for row in result.fetchall()]
+    return keys, type_codes, rows, format_query(plan.display_sql, query_params)
+
+
+def stream_select_chunks(*args, chunk_size: int = 10000, **kwargs):
+    """
+    Run the query select_data would run on a server-side cursor and yield
+    (column names, type codes, rows) for every `chunk_size` rows fetched.
+    """
+    plan, query_params = build_select_query(*args, **kwargs)
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(plan.statement, query_params)
+        keys = list(result.keys())
+        # Server-side cursors have their description once SQLAlchemy buffers the first row at execute.
+        type_codes = result_type_codes(result)
+        empty = True
+        for partition in result.partitions(chunk_size):
+            empty = False
+            yield keys, type_codes, partition
+        if empty:
+            # Still emit the header/schema.
+            yield keys, type_codes, []
+
+
+def explain_select(*args, analyze: bool = False, **kwargs) -> Tuple[Dict[str, Any], str]:
+    """
+    EXPLAIN the query select_data would run for the same arguments.
+    Returns the summarized plan and the query with its parameters inlined.
+    """
+    plan, query_params = build_select_query(*args, **kwargs)
+    return explain_query(plan.statement, query_params, analyze), format_query(plan.display_sql, query_params)
 
 
 def get_table_names() -> List[str]:
-    inspector = inspect(engine)
-    return inspector.get_table_names()
+    return schema_cache.get_table_names()
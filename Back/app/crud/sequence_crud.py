@@ -1,6 +1,11 @@
 from sqlalchemy import text
+from collections import deque
 from app.schemas.sequence_schema import SequenceCreate
 from ..database import SessionLocal, engine
+from ..config import SEQUENCE_BLOCK_SIZE, SEQUENCE_REFILL_THRESHOLD
+from typing import List, Dict, Any, Optional
+import threading
+import time
 
 # Dependency to get a synchronous DB session.
 def get_db():
@@ -38,6 +43,15 @@ def get_next_value(db, seq_name: str):
     row = result.fetchone()
     return row["nextval"] if row else None
 
+def get_next_values(db, seq_name: str, count: int) -> List[int]:
+    """
+    Draw `count` values from the sequence in one round trip. Values are unique
+    but not necessarily contiguous when other sessions call nextval concurrently.
+    """
+    sql = f"SELECT NEXTVAL('{seq_name}') AS nextval FROM generate_series(1, :count);"
+    result = db.execute(text(sql), {"count": count})
+    return [row[0] for row in result]
+
 def get_current_value(db, seq_name: str):
     sql = f"SELECT CURRVAL('{seq_name}') as currval;"
     result = db.execute(text(sql))
@@ -49,18 +63,21 @@ def set_sequence_value(db, seq_name: str, value: int):
     result = db.execute(text(sql))
     row = result.fetchone()
     db.commit()
+    discard_allocator(seq_name)
     return row["setval"] if row else None
 
 def restart_sequence(db, seq_name: str, start_with: int):
     sql = f"ALTER SEQUENCE {seq_name} RESTART WITH {start_with};"
     db.execute(text(sql))
     db.commit()
+    discard_allocator(seq_name)
     return {"message": f"Sequence {seq_name} restarted with {start_with}"}
 
 def drop_sequence(db, seq_name: str):
     sql = f"DROP SEQUENCE {seq_name};"
     db.execute(text(sql))
     db.commit()
+    discard_allocator(seq_name)
     return {"message": f"Sequence {seq_name} dropped"}
 
 def list_sequences(db):
@@ -92,3 +109,199 @@ def reset_sequence_for_table(db, table: str, column: str):
     row = result.fetchone()
     db.commit()
     return row["new_val"] if row else None
+
+# -----------------------------------
+# In-process ID Block Allocator
+# -----------------------------------
+
+class SequenceBlockAllocator:
+    """
+    Hands out values of one sequence from a local buffer, fetching SEQUENCE_BLOCK_SIZE
+    values per round trip and topping the buffer up on a background thread.
+    """
+    def __init__(self, seq_name: str, block_size: int = SEQUENCE_BLOCK_SIZE,
+                 refill_threshold: int = SEQUENCE_REFILL_THRESHOLD):
+        self.seq_name = seq_name
+        self.block_size = block_size
+        self.refill_threshold = refill_threshold
+        self._values: deque = deque()
+        self._lock = threading.Lock()
+        self._refill_lock = threading.Lock()
+        self._refilling = False
+        self.fetches = 0
+
+    def _fetch(self, count: int):
+        with engine.connect() as conn:
+            values = get_next_values(conn, self.seq_name, count)
+        with self._lock:
+            self._values.extend(values)
+            self.fetches += 1
+
+    def _background_refill(self):
+        try:
+            with self._refill_lock:
+                self._fetch(self.block_size)
+        except Exception as e:
+            print(f"Refilling ID block for {self.seq_name} failed:", str(e))
+        finally:
+            self._refilling = False
+
+    def allocate(self, count: int) -> List[int]:
+        values: List[int] = []
+        while len(values) < count:
+            with self._lock:
+                while self._values and len(values) < count:
+                    values.append(self._values.popleft())
+            if len(values) < count:
+                # Buffer ran dry: fetch what is still needed plus a fresh block, in the caller's thread.
+                with self._refill_lock:
+                    if not self._values:
+                        self._fetch(count - len(values) + self.block_size)
+        with self._lock:
+            low = len(self._values) < self.refill_threshold and not self._refilling
+            if low:
+                self._refilling = True
+        if low:
+            threading.Thread(target=self._background_refill, daemon=True).start()
+        return values
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"buffered": len(self._values), "fetches": self.fetches, "block_size": self.block_size}
+
+
+_allocators: Dict[str, SequenceBlockAllocator] = {}
+_allocators_lock = threading.Lock()
+
+def allocate_ids(seq_name: str, count: int) -> List[int]:
+    with _allocators_lock:
+        allocator = _allocators.get(seq_name)
+        if allocator is None:
+            allocator = _allocators[seq_name] = SequenceBlockAllocator(seq_name)
+    return allocator.allocate(count)
+
+def allocator_stats(seq_name: str) -> Dict[str, int]:
+    allocator = _allocators.get(seq_name)
+    return allocator.stats() if allocator else {"buffered": 0, "fetches": 0, "block_size": SEQUENCE_BLOCK_SIZE}
+
+def discard_allocator(seq_name: str):
+    # Buffered values are stale after setval/restart/drop.
+    with _allocators_lock:
+        _allocators.pop(seq_name, None)
+
+# -----------------------------------
+# Sequence Health Report
+# -----------------------------------
+
+SEQUENCE_REPORT_SQL = """
+SELECT schemaname, sequencename, data_type::text AS data_type, start_value, min_value,
+       max_value, increment_by, cycle, cache_size, last_value
+FROM pg_sequences
+ORDER BY schemaname, sequencename
+"""
+
+# Per sequence: (monotonic time, last_value) pairs used for the consumption rate.
+_samples: Dict[str, deque] = {}
+_samples_lock = threading.Lock()
+SEQUENCE_SAMPLES_KEPT = 1440
+
+
+def _record_samples(rows: List[Dict[str, Any]], now: float):
+    with _samples_lock:
+        for row in rows:
+            if row["last_value"] is None:
+                continue
+            history = _samples.setdefault(row["name"], deque(maxlen=SEQUENCE_SAMPLES_KEPT))
+            previous = history[-1][1] if history else None
+            if previous is not None and (row["last_value"] - previous) * row["increment_by"] < 0:
+                history.clear()  # restarted, set back or cycled: the old samples no longer apply
+            history.append((now, row["last_value"]))
+
+
+def _forecast(row: Dict[str, Any]) -> Dict[str, Any]:
+    with _samples_lock:
+        history = list(_samples.get(row["name"], ()))
+    if len(history) < 2 or history[-1][0] == history[0][0]:
+        return {"values_per_second": None, "seconds_to_exhaustion": None, "samples": len(history)}
+    (t0, v0), (t1, v1) = history[0], history[-1]
+    rate = (v1 - v0) / (t1 - t0)
+    remaining = row["remaining"]
+    eta = remaining / abs(rate) if rate and (rate > 0) == (row["increment_by"] > 0) else None
+    return {"values_per_second": round(rate, 6), "seconds_to_exhaustion": eta, "samples": len(history)}
+
+
+def sequence_report(db, min_percent_used: float = 0.0, forecast: bool = True) -> List[Dict[str, Any]]:
+    """
+    Every sequence's position, limit and percent used from one pg_sequences query.
+    Each call also records a sample; the forecast extrapolates the consumption rate
+    between the oldest and newest samples to the sequence's limit.
+    """
+    rows = [dict(row._mapping) for row in db.execute(text(SEQUENCE_REPORT_SQL))]
+    for row in rows:
+        row["name"] = f"{row['schemaname']}.{row['sequencename']}"
+        span = row["max_value"] - row["min_value"]
+        if row["last_value"] is None:
+            # Never called nextval (or no privilege to read it).
+            row["percent_used"] = 0.0
+            row["remaining"] = span
+        elif row["increment_by"] > 0:
+            row["percent_used"] = round((row["last_value"] - row["min_value"]) * 100 / span, 4)
+            row["remaining"] = row["max_value"] - row["last_value"]
+        else:
+            row["percent_used"] = round((row["max_value"] - row["last_value"]) * 100 / span, 4)
+            row["remaining"] = row["last_value"] - row["min_value"]
+        row["remaining_calls"] = row["remaining"] // abs(row["increment_by"])
+    _record_samples(rows, time.monotonic())
+
+    report = []
+    for row in sorted(rows, key=lambda r: r["percent_used"], reverse=True):
+        if row["percent_used"] < min_percent_used:
+            continue
+        if forecast:
+            row["forecast"] = _forecast(row)
+        report.append(row)
+    return report
+
+
+class SequenceSampler:
+    """
+    Takes a sequence_report sample every `interval` seconds so forecasts have data
+    even when nobody is calling the report endpoint.
+    """
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.interval = 60.0
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float):
+        self.stop()
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="sequence-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        self._thread = None
+
+    def _run(self, stop: threading.Event):
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                sequence_report(db, forecast=False)
+            except Exception as e:
+                print("Sequence sampling failed:", str(e))
+            finally:
+                db.close()
+            stop.wait(self.interval)
+
+    def status(self) -> Dict[str, Any]:
+        return {"running": self.running(), "interval_seconds": self.interval}
+
+
+sequence_sampler = SequenceSampler()
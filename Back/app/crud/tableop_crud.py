@@ -2,7 +2,14 @@ from fastapi import HTTPException
 from sqlalchemy import Column, Integer, String, text, Table
 from sqlalchemy import inspect
 from ..database import engine, metadata
-from typing import List, Optional, Dict, Any, Tuple
+from .. import schema_cache, result_cache
+from .export_crud import result_type_codes
+from typing import List, Optional, Dict, Any, Tuple, Iterable
+import io
+import itertools
+import json
+import re
+import time
 
 def create_dynamic_table(table_name: str):
     table = Table(
@@ -11,11 +18,15 @@ def create_dynamic_table(table_name: str):
         Column("name", String, index=True)
     )
     metadata.create_all(engine, tables=[table])
+    schema_cache.invalidate(table_name)
+    result_cache.invalidate_table(table_name)
     return table_name
 
 def delete_dynamic_table(table_name: str):
     table = Table(table_name, metadata, autoload_with=engine)
     table.drop(engine)
+    schema_cache.invalidate(table_name)
+    result_cache.invalidate_table(table_name)
     return table_name
 
 def add_column(table_name: str, column_name: str, column_type: str):
@@ -23,37 +34,39 @@ def add_column(table_name: str, column_name: str, column_type: str):
     with engine.connect() as conn:
         conn.execute(text(query))
         conn.commit()
+    schema_cache.invalidate(table_name)
+    result_cache.invalidate_table(table_name)
 
 def drop_column(table_name: str, column_name: str):
     query = f"ALTER TABLE {table_name} DROP COLUMN {column_name}"
     with engine.connect() as conn:
         conn.execute(text(query))
         conn.commit()
+    schema_cache.invalidate(table_name)
+    result_cache.invalidate_table(table_name)
 
 def modify_column(table_name: str, column_name: str, new_column_type: str):
     query = f"ALTER TABLE {table_name} ALTER COLUMN {column_name} TYPE {new_column_type} USING {column_name}::{new_column_type}"
     with engine.connect() as conn:
         conn.execute(text(query))
         conn.commit()
+    schema_cache.invalidate(table_name)
+    result_cache.invalidate_table(table_name)
 
-def insert_row(table_name: str, row_data: dict):
-    inspector = inspect(engine)
-    columns = {col["name"] for col in inspector.get_columns(table_name)}
+def build_insert_row_query(table_name: str, row_data: dict) -> Tuple[str, Dict[str, Any]]:
+    columns = schema_cache.get_column_names(table_name)
     filtered_data = {k: v for k, v in row_data.items() if k in columns}
     if not filtered_data:
         raise ValueError("No valid columns provided for insertion.")
     column_names = ", ".join(filtered_data.keys())
     placeholders = ", ".join([f":{key}" for key in filtered_data.keys()])
     query = f"INSERT INTO {table_name} ({column_names}) VALUES ({placeholders})"
-    with engine.connect() as conn:
-        conn.execute(text(query), filtered_data)
-        conn.commit()
+    return query, filtered_data
 
-def update_row(table_name: str, condition: dict, new_values: dict):
-    inspector = inspect(engine)
-    if table_name not in inspector.get_table_names():
+def build_update_row_query(table_name: str, condition: dict, new_values: dict) -> Tuple[str, Dict[str, Any]]:
+    if not schema_cache.table_exists(table_name):
         raise ValueError(f"Table '{table_name}' does not exist.")
-    columns = {col["name"] for col in inspector.get_columns(table_name)}
+    columns = schema_cache.get_column_names(table_name)
     new_values = {k: v for k, v in new_values.items() if k in columns}
     condition = {k: v for k, v in condition.items() if k in columns}
     if not new_values:
@@ -63,20 +76,319 @@ def update_row(table_name: str, condition: dict, new_values: dict):
     set_clause = ", ".join([f"{col} = :{col}" for col in new_values.keys()])
     where_clause = " AND ".join([f"{col} = :{col}" for col in condition.keys()])
     query = f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}"
-    with engine.connect() as conn:
-        conn.execute(text(query), {**new_values, **condition})
-        conn.commit()
+    return query, {**new_values, **condition}
 
-def delete_row(table_name: str, condition: dict):
-    inspector = inspect(engine)
-    if table_name not in inspector.get_table_names():
+def build_delete_row_query(table_name: str, condition: dict) -> Tuple[str, Dict[str, Any]]:
+    if not schema_cache.table_exists(table_name):
         raise ValueError(f"Table '{table_name}' does not exist.")
-    columns = {col["name"] for col in inspector.get_columns(table_name)}
+    columns = schema_cache.get_column_names(table_name)
     condition = {k: v for k, v in condition.items() if k in columns}
     if not condition:
         raise ValueError("Condition must have at least one valid column.")
     where_clause = " AND ".join([f"{col} = :{col}" for col in condition.keys()])
     query = f"DELETE FROM {table_name} WHERE {where_clause}"
+    return query, condition
+
+def insert_row(table_name: str, row_data: dict):
+    query, params = build_insert_row_query(table_name, row_data)
+    with engine.connect() as conn:
+        conn.execute(text(query), params)
+        conn.commit()
+    result_cache.invalidate_table(table_name)
+
+def update_row(table_name: str, condition: dict, new_values: dict):
+    query, params = build_update_row_query(table_name, condition, new_values)
+    with engine.connect() as conn:
+        conn.execute(text(query), params)
+        conn.commit()
+    result_cache.invalidate_table(table_name)
+
+def delete_row(table_name: str, condition: dict):
+    query, params = build_delete_row_query(table_name, condition)
+    with engine.connect() as conn:
+        conn.execute(text(query), params)
+        conn.commit()
+    result_cache.invalidate_table(table_name)
+
+# -----------------------------------
+# Row Change Notifications
+# -----------------------------------
+# An AFTER ROW trigger publishes every insert/update/delete as a JSON delta
+# ({"table", "op", "old", "new"}) on the table's channel, the same NOTIFY mechanism
+# as /transactions/notify. Deltas over NOTIFY's 8000 byte limit are sent without
+# the row images and flagged "truncated" so consumers fall back to a reload.
+
+CHANGE_NOTIFY_FUNCTION = "sqlvi_notify_row_change"
+CHANGE_TRIGGER = "sqlvi_row_change"
+
+_CHANGE_NOTIFY_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION {CHANGE_NOTIFY_FUNCTION}() RETURNS trigger AS $$
+DECLARE
+    delta jsonb;
+BEGIN
+    delta := jsonb_build_object('table', TG_TABLE_NAME, 'op', lower(TG_OP));
+    IF TG_OP <> 'INSERT' THEN
+        delta := delta || jsonb_build_object('old', to_jsonb(OLD));
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        delta := delta || jsonb_build_object('new', to_jsonb(NEW));
+    END IF;
+    IF octet_length(delta::text) > 7900 THEN
+        delta := jsonb_build_object('table', TG_TABLE_NAME, 'op', lower(TG_OP), 'truncated', true);
+    END IF;
+    PERFORM pg_notify(TG_ARGV[0], delta::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+_watched_tables = set()
+
+
+def change_channel(table_name: str) -> str:
+    # "public.Orders" -> "row_changes_public_orders"; channels are identifiers (max 63 bytes).
+    return re.sub(r"\W", "_", f"row_changes_{table_name}").lower()[:63]
+
+
+def change_notifications_enabled(table_name: str) -> bool:
+    query = text("SELECT 1 FROM pg_trigger WHERE tgrelid = to_regclass(:table) AND tgname = :trigger")
+    with engine.connect() as conn:
+        return conn.execute(query, {"table": table_name, "trigger": CHANGE_TRIGGER}).first() is not None
+
+
+def watch_table_changes(table_name: str):
+    """
+    Subscribe the result cache to the table's change channel, so writes made outside
+    this API (psql, other services) also evict cached selects. Once per process.
+    """
+    from ..notification_listener import listener
+
+    key = table_name.lower()
+    if key in _watched_tables:
+        return
+    listener.subscribe_callback([change_channel(table_name)], lambda item: result_cache.invalidate_table(table_name))
+    _watched_tables.add(key)
+
+
+def rearm_change_watches():
+    """
+    Watch every table that already has the change trigger. Called at startup.
+    """
+    query = text("SELECT tgrelid::regclass::text FROM pg_trigger WHERE tgname = :trigger")
+    with engine.connect() as conn:
+        tables = conn.execute(query, {"trigger": CHANGE_TRIGGER}).scalars().all()
+    for table_name in tables:
+        watch_table_changes(table_name)
+
+
+def enable_change_notifications(table_name: str) -> Dict[str, Any]:
+    if not schema_cache.table_exists(table_name):
+        raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
+    channel = change_channel(table_name)
+    if change_notifications_enabled(table_name):
+        # Every subscriber calls this; skip the DDL (and its ACCESS EXCLUSIVE lock) when the trigger is already there.
+        watch_table_changes(table_name)
+        return {"table": table_name, "channel": channel, "enabled": True}
+    with engine.connect() as conn:
+        conn.execute(text(_CHANGE_NOTIFY_FUNCTION_SQL))
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {CHANGE_TRIGGER} ON {table_name}"))
+        conn.execute(text(
+            f"CREATE TRIGGER {CHANGE_TRIGGER} AFTER INSERT OR UPDATE OR DELETE ON {table_name} "
+            f"FOR EACH ROW EXECUTE FUNCTION {CHANGE_NOTIFY_FUNCTION}('{channel}')"
+        ))
+        conn.commit()
+    watch_table_changes(table_name)
+    return {"table": table_name, "channel": channel, "enabled": True}
+
+
+def disable_change_notifications(table_name: str) -> Dict[str, Any]:
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {CHANGE_TRIGGER} ON {table_name}"))
+        conn.commit()
+    return {"table": table_name, "channel": change_channel(table_name), "enabled": False}
+
+# -----------------------------------
+# Paginated and Streaming Reads
+# -----------------------------------
+
+def get_table_data(table_name: str) -> List[Dict[str, Any]]:
+    query = text(f"SELECT * FROM {table_name}")
+    with engine.connect() as conn:
+        result = conn.execute(query)
+        # Convert SQLAlchemy Row objects correctly
+        return [dict(row._mapping) for row in result]
+
+def get_table_rows(table_name: str) -> Tuple[List[str], List[Any], List[tuple]]:
+    """
+    Column names, type codes and plain row tuples of a whole table, for the columnar formats.
+    """
+    query = text(f"SELECT * FROM {table_name}")
+    with engine.connect() as conn:
+        result = conn.execute(query)
+        keys = list(result.keys())
+        type_codes = result_type_codes(result)
+        return keys, type_codes, [tuple(row) for row in result.fetchall()]
+
+def build_table_page_query(table_name: str, limit: int, after: Optional[List[Any]] = None) -> Tuple[str, Dict[str, Any], List[str]]:
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    if not schema_cache.table_exists(table_name):
+        raise ValueError(f"Table '{table_name}' does not exist.")
+    primary_key = schema_cache.get_primary_key(table_name)
+    if not primary_key:
+        raise ValueError(f"Table '{table_name}' has no primary key; keyset pagination needs one.")
+
+    key_list = ", ".join(primary_key)
+    # One extra row tells us whether another page follows.
+    params: Dict[str, Any] = {"limit": limit + 1}
+    query = f"SELECT * FROM {table_name}"
+    if after is not None:
+        if len(after) != len(primary_key):
+            raise ValueError(f"Cursor must contain {len(primary_key)} value(s): {key_list}.")
+        placeholders = ", ".join(f":after{i}" for i in range(len(after)))
+        params.update({f"after{i}": value for i, value in enumerate(after)})
+        query += f" WHERE ({key_list}) > ({placeholders})"
+    query += f" ORDER BY {key_list} LIMIT :limit"
+    return query, params, primary_key
+
+def make_table_page(rows: List[Dict[str, Any]], limit: int, primary_key: List[str]) -> Dict[str, Any]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = [rows[-1][col] for col in primary_key]
+    return {"data": rows, "primary_key": primary_key, "next_cursor": next_cursor}
+
+def get_table_page(table_name: str, limit: int = 100, after: Optional[List[Any]] = None) -> Dict[str, Any]:
+    """
+    Return one page of rows ordered by primary key, starting after the key values in `after`.
+    The returned `next_cursor` is passed back as `after` to fetch the following page.
+    """
+    query, params, primary_key = build_table_page_query(table_name, limit, after)
     with engine.connect() as conn:
-        conn.execute(text(query), condition)
-        conn.commit()
\ No newline at end of file
+        result = conn.execute(text(query), params)
+        rows = [dict(row._mapping) for row in result]
+    return make_table_page(rows, limit, primary_key)
+
+def stream_table_rows(table_name: str, chunk_size: int = 1000):
+    """
+    Yield every row of a table using a server-side cursor, `chunk_size` rows per fetch,
+    so the full table is never held in memory.
+    """
+    query = text(f"SELECT * FROM {table_name}")
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for partition in result.partitions():
+            for row in partition:
+                yield dict(row._mapping)
+
+# -----------------------------------
+# Bulk Row Insertion
+# -----------------------------------
+
+# PostgreSQL accepts at most 65535 bind parameters per statement.
+MAX_BIND_PARAMS = 65535
+
+def _batches(rows: Iterable[dict], batch_size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _batch_columns(batch: List[dict], columns: set) -> List[str]:
+    batch_columns = []
+    for row in batch:
+        valid = [k for k in row.keys() if k in columns]
+        if not valid:
+            raise ValueError("No valid columns provided for insertion.")
+        for k in valid:
+            if k not in batch_columns:
+                batch_columns.append(k)
+    return batch_columns
+
+def _insert_values_batch(conn, table_name: str, batch: List[dict], batch_columns: List[str]):
+    # Rows that omit a column get DEFAULT so serial/default columns still work.
+    params = {}
+    value_rows = []
+    for i, row in enumerate(batch):
+        placeholders = []
+        for j, col in enumerate(batch_columns):
+            if col in row:
+                params[f"p{i}_{j}"] = row[col]
+                placeholders.append(f":p{i}_{j}")
+            else:
+                placeholders.append("DEFAULT")
+        value_rows.append(f"({', '.join(placeholders)})")
+    query = f"INSERT INTO {table_name} ({', '.join(batch_columns)}) VALUES {', '.join(value_rows)}"
+    conn.execute(text(query), params)
+
+def _copy_field(value) -> str:
+    # CSV for COPY: an unquoted empty field is NULL, everything else is quoted.
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+def _copy_batch(conn, table_name: str, batch: List[dict], batch_columns: List[str]):
+    # Rows that omit a column are loaded as NULL (COPY has no per-row DEFAULT).
+    buf = io.StringIO()
+    for row in batch:
+        buf.write(",".join(_copy_field(row.get(col)) for col in batch_columns))
+        buf.write("\n")
+    buf.seek(0)
+    sql = f"COPY {table_name} ({', '.join(batch_columns)}) FROM STDIN WITH (FORMAT csv)"
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(sql, buf)
+    finally:
+        cursor.close()
+
+def bulk_insert_rows(table_name: str, rows: Iterable[dict], batch_size: int = 1000, method: str = "values") -> Dict[str, Any]:
+    """
+    Insert many rows in batches on a single connection and transaction. The connection
+    is checked out once the first batch has been read, not while waiting for it.
+    `method` is "values" (multi-row INSERT ... VALUES) or "copy" (COPY FROM STDIN).
+    Keys that are not columns of the table are ignored, as in insert_row.
+    """
+    method = method.lower()
+    if method not in ("values", "copy"):
+        raise ValueError("Invalid bulk insert method. Choose from 'values', 'copy'.")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+    if not schema_cache.table_exists(table_name):
+        raise ValueError(f"Table '{table_name}' does not exist.")
+    columns = schema_cache.get_column_names(table_name)
+    if method == "values":
+        batch_size = min(batch_size, MAX_BIND_PARAMS // len(columns))
+
+    batches = []
+    total_rows = 0
+    started = time.perf_counter()
+    pending = _batches(rows, batch_size)
+    first = next(pending, None)
+    with engine.begin() as conn:
+        for batch in itertools.chain([first] if first else [], pending):
+            batch_started = time.perf_counter()
+            batch_columns = _batch_columns(batch, columns)
+            if method == "copy":
+                _copy_batch(conn, table_name, batch, batch_columns)
+            else:
+                _insert_values_batch(conn, table_name, batch, batch_columns)
+            total_rows += len(batch)
+            batches.append({
+                "batch": len(batches) + 1,
+                "rows": len(batch),
+                "elapsed_ms": round((time.perf_counter() - batch_started) * 1000, 3),
+            })
+    result_cache.invalidate_table(table_name)
+    return {
+        "table_name": table_name,
+        "method": method,
+        "rows_inserted": total_rows,
+        "batches": batches,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
@@ -1,6 +1,12 @@
-from sqlalchemy import text
+from fastapi import Header, HTTPException
+from sqlalchemy import text, exc
+from typing import Optional
 from app.schemas.transaction_schema import IsolationLevel
 from app.database import SessionLocal, engine  # Adjust import as needed
+from app.transaction_sessions import use_session, release_after_use, TransactionSessionError
+from app.crud import tableop_crud
+from app import result_cache
+import time
 
 # Dependency to get a synchronous DB session.
 def get_db():
@@ -10,6 +16,18 @@ def get_db():
     finally:
         db.close()
 
+# Dependency for the transaction routes: the pinned session of the transaction named in the
+# X-Transaction-Id header, or a request-scoped session when no header is sent.
+def get_transaction_db(x_transaction_id: Optional[str] = Header(None)):
+    if x_transaction_id is None:
+        yield from get_db()
+        return
+    try:
+        with use_session(x_transaction_id) as db:
+            yield db
+    except TransactionSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
 # -----------------------------------
 # Transaction Control Commands
 # -----------------------------------
@@ -24,12 +42,14 @@ def commit_transaction(db):
     sql = "COMMIT;"
     db.execute(text(sql))
     db.commit()
+    release_after_use(db)
     return {"message": "Transaction committed"}
 
 def rollback_transaction(db):
     sql = "ROLLBACK;"
     db.execute(text(sql))
     db.commit()
+    release_after_use(db)
     return {"message": "Transaction rolled back"}
 
 def create_savepoint(db, savepoint_name: str):
@@ -137,22 +157,194 @@ def unlisten_channel(db, channel_name: str):
 # Advisory Locks (User-Defined Locks)
 # -----------------------------------
 
-def advisory_lock(db, key: int):
-    sql = f"SELECT pg_advisory_lock({key});"
-    db.execute(text(sql))
-    return {"message": f"Advisory lock acquired for key {key}"}
+def _advisory_function(name: str, shared: bool = False) -> str:
+    return f"{name}_shared" if shared else name
 
-def advisory_unlock(db, key: int):
-    sql = f"SELECT pg_advisory_unlock({key});"
+def advisory_lock(db, key: int, shared: bool = False):
+    sql = f"SELECT {_advisory_function('pg_advisory_lock', shared)}({key});"
     db.execute(text(sql))
-    return {"message": f"Advisory lock released for key {key}"}
+    return {"message": f"Advisory {'shared ' if shared else ''}lock acquired for key {key}"}
 
-def advisory_xact_lock(db, key: int):
-    sql = f"SELECT pg_advisory_xact_lock({key});"
+def advisory_unlock(db, key: int, shared: bool = False):
+    sql = f"SELECT {_advisory_function('pg_advisory_unlock', shared)}({key});"
+    released = db.execute(text(sql)).scalar()
+    if released is False:
+        return {"message": f"Advisory lock for key {key} was not held", "released": False}
+    return {"message": f"Advisory lock released for key {key}", "released": True}
+
+def advisory_xact_lock(db, key: int, shared: bool = False):
+    sql = f"SELECT {_advisory_function('pg_advisory_xact_lock', shared)}({key});"
     db.execute(text(sql))
-    return {"message": f"Advisory transaction lock acquired for key {key}"}
+    return {"message": f"Advisory transaction {'shared ' if shared else ''}lock acquired for key {key}"}
+
+def advisory_try_lock(db, key: int, shared: bool = False, xact: bool = False,
+                      retries: int = 0, backoff_ms: int = 50, max_backoff_ms: int = 1000,
+                      max_wait_ms: int = 2000):
+    """
+    pg_try_advisory_lock with retries and exponential backoff. Never blocks in the server
+    and sleeps at most `max_wait_ms` in total (the request holds a pooled connection
+    meanwhile); when the lock is still taken, returns acquired = False with the delay
+    the client should wait before trying again.
+    """
+    function = _advisory_function("pg_try_advisory_xact_lock" if xact else "pg_try_advisory_lock", shared)
+    sql = f"SELECT {function}({key});"
+    start = time.perf_counter()
+    delay_ms = backoff_ms
+    attempts = 1
+    acquired = bool(db.execute(text(sql)).scalar())
+    while not acquired and attempts <= retries:
+        waited_ms = (time.perf_counter() - start) * 1000
+        if waited_ms + delay_ms > max_wait_ms:
+            break
+        time.sleep(delay_ms / 1000)
+        delay_ms = min(delay_ms * 2, max_backoff_ms)
+        attempts += 1
+        acquired = bool(db.execute(text(sql)).scalar())
+    report = {
+        "acquired": acquired,
+        "attempts": attempts,
+        "waited_ms": round((time.perf_counter() - start) * 1000, 3),
+        "message": f"Advisory lock {'acquired' if acquired else 'not available'} for key {key}",
+    }
+    if not acquired:
+        report["retry_after_ms"] = delay_ms
+    return report
+
+def advisory_timed_lock(db, key: int, timeout_ms: int, shared: bool = False, xact: bool = False):
+    """
+    Blocking advisory lock bounded by lock_timeout. Runs in a savepoint so a timeout
+    only rolls back the attempt, not the caller's transaction.
+    """
+    function = _advisory_function("pg_advisory_xact_lock" if xact else "pg_advisory_lock", shared)
+    start = time.perf_counter()
+    try:
+        with db.begin_nested():
+            previous = db.execute(text("SELECT current_setting('lock_timeout')")).scalar()
+            db.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {"timeout": f"{timeout_ms}ms"})
+            db.execute(text(f"SELECT {function}({key});"))
+            db.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {"timeout": previous})
+        acquired = True
+    except exc.OperationalError as e:
+        # 55P03 lock_not_available: the lock_timeout expired
+        if getattr(e.orig, "pgcode", None) != "55P03":
+            raise
+        acquired = False
+    return {
+        "acquired": acquired,
+        "waited_ms": round((time.perf_counter() - start) * 1000, 3),
+        "message": f"Advisory lock {'acquired' if acquired else f'timed out after {timeout_ms} ms'} for key {key}",
+    }
 
 def advisory_unlock_all(db):
     sql = "SELECT pg_advisory_unlock_all();"
     db.execute(text(sql))
     return {"message": "All advisory locks released"}
+
+# -----------------------------------
+# Transaction Scripts (many operations, one connection, one transaction)
+# -----------------------------------
+
+SCRIPT_OPERATIONS = {
+    "begin": (),
+    "set_transaction_isolation": ("isolation_level",),
+    "savepoint": ("savepoint_name",),
+    "rollback_to_savepoint": ("savepoint_name",),
+    "release_savepoint": ("savepoint_name",),
+    "lock_table": ("table_name",),
+    "advisory_lock": ("key",),
+    "advisory_unlock": ("key",),
+    "advisory_xact_lock": ("key",),
+    "advisory_unlock_all": (),
+    "notify": ("channel_name",),
+    "insert_row": ("table_name", "row_data"),
+    "update_row": ("table_name", "condition", "new_values"),
+    "delete_row": ("table_name", "condition"),
+}
+
+def _row_write(db, query, params):
+    result = db.execute(text(query), params)
+    return {"rowcount": result.rowcount}
+
+def _run_script_step(db, step):
+    if step.op == "begin":
+        # The script already runs inside a transaction.
+        return {"message": "Transaction begun"}
+    if step.op == "set_transaction_isolation":
+        return set_transaction_isolation(db, step.isolation_level)
+    if step.op == "savepoint":
+        return create_savepoint(db, step.savepoint_name)
+    if step.op == "rollback_to_savepoint":
+        return rollback_to_savepoint(db, step.savepoint_name)
+    if step.op == "release_savepoint":
+        return release_savepoint(db, step.savepoint_name)
+    if step.op == "lock_table":
+        return lock_table(db, step.table_name)
+    if step.op == "advisory_lock":
+        return advisory_lock(db, step.key, step.shared)
+    if step.op == "advisory_unlock":
+        return advisory_unlock(db, step.key, step.shared)
+    if step.op == "advisory_xact_lock":
+        return advisory_xact_lock(db, step.key, step.shared)
+    if step.op == "advisory_unlock_all":
+        return advisory_unlock_all(db)
+    if step.op == "notify":
+        return notify_channel(db, step.channel_name, step.message or "")
+    if step.op == "insert_row":
+        return _row_write(db, *tableop_crud.build_insert_row_query(step.table_name, step.row_data))
+    if step.op == "update_row":
+        return _row_write(db, *tableop_crud.build_update_row_query(step.table_name, step.condition, step.new_values))
+    if step.op == "delete_row":
+        return _row_write(db, *tableop_crud.build_delete_row_query(step.table_name, step.condition))
+
+def run_transaction_script(db, operations):
+    """
+    Run the operations in order inside one transaction on one connection.
+    The script commits at the end unless its last step is "rollback"; any failing
+    step rolls the whole script back. Returns the per-step results and timings.
+    """
+    operations = list(operations)
+    finish = "commit"
+    if operations and operations[-1].op in ("commit", "rollback"):
+        finish = operations.pop().op
+    # Validate the whole script before touching the database.
+    for index, step in enumerate(operations):
+        if step.op not in SCRIPT_OPERATIONS:
+            raise ValueError(f"Step {index + 1}: unsupported operation '{step.op}'.")
+        missing = [field for field in SCRIPT_OPERATIONS[step.op] if getattr(step, field) is None]
+        if missing:
+            raise ValueError(f"Step {index + 1}: operation '{step.op}' requires {', '.join(missing)}.")
+
+    try:
+        return _run_script_steps(db, operations, finish)
+    finally:
+        if any(step.op == "advisory_lock" for step in operations):
+            # Session-level advisory locks outlive the transaction; release them before the
+            # connection goes back to the pool.
+            db.rollback()
+            db.execute(text("SELECT pg_advisory_unlock_all();"))
+            db.commit()
+
+def _run_script_steps(db, operations, finish):
+    steps = []
+    started = time.perf_counter()
+    for index, step in enumerate(operations):
+        step_started = time.perf_counter()
+        try:
+            result = _run_script_step(db, step)
+        except Exception as e:
+            db.rollback()
+            steps.append({"step": index + 1, "op": step.op, "error": str(e),
+                          "elapsed_ms": round((time.perf_counter() - step_started) * 1000, 3)})
+            return {"committed": False, "failed_step": index + 1, "steps": steps,
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+        steps.append({"step": index + 1, "op": step.op, "result": result,
+                      "elapsed_ms": round((time.perf_counter() - step_started) * 1000, 3)})
+
+    if finish == "commit":
+        db.commit()
+        for table_name in {s.table_name for s in operations if s.op in ("insert_row", "update_row", "delete_row")}:
+            result_cache.invalidate_table(table_name)
+    else:
+        db.rollback()
+    return {"committed": finish == "commit", "steps": steps,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
@@ -2,8 +2,42 @@
 
 from sqlalchemy import create_engine, MetaData
 from sqlalchemy.orm import sessionmaker
-from .config import DATABASE_URL
+from fastapi.concurrency import run_in_threadpool
+from .config import (
+    DATABASE_URL,
+    USE_ASYNC_DB,
+    ASYNC_DATABASE_URL,
+    POOL_SIZE,
+    POOL_MAX_OVERFLOW,
+    POOL_TIMEOUT,
+    POOL_RECYCLE,
+    POOL_PRE_PING,
+)
+from .pool_metrics import TimedQueuePool, TimedAsyncQueuePool
 
-engine = create_engine(DATABASE_URL)
+POOL_OPTIONS = {
+    "pool_size": POOL_SIZE,
+    "max_overflow": POOL_MAX_OVERFLOW,
+    "pool_timeout": POOL_TIMEOUT,
+    "pool_recycle": POOL_RECYCLE,
+    "pool_pre_ping": POOL_PRE_PING,
+}
+
+engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool, **POOL_OPTIONS)
 SessionLocal = sessionmaker(bind=engine)
 metadata = MetaData()
+
+# Optional async engine used by the async_*_crud modules; the sync engine above is always available.
+async_engine = None
+if USE_ASYNC_DB:
+    from sqlalchemy.ext.asyncio import create_async_engine
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=TimedAsyncQueuePool, **POOL_OPTIONS)
+
+async def run_db(sync_fn, async_fn, *args, **kwargs):
+    """
+    Await the async crud function when the async engine is enabled,
+    otherwise run the sync one in the threadpool.
+    """
+    if async_engine is not None:
+        return await async_fn(*args, **kwargs)
+    return await run_in_threadpool(sync_fn, *args, **kwargs)
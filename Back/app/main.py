@@ -1,7 +1,9 @@
 # app/main.py
 from fastapi import FastAPI
-from app.routers import tableop_route, selectop_route, indexview_route, sequence_route, transaction_route  # , views, indexes (if created)
+from app.routers import tableop_route, selectop_route, indexview_route, sequence_route, transaction_route, pool_route, lock_route  # , views, indexes (if created)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from app.crud import ivm_crud, tableop_crud
 
 app = FastAPI(title="Dynamic SQL API")
 
@@ -10,6 +12,8 @@ app.include_router(selectop_route.router)
 app.include_router(indexview_route.router)
 app.include_router(sequence_route.router)
 app.include_router(transaction_route.router, prefix="/transactions")
+app.include_router(pool_route.router)
+app.include_router(lock_route.router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +23,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def restore_cache_dependencies():
+    # Trigger-maintained tables must keep invalidating cached reads across restarts.
+    try:
+        await run_in_threadpool(ivm_crud.load_dependencies)
+    except Exception as e:
+        print("Could not load incremental view dependencies:", str(e))
+    try:
+        await run_in_threadpool(tableop_crud.rearm_change_watches)
+    except Exception as e:
+        print("Could not watch tables with change notifications:", str(e))
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Dynamic SQL API!"}
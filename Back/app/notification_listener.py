@@ -0,0 +1,226 @@
+# app/notification_listener.py
+
+import asyncio
+import json
+import re
+import select
+import threading
+import time
+import anyio
+from fastapi.concurrency import run_in_threadpool
+from .database import engine
+from typing import Optional, Dict, Any, List, Set, Callable, AsyncIterator
+
+# One dedicated (non-pooled) connection LISTENs on every channel that has at least one
+# subscriber and fans each NOTIFY out to the subscribers' asyncio queues.
+
+_CHANNEL_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+def normalize_channel(channel_name: str) -> str:
+    if not _CHANNEL_NAME.match(channel_name):
+        raise ValueError(f"Invalid channel name '{channel_name}'.")
+    # Unquoted identifiers are case-folded by PostgreSQL, as in LISTEN/NOTIFY elsewhere in this API.
+    return channel_name.lower()
+
+
+class Subscription:
+    def __init__(self, channels: Set[str], loop: asyncio.AbstractEventLoop):
+        self.channels = channels
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = 0
+
+    def _put(self, item: Dict[str, Any]):
+        # Runs on the subscriber's event loop. A slow consumer loses the oldest notifications.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    def deliver(self, item: Dict[str, Any]):
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            pass  # event loop already closed
+
+
+class CallbackSubscription:
+    """
+    Server-side subscriber: `callback(item)` runs on the listener thread and must be quick.
+    """
+    def __init__(self, channels: Set[str], callback: Callable[[Dict[str, Any]], None]):
+        self.channels = channels
+        self.callback = callback
+        self.dropped = 0
+
+    def deliver(self, item: Dict[str, Any]):
+        try:
+            self.callback(item)
+        except Exception as e:
+            print("Notification callback failed:", str(e))
+
+
+class NotificationListener:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: List[Subscription] = []
+        self._listening: Set[str] = set()
+        self._conn = None
+        self._thread: Optional[threading.Thread] = None
+        self.delivered = 0
+
+    # -- connection handling (caller holds self._lock) --
+
+    def _connect(self):
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        conn = engine.dialect.dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            for channel in self._listening:
+                cursor.execute(f"LISTEN {channel};")
+        self._conn = conn
+
+    def _execute(self, sql: str):
+        if self._conn is None:
+            self._connect()
+        with self._conn.cursor() as cursor:
+            cursor.execute(sql)
+
+    def _drop_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+    # -- listener thread --
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="notification-listener", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                conn = self._conn
+            if conn is None:
+                time.sleep(0.5)
+                with self._lock:
+                    if self._listening and self._conn is None:
+                        try:
+                            self._connect()
+                        except Exception as e:
+                            print("Notification listener cannot connect:", str(e))
+                continue
+            try:
+                if select.select([conn], [], [], 1.0) == ([], [], []):
+                    continue
+                with self._lock:
+                    conn.poll()
+                    notifies = list(conn.notifies)
+                    conn.notifies.clear()
+                    subscriptions = list(self._subscriptions)
+            except Exception as e:
+                print("Notification listener lost its connection:", str(e))
+                with self._lock:
+                    self._drop_connection()
+                continue
+            delivered = 0
+            for notify in notifies:
+                item = {"channel": notify.channel, "payload": notify.payload, "pid": notify.pid}
+                for subscription in subscriptions:
+                    if notify.channel in subscription.channels:
+                        subscription.deliver(item)
+                        delivered += 1
+            if delivered:
+                with self._lock:
+                    self.delivered += delivered
+
+    # -- public API --
+
+    def _register(self, channels: List[str], make_subscription):
+        normalized = {normalize_channel(c) for c in channels}
+        if not normalized:
+            raise ValueError("At least one channel is required.")
+        subscription = make_subscription(normalized)
+        with self._lock:
+            for channel in normalized - self._listening:
+                self._execute(f"LISTEN {channel};")
+                self._listening.add(channel)
+            self._subscriptions.append(subscription)
+        self._ensure_thread()
+        return subscription
+
+    def subscribe(self, channels: List[str], loop: asyncio.AbstractEventLoop) -> Subscription:
+        """
+        Register a subscriber for `channels`, issuing LISTEN for channels nobody listened to yet.
+        Blocks on the database; call it from async code through run_in_threadpool.
+        """
+        return self._register(channels, lambda normalized: Subscription(normalized, loop))
+
+    def subscribe_callback(self, channels: List[str], callback: Callable[[Dict[str, Any]], None]) -> CallbackSubscription:
+        """
+        Like subscribe, but calls `callback` for each notification instead of queueing it.
+        """
+        return self._register(channels, lambda normalized: CallbackSubscription(normalized, callback))
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        Remove a subscriber and UNLISTEN channels that no longer have any.
+        """
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            still_wanted = set().union(*(s.channels for s in self._subscriptions))
+            for channel in subscription.channels - still_wanted:
+                self._listening.discard(channel)
+                try:
+                    if self._conn is not None:
+                        self._execute(f"UNLISTEN {channel};")
+                except Exception:
+                    self._drop_connection()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connected": self._conn is not None,
+                "channels": sorted(self._listening),
+                "subscribers": len(self._subscriptions),
+                "delivered": self.delivered,
+                "dropped": sum(s.dropped for s in self._subscriptions),
+            }
+
+
+listener = NotificationListener()
+
+
+async def sse_events(subscription: Subscription, heartbeat: float = 15, decode_payload: bool = False) -> AsyncIterator[str]:
+    """
+    Format a subscription's notifications as Server-Sent Events, with keep-alive comments
+    every `heartbeat` seconds. With `decode_payload` the JSON payload itself is the event data.
+    Unsubscribes when the client goes away.
+    """
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            data = item
+            if decode_payload:
+                try:
+                    data = json.loads(item["payload"])
+                except ValueError:
+                    # A plain NOTIFY from outside this API (psql, another service): send it as is.
+                    data = item["payload"]
+            yield f"event: {item['channel']}\ndata: {json.dumps(data, default=str)}\n\n"
+    finally:
+        # unsubscribe may UNLISTEN under the listener lock; keep it off the event loop, and
+        # shield it so a cancelled (disconnected) stream still releases its subscription.
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(listener.unsubscribe, subscription)
@@ -0,0 +1,105 @@
+# app/pool_metrics.py
+
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from typing import Dict, Any, List
+
+# Upper bounds (milliseconds) of the checkout wait time histogram buckets.
+WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+
+class WaitHistogram:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.total = 0
+            self.sum_ms = 0.0
+            self.max_ms = 0.0
+            self.timeouts = 0
+
+    def observe(self, wait_ms: float):
+        with self._lock:
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if wait_ms <= bound:
+                    self.counts[i] += 1
+                    break
+            else:
+                self.counts[-1] += 1
+            self.total += 1
+            self.sum_ms += wait_ms
+            self.max_ms = max(self.max_ms, wait_ms)
+
+    def timed_out(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            buckets: List[Dict[str, Any]] = [
+                {"le_ms": bound, "count": count}
+                for bound, count in zip(WAIT_BUCKETS_MS, self.counts)
+            ]
+            buckets.append({"le_ms": "inf", "count": self.counts[-1]})
+            return {
+                "checkouts": self.total,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.sum_ms / self.total, 3) if self.total else 0.0,
+                "max_wait_ms": round(self.max_ms, 3),
+                "buckets": buckets,
+            }
+
+
+class _TimedPoolMixin:
+    """
+    Records how long each checkout waited for a connection (including connect time
+    when the pool has to open a new one).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = WaitHistogram()
+
+    def recreate(self):
+        new_pool = super().recreate()
+        new_pool.wait_histogram = self.wait_histogram
+        return new_pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_histogram.timed_out()
+            raise
+        self.wait_histogram.observe((time.perf_counter() - started) * 1000)
+        return conn
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(pool) -> Dict[str, Any]:
+    stats = {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "timeout": pool.timeout(),
+        "status": pool.status(),
+    }
+    histogram = getattr(pool, "wait_histogram", None)
+    if histogram is not None:
+        stats["wait"] = histogram.snapshot()
+    return stats
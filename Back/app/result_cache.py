@@ -0,0 +1,108 @@
+# app/result_cache.py
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from .config import SELECT_RESULT_CACHE_SIZE, SELECT_RESULT_CACHE_TTL, SELECT_RESULT_CACHE_MAX_ROWS
+from typing import List, Optional, Dict, Any, Tuple
+
+# Process-wide LRU of select results. Every entry remembers the tables it read;
+# a write to any of them bumps that table's version and evicts the entry.
+_lock = threading.Lock()
+_entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, tables, value)
+_versions: Dict[str, int] = {}
+_epoch = 0  # bumped by clear() so in-flight queries on any table are not stored
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_dependents: Dict[str, set] = {}  # table -> tables derived from it
+
+
+def _normalize_table(name: str) -> str:
+    # "public.Orders o" -> "orders"
+    name = name.strip().split()[0] if name.strip() else name
+    return name.split(".")[-1].strip('"').lower()
+
+
+def referenced_tables(table: str, join: Optional[List[Dict[str, str]]] = None) -> List[str]:
+    tables = [_normalize_table(table)]
+    for join_data in join or []:
+        tables.append(_normalize_table(join_data["join_table"]))
+    return sorted(set(tables))
+
+
+def make_key(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, sort_keys=True, default=str)
+
+
+def _current_versions(tables: List[str]) -> Tuple[int, ...]:
+    return (_epoch,) + tuple(_versions.get(t, 0) for t in tables)
+
+
+def table_versions(tables: List[str]) -> Tuple[int, ...]:
+    with _lock:
+        return _current_versions(tables)
+
+
+def get(key: str) -> Optional[Any]:
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None or time.monotonic() >= entry[0]:
+            if entry is not None:
+                del _entries[key]
+            _stats["misses"] += 1
+            return None
+        _entries.move_to_end(key)
+        _stats["hits"] += 1
+        return entry[2]
+
+
+def put(key: str, tables: List[str], versions: Tuple[int, ...], value: Any, row_count: int):
+    """
+    Store a result read at `versions` (from table_versions before the query ran).
+    Skipped if a referenced table was written in the meantime or the result is too large.
+    """
+    if row_count > SELECT_RESULT_CACHE_MAX_ROWS or SELECT_RESULT_CACHE_SIZE <= 0:
+        return
+    with _lock:
+        if _current_versions(tables) != versions:
+            return
+        _entries[key] = (time.monotonic() + SELECT_RESULT_CACHE_TTL, tables, value)
+        _entries.move_to_end(key)
+        while len(_entries) > SELECT_RESULT_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def invalidate_table(table_name: str):
+    """
+    Evict every cached result that read `table_name`. Call after writes and DDL on the table.
+    """
+    table_name = _normalize_table(table_name)
+    with _lock:
+        tables = {table_name} | _dependents.get(table_name, set())
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+        stale = [key for key, entry in _entries.items() if tables & set(entry[1])]
+        for key in stale:
+            del _entries[key]
+        _stats["invalidations"] += len(stale)
+
+
+def add_dependency(table_name: str, dependent: str):
+    """
+    Invalidate `dependent` (e.g. a trigger-maintained summary table) whenever `table_name` is.
+    """
+    with _lock:
+        _dependents.setdefault(_normalize_table(table_name), set()).add(_normalize_table(dependent))
+
+
+def clear():
+    global _epoch
+    with _lock:
+        _epoch += 1
+        _stats["invalidations"] += len(_entries)
+        _entries.clear()
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return {"entries": len(_entries), "max_entries": SELECT_RESULT_CACHE_SIZE, "ttl": SELECT_RESULT_CACHE_TTL, **_stats}
@@ -1,41 +1,110 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy import inspect, text
 from ..crud.indexview_crud import list_indexes_crud, create_index, drop_index, create_view, drop_view, refresh_materialized_view, list_views_crud, view_data_crud, filter_view_data_crud, join_view_data_crud, insert_into_view_crud, update_view_crud, delete_from_view_crud, refresh_materialized_view_crud, rename_view_crud, modify_view_crud
 from ..database import engine
 from typing import List, Dict, Any, Optional, Tuple
+import itertools
 import json
 
 from ..schemas.indexview_schema import (
     IndexCreate,
     IndexDrop,
+    ApplyIndexRecommendations,
     ViewCreate,
     ViewDrop,
     MaterializedViewRefresh,
+    MaterializedViewSchedule,
     InsertQuery,
     UpdateQuery,
     DeleteQuery,
+    BulkViewInsert,
+    BulkViewUpdate,
+    BulkViewDelete,
     RenameViewQuery,
     ModifyViewQuery,
     IndexListItem
 )
 
+from fastapi.concurrency import run_in_threadpool
+from ..crud import async_indexview_crud, index_advisor_crud, matview_crud, ivm_crud
+from ..crud.indexview_crud import view_data_query, filter_view_data_query, join_view_data_query
+from ..crud.indexview_crud import view_page_crud, stream_view_rows
+from ..crud.indexview_crud import bulk_insert_into_view_crud, bulk_update_view_crud, bulk_delete_from_view_crud
+from ..crud.indexview_crud import split_index_columns, start_index_job, index_job_status, list_index_jobs, cancel_index_job
+from ..crud.explain_crud import explain_query, ANALYZE_WITH_DATA_NOTE
+from ..schemas.selectop_schema import ExplainMode
 from app import crud, database
 
 router = APIRouter(prefix="/indexview", tags=["IndexView"])
 
 @router.post("/index/create")
 def create_index_endpoint(data: IndexCreate):
-    return create_index(data.index_name, data.table_name, data.column_name, data.index_type)
+    """
+    Create an index. With `background` the build runs as a job; poll
+    /index/jobs/{job_id} for its status and pg_stat_progress_create_index progress.
+    """
+    if not data.columns and not data.column_name:
+        raise HTTPException(status_code=400, detail="Provide column_name or columns.")
+    if data.background:
+        columns = data.columns or split_index_columns(data.column_name)
+        return start_index_job(
+            data.index_name, data.table_name, columns, data.index_type,
+            data.unique, data.concurrently, data.include, data.where
+        )
+    return create_index(
+        data.index_name, data.table_name, data.column_name, data.index_type,
+        data.columns, data.unique, data.concurrently, data.include, data.where
+    )
+
+@router.get("/index/jobs", summary="Background index builds")
+def list_index_jobs_endpoint():
+    return list_index_jobs()
+
+@router.get("/index/jobs/{job_id}", summary="Status and progress of a background index build")
+def index_job_status_endpoint(job_id: str):
+    return index_job_status(job_id)
+
+@router.post("/index/jobs/{job_id}/cancel", summary="Cancel a running background index build")
+def cancel_index_job_endpoint(job_id: str):
+    return cancel_index_job(job_id)
 
 @router.post("/index/drop")
 def drop_index_endpoint(data: IndexDrop):
     return drop_index(data.index_name)
 
 
+@router.get("/index/advisor/workload", summary="Select query shapes recorded for the index advisor")
+def index_advisor_workload():
+    return {"queries": index_advisor_crud.workload_summary()}
+
+@router.get("/index/advisor/recommendations", summary="Recommend indexes for the recorded workload")
+def index_advisor_recommendations(
+    method: str = Query("auto", pattern="^(auto|hypopg|build|usage)$", description="How candidates are costed"),
+    top: int = Query(5, ge=1, le=100),
+    min_saving_percent: float = Query(1.0, ge=0, le=100),
+    use_pg_stat_statements: bool = Query(False, description="Attach matching pg_stat_statements totals")
+):
+    try:
+        return index_advisor_crud.recommend_indexes(method, top, min_saving_percent, use_pg_stat_statements)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/index/advisor/apply", summary="Create recommended indexes")
+def index_advisor_apply(data: ApplyIndexRecommendations):
+    return {"results": index_advisor_crud.apply_recommendations([r.model_dump() for r in data.recommendations])}
+
+@router.post("/index/advisor/reset", summary="Forget the recorded select workload")
+def index_advisor_reset():
+    index_advisor_crud.reset_workload()
+    return {"message": "Index advisor workload cleared"}
+
 @router.get("/index/list", response_model=List[IndexListItem])
-def list_indexes_endpoint():
+async def list_indexes_endpoint():
     try:
-        indexes = list_indexes_crud()
+        indexes = await database.run_db(list_indexes_crud, async_indexview_crud.list_indexes_crud)
         return indexes
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -45,9 +114,10 @@ def create_view_endpoint(data: ViewCreate):
     """
     Create a new view in the database.
 
-    - **view_type**: Type of view to create ('simple', 'materialized', 'updatable', 'recursive')
+    - **view_type**: Type of view to create ('simple', 'materialized', 'updatable', 'recursive', 'incremental')
     - **view_name**: Name of the view to create
-    - **definition**: The SELECT query that defines the view (without the 'AS' keyword)
+    - **definition**: The SELECT query that defines the view (without the 'AS' keyword).
+      'incremental' views accept SELECT <group columns>, SUM/COUNT/MIN/MAX(...) FROM <table> [WHERE ...] GROUP BY ...
     - **with_check_option**: (Optional) For updatable views; adds WITH CHECK OPTION if true
     """
     return create_view(
@@ -62,7 +132,7 @@ def drop_view_endpoint(data: ViewDrop):
     """
     Drop a view from the database.
 
-    - **view_type**: Type of view to drop ('simple', 'materialized', 'updatable', 'recursive')
+    - **view_type**: Type of view to drop ('simple', 'materialized', 'updatable', 'recursive', 'incremental')
     - **view_name**: Name of the view to drop
     """
     return drop_view(
@@ -76,8 +146,77 @@ def refresh_view_endpoint(data: MaterializedViewRefresh):
     Refresh a materialized view. This is only applicable to materialized views.
 
     - **view_name**: Name of the materialized view to refresh
+    - **concurrently**: (Optional) Force or forbid REFRESH ... CONCURRENTLY
+    - **background**: (Optional) Return immediately and refresh on a background thread
     """
-    return refresh_materialized_view(view_name=data.view_name)
+    if data.background:
+        return matview_crud.refresh_matview_in_background(data.view_name, data.concurrently, data.exact_count)
+    return refresh_materialized_view(view_name=data.view_name, concurrently=data.concurrently, exact_count=data.exact_count)
+
+@router.get("/incremental_views", summary="List incrementally maintained views")
+def list_incremental_views_endpoint():
+    try:
+        return ivm_crud.list_incremental_views()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/incremental_views/{view_name}/recompute", summary="Recompute an incremental view from scratch")
+def recompute_incremental_view_endpoint(view_name: str):
+    try:
+        return ivm_crud.refresh_incremental_view(view_name)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/matviews/status", summary="Materialized view refresh status")
+def matview_status_endpoint():
+    """
+    Every materialized view with its unique index (needed for concurrent refresh),
+    seconds since its last refresh, refresh schedule and last refresh result.
+    """
+    try:
+        return matview_crud.matview_status()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/view_dependencies", summary="Dependency graph of views and materialized views")
+def view_dependencies_endpoint():
+    """
+    Nodes (views, materialized views and the tables they read), edges from each relation
+    to the views reading it, topological levels, and the materialized view refresh order.
+    """
+    try:
+        return matview_crud.view_dependency_graph()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/matviews/refresh_all", summary="Refresh every materialized view in dependency order")
+def refresh_all_matviews_endpoint(
+    concurrently: Optional[bool] = Query(None, description="Default: concurrently whenever a view qualifies"),
+    max_workers: int = Query(4, ge=1, le=32, description="Views refreshed in parallel, one connection each"),
+):
+    try:
+        return matview_crud.refresh_all_matviews(concurrently, max_workers)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/matviews/{view_name}/history", summary="Refresh duration and row-count history")
+def matview_history_endpoint(view_name: str):
+    return {
+        "view_name": view_name,
+        "staleness_seconds": matview_crud.staleness_seconds(view_name),
+        "history": matview_crud.refresh_history(view_name),
+    }
+
+@router.put("/matviews/{view_name}/schedule", summary="Refresh a materialized view periodically")
+def schedule_matview_endpoint(view_name: str, data: MaterializedViewSchedule):
+    return {"view_name": view_name, **matview_crud.scheduler.schedule(view_name, data.interval_seconds, data.concurrently)}
+
+@router.delete("/matviews/{view_name}/schedule", summary="Stop refreshing a materialized view periodically")
+def unschedule_matview_endpoint(view_name: str):
+    matview_crud.scheduler.unschedule(view_name)
+    return {"message": f"Refresh schedule for '{view_name}' removed."}
 
 
 # ---------------------------
@@ -85,62 +224,162 @@ def refresh_view_endpoint(data: MaterializedViewRefresh):
 # ---------------------------
 
 @router.get("/views", response_model=List[dict])
-def list_views():
+async def list_views():
     """
     List all views in the current database (excluding system schemas).
     """
-    query = """
-        SELECT schemaname, viewname, definition 
-        FROM pg_views 
-        WHERE schemaname NOT IN ('pg_catalog', 'information_schema');
-    """
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text(query))
-            views = [dict(zip(result.keys(), row)) for row in result.fetchall()]
+        views = await database.run_db(list_views_crud, async_indexview_crud.list_views_crud)
         return views
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+async def _explain_view(sql: str, explain: ExplainMode, include_data: bool, sync_fn, async_fn, *args):
+    """
+    Response for the view data endpoints when `explain` is set: the plan, plus the rows unless include_data is False.
+    With "analyze" the rows come from a second execution (see ANALYZE_WITH_DATA_NOTE).
+    """
+    response = {"explain": await run_in_threadpool(explain_query, sql, None, explain == ExplainMode.ANALYZE)}
+    if include_data:
+        response["data"] = await database.run_db(sync_fn, async_fn, *args)
+        if explain == ExplainMode.ANALYZE:
+            response["note"] = ANALYZE_WITH_DATA_NOTE
+    return response
+
+def _split_list(value: Optional[str]) -> Optional[List[str]]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+async def _read_view(base_query: str, paging: Dict[str, Any], sync_fn, async_fn, *args, joined: bool = False):
+    """
+    Shared read path of the view data endpoints: the full result as before, one page
+    when any paging/projection parameter is given, or an NDJSON stream with `stream`.
+    """
+    columns = _split_list(paging["columns"])
+    order_by = _split_list(paging["order_by"])
+    after = json.loads(paging["after"]) if paging["after"] else None
+    if after is not None and not isinstance(after, list):
+        after = [after]
+
+    if paging["stream"]:
+        # Run the query before the response starts so SQL errors become a 400 instead of a truncated body.
+        if database.async_engine is not None:
+            rows = async_indexview_crud.stream_view_rows(base_query, columns, order_by, paging["chunk_size"], joined)
+            try:
+                first = [await rows.__anext__()]
+            except StopAsyncIteration:
+                first = []
+
+            async def async_lines():
+                for row in first:
+                    yield json.dumps(row, default=str) + "\n"
+                async for row in rows:
+                    yield json.dumps(row, default=str) + "\n"
+            return StreamingResponse(async_lines(), media_type="application/x-ndjson")
+        rows = stream_view_rows(base_query, columns, order_by, paging["chunk_size"], joined)
+        first = await run_in_threadpool(next, rows, None)
+        lines = (
+            json.dumps(row, default=str) + "\n"
+            for row in itertools.chain([first] if first is not None else [], rows)
+        )
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    if columns or order_by or after is not None or paging["limit"] is not None or paging["offset"]:
+        page = await database.run_db(
+            view_page_crud, async_indexview_crud.view_page_crud,
+            base_query, columns, order_by, paging["limit"], paging["offset"], after, joined
+        )
+        if page["next_cursor"] is not None:
+            page["next_cursor"] = json.dumps(page["next_cursor"], default=str)
+        return page
+    return await database.run_db(sync_fn, async_fn, *args)
+
+def view_paging(
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    order_by: Optional[str] = Query(None, description="Comma-separated columns to order by (needed for keyset paging)"),
+    limit: Optional[int] = Query(None, ge=1, le=100000, description="Page size"),
+    offset: Optional[int] = Query(None, ge=0, description="Rows to skip"),
+    after: Optional[str] = Query(None, description="JSON list of order_by values (next_cursor of the previous page)"),
+    stream: bool = Query(False, description="Stream all rows as newline-delimited JSON"),
+    chunk_size: int = Query(1000, ge=1, le=100000, description="Rows per server-side cursor fetch when streaming"),
+) -> Dict[str, Any]:
+    return {
+        "columns": columns, "order_by": order_by, "limit": limit, "offset": offset,
+        "after": after, "stream": stream, "chunk_size": chunk_size,
+    }
+
 @router.get("/views/{view_name}")
-def view_data(view_name: str):
+async def view_data(
+    view_name: str,
+    explain: Optional[ExplainMode] = Query(None, description="'plan' or 'analyze' to return the query plan"),
+    include_data: bool = Query(True, description="With explain set, false returns only the plan (with 'analyze', true runs the query twice)"),
+    paging: Dict[str, Any] = Depends(view_paging)
+):
     """
     Retrieve all data from a given view.
     """
     try:
-        data = view_data_crud(view_name)
-        return data
+        if explain is not None:
+            return await _explain_view(
+                view_data_query(view_name), explain, include_data,
+                view_data_crud, async_indexview_crud.view_data_crud, view_name
+            )
+        return await _read_view(
+            view_data_query(view_name), paging,
+            view_data_crud, async_indexview_crud.view_data_crud, view_name
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/views/{view_name}/filter")
-def filter_view_data(
+async def filter_view_data(
     view_name: str,
-    condition: str = Query(..., description="SQL condition without the 'WHERE' keyword")
+    condition: str = Query(..., description="SQL condition without the 'WHERE' keyword"),
+    explain: Optional[ExplainMode] = Query(None, description="'plan' or 'analyze' to return the query plan"),
+    include_data: bool = Query(True, description="With explain set, false returns only the plan (with 'analyze', true runs the query twice)"),
+    paging: Dict[str, Any] = Depends(view_paging)
 ):
     """
     Retrieve data from a view filtered by a condition.
     Example: /views/my_view/filter?condition=age>30
     """
     try:
-        data = filter_view_data_crud(view_name, condition)
-        return data
+        if explain is not None:
+            return await _explain_view(
+                filter_view_data_query(view_name, condition), explain, include_data,
+                filter_view_data_crud, async_indexview_crud.filter_view_data_crud, view_name, condition
+            )
+        return await _read_view(
+            filter_view_data_query(view_name, condition), paging,
+            filter_view_data_crud, async_indexview_crud.filter_view_data_crud, view_name, condition
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/views/{view_name}/join")
-def join_view_data(
+async def join_view_data(
     view_name: str,
     table_name: str = Query(..., description="Name of the table to join with"),
-    condition: str = Query(..., description="Join condition without the 'ON' keyword")
+    condition: str = Query(..., description="Join condition without the 'ON' keyword"),
+    explain: Optional[ExplainMode] = Query(None, description="'plan' or 'analyze' to return the query plan"),
+    include_data: bool = Query(True, description="With explain set, false returns only the plan (with 'analyze', true runs the query twice)"),
+    paging: Dict[str, Any] = Depends(view_paging)
 ):
     """
     Retrieve data from a view joined with another table.
     Example: /views/my_view/join?table_name=employees&condition=my_view.id=employees.view_id
+    Columns shared by both sides must be qualified in columns/order_by (e.g. my_view.id).
     """
     try:
-        data = join_view_data_crud(view_name, table_name, condition)
-        return data
+        if explain is not None:
+            return await _explain_view(
+                join_view_data_query(view_name, table_name, condition), explain, include_data,
+                join_view_data_crud, async_indexview_crud.join_view_data_crud, view_name, table_name, condition
+            )
+        return await _read_view(
+            join_view_data_query(view_name, table_name, condition), paging,
+            join_view_data_crud, async_indexview_crud.join_view_data_crud, view_name, table_name, condition,
+            joined=True
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -177,13 +416,28 @@ def delete_from_view(view_name: str, delete_data: DeleteQuery):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/views/{view_name}/bulk_insert", summary="Insert many rows into an updatable view")
+def bulk_insert_into_view(view_name: str, data: BulkViewInsert):
+    """
+    Insert the rows in batches with bound parameters, in one transaction. Returns a per-batch report.
+    """
+    return bulk_insert_into_view_crud(view_name, data.rows, data.batch_size)
+
+@router.put("/views/{view_name}/bulk_update", summary="Update many rows of an updatable view by key")
+def bulk_update_view(view_name: str, data: BulkViewUpdate):
+    return bulk_update_view_crud(view_name, data.key_columns, data.rows, data.batch_size)
+
+@router.delete("/views/{view_name}/bulk_delete", summary="Delete many rows of an updatable view by key")
+def bulk_delete_from_view(view_name: str, data: BulkViewDelete):
+    return bulk_delete_from_view_crud(view_name, data.key_columns, data.keys, data.batch_size)
+
 @router.post("/views/{view_name}/refresh")
-def refresh_materialized_view(view_name: str):
+def refresh_materialized_view_endpoint(view_name: str, concurrently: Optional[bool] = Query(None)):
     """
     Refresh a materialized view.
     """
     try:
-        result = refresh_materialized_view_crud(view_name)
+        result = refresh_materialized_view_crud(view_name, concurrently)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
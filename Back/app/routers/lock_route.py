@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, Query
+from ..crud.lock_crud import get_lock_graph, sampler
+
+router = APIRouter(prefix="/locks", tags=["Locks"])
+
+@router.get("/graph", summary="Current locks and blocking chains")
+def get_lock_graph_route():
+    """
+    Sessions holding or waiting for locks (including advisory locks taken through
+    /transactions/advisory_lock), blocker -> blocked edges and wait durations.
+    """
+    try:
+        return get_lock_graph()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/sampling/start", summary="Sample the lock graph periodically")
+def start_lock_sampling(
+    interval: float = Query(5.0, ge=0.5, le=3600, description="Seconds between samples"),
+    max_samples: int = Query(720, ge=1, le=100000, description="Samples kept (oldest dropped first)")
+):
+    sampler.start(interval, max_samples)
+    return sampler.status()
+
+@router.post("/sampling/stop", summary="Stop periodic lock sampling")
+def stop_lock_sampling():
+    sampler.stop()
+    return sampler.status()
+
+@router.get("/samples", summary="Collected lock samples")
+def get_lock_samples(limit: int = Query(100, ge=1, le=100000)):
+    samples = list(sampler.samples)[-limit:]
+    return {**sampler.status(), "samples": samples}
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, HTTPException, Query
+from ..pool_metrics import pool_stats
+from ..config import POOL_SIZE, POOL_MAX_OVERFLOW, POOL_TIMEOUT, POOL_RECYCLE, POOL_PRE_PING
+from app import database
+
+router = APIRouter(prefix="/pool", tags=["Pool"])
+
+def _server_stats(timeout_seconds: int):
+    # A dedicated connection outside the pool: this endpoint matters most when the pool is
+    # exhausted, and must not wait for (or show up in) the checkout statistics.
+    cargs, cparams = database.engine.dialect.create_connect_args(database.engine.url)
+    conn = database.engine.dialect.dbapi.connect(
+        *cargs, **{**cparams, "connect_timeout": timeout_seconds,
+                   "options": f"-c statement_timeout={timeout_seconds * 1000}"}
+    )
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SHOW max_connections")
+            max_connections = int(cursor.fetchone()[0])
+            cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+            connections = cursor.fetchone()[0]
+        return {"max_connections": max_connections, "connections_to_database": connections}
+    finally:
+        conn.close()
+
+@router.get("/stats", summary="Live connection pool statistics")
+def get_pool_stats(
+    server: bool = Query(True, description="Also query max_connections and current connections"),
+    server_timeout: int = Query(2, ge=1, le=30, description="Seconds to wait for the server stats"),
+):
+    """
+    Report checked-out/overflow counts and the checkout wait time histogram
+    for the sync engine (and the async engine when enabled). Never checks out a
+    pooled connection.
+    """
+    try:
+        stats = {
+            "config": {
+                "pool_size": POOL_SIZE,
+                "max_overflow": POOL_MAX_OVERFLOW,
+                "pool_timeout": POOL_TIMEOUT,
+                "pool_recycle": POOL_RECYCLE,
+                "pool_pre_ping": POOL_PRE_PING,
+            },
+            "sync": pool_stats(database.engine.pool),
+        }
+        if database.async_engine is not None:
+            stats["async"] = pool_stats(database.async_engine.sync_engine.pool)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if server:
+        try:
+            stats["server"] = _server_stats(server_timeout)
+        except Exception as e:
+            stats["server"] = {"error": str(e)}
+    return stats
+
+@router.post("/stats/reset", summary="Reset the checkout wait time histogram")
+def reset_pool_stats():
+    database.engine.pool.wait_histogram.reset()
+    if database.async_engine is not None:
+        database.async_engine.sync_engine.pool.wait_histogram.reset()
+    return {"message": "Pool wait statistics reset"}
@@ -1,36 +1,120 @@
 from fastapi import APIRouter, HTTPException, Query
 from sqlalchemy import inspect, text
-from ..crud.selectop_crud import select_data, get_table_names
+from fastapi.responses import StreamingResponse, Response
+from urllib.parse import quote
+from ..crud.selectop_crud import select_data, select_rows, get_table_names, explain_select, stream_select_chunks
+from ..crud.export_crud import EXPORTERS, EXPORT_MEDIA_TYPES, require_pyarrow, columnar_payload, arrow_ipc_bytes
+from ..crud.explain_crud import ANALYZE_WITH_DATA_NOTE
 from ..database import engine
 from typing import List, Dict, Any, Optional, Tuple
 import json
+import itertools
 
 from ..schemas.selectop_schema import (
 
     SelectResponse,
-    SelectQuerySchema
+    SelectQuerySchema,
+    SelectExportSchema,
+    ExportFormat,
+    ExplainMode,
+    ResponseFormat
 )
 
-from app import crud, database
+from fastapi.concurrency import run_in_threadpool
+from ..crud import async_selectop_crud
+from app import crud, database, schema_cache, result_cache
 
 router = APIRouter(prefix="/select", tags=["Select"])
 
 @router.post("/select")
-def select_endpoint(query: SelectQuerySchema):
+async def select_endpoint(query: SelectQuerySchema):
     """
     API endpoint to perform a SELECT query on a PostgreSQL database.
     """
-    data, sql = select_data(
+    args = (
         query.table, query.columns, query.where, query.order_by, query.order,
         query.limit, query.offset, query.group_by, query.having, query.distinct,
         query.join, query.aggregate
     )
+
+    if query.explain is not None:
+        explain, sql = await run_in_threadpool(
+            explain_select, *args, analyze=query.explain == ExplainMode.ANALYZE
+        )
+        response = {"query": sql, "explain": explain}
+        if query.include_data:
+            response["data"], _ = await database.run_db(select_data, async_selectop_crud.select_data, *args)
+            if query.explain == ExplainMode.ANALYZE:
+                response["note"] = ANALYZE_WITH_DATA_NOTE
+        return response
+
+    if query.response_format != ResponseFormat.ROWS:
+        keys, type_codes, rows, sql = await database.run_db(select_rows, async_selectop_crud.select_rows, *args)
+        if query.response_format == ResponseFormat.ARROW:
+            try:
+                body = arrow_ipc_bytes(keys, type_codes, rows)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return Response(body, media_type=EXPORT_MEDIA_TYPES["arrow"], headers={"X-Query": quote(sql)})
+        return {**columnar_payload(keys, rows), "query": sql}
+
+    # Only plain tables are cached: writes to them are what invalidate the cache.
+    cache_key = None
+    if query.use_cache:
+        tables = result_cache.referenced_tables(query.table, query.join)
+        base_tables = {name.lower() for name in await run_in_threadpool(schema_cache.get_table_names)}
+        if all(table in base_tables for table in tables):
+            cache_key = result_cache.make_key(query.model_dump(exclude={"use_cache"}))
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                data, sql = cached
+                return {"data": data, "query": sql, "cached": True}
+            versions = result_cache.table_versions(tables)
+
+    data, sql = await database.run_db(select_data, async_selectop_crud.select_data, *args)
+    if cache_key is not None:
+        result_cache.put(cache_key, tables, versions, (data, sql), len(data))
     return {"data": data, "query": sql}
 
+@router.post("/export")
+def export_endpoint(query: SelectExportSchema):
+    """
+    Stream the result of a select query as CSV, NDJSON, Arrow IPC or Parquet,
+    fetching `chunk_size` rows at a time from a server-side cursor.
+    """
+    try:
+        if query.format in (ExportFormat.ARROW, ExportFormat.PARQUET):
+            require_pyarrow()
+        chunks = stream_select_chunks(
+            query.table, query.columns, query.where, query.order_by, query.order,
+            query.limit, query.offset, query.group_by, query.having, query.distinct,
+            query.join, query.aggregate, chunk_size=query.chunk_size
+        )
+        # Run the query before the response starts so SQL errors become a 400 instead of a truncated file.
+        first_chunk = next(chunks)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    extension = {"arrow": "arrows"}.get(query.format.value, query.format.value)
+    return StreamingResponse(
+        EXPORTERS[query.format.value](itertools.chain([first_chunk], chunks)),
+        media_type=EXPORT_MEDIA_TYPES[query.format.value],
+        headers={"Content-Disposition": f'attachment; filename="{query.table}.{extension}"'},
+    )
+
+@router.get("/cache/stats")
+def select_cache_stats():
+    return result_cache.stats()
+
+@router.post("/cache/clear")
+def clear_select_cache():
+    result_cache.clear()
+    return {"message": "Select result cache cleared"}
+
 @router.get("/tablesview", response_model=List[str])
 async def get_tables_endpoint():
     try:
-        tables = get_table_names()
+        tables = await database.run_db(get_table_names, async_selectop_crud.get_table_names)
         return tables
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.crud.sequence_crud import (
     get_db,
     create_sequence,
     get_next_value,
+    get_next_values,
+    allocate_ids,
+    allocator_stats,
     get_current_value,
     set_sequence_value,
     restart_sequence,
     drop_sequence,
     list_sequences,
+    sequence_report,
+    sequence_sampler,
     view_sequence_details,
     associate_sequence,
     reset_sequence_for_table,
@@ -42,6 +48,27 @@ def list_all_sequences(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/report", summary="Usage and exhaustion forecast for all sequences")
+def sequence_report_route(
+    min_percent_used: float = Query(0.0, ge=0, le=100, description="Only report sequences at least this full"),
+    forecast: bool = Query(True, description="Include the consumption-rate forecast"),
+    db: Session = Depends(get_db)
+):
+    try:
+        return {"sequences": sequence_report(db, min_percent_used, forecast), "sampling": sequence_sampler.status()}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/report/sampling/start", summary="Sample sequence positions periodically for forecasts")
+def start_sequence_sampling(interval: float = Query(60.0, ge=1, le=86400, description="Seconds between samples")):
+    sequence_sampler.start(interval)
+    return sequence_sampler.status()
+
+@router.post("/report/sampling/stop", summary="Stop periodic sequence sampling")
+def stop_sequence_sampling():
+    sequence_sampler.stop()
+    return sequence_sampler.status()
+
 @router.get("/{seq_name}/next", summary="Get next value of a sequence")
 def next_value(seq_name: str, db: Session = Depends(get_db)):
     try:
@@ -50,6 +77,29 @@ def next_value(seq_name: str, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/{seq_name}/next_batch", summary="Get many next values of a sequence in one call")
+def next_values(
+    seq_name: str,
+    count: int = Query(..., ge=1, le=100000, description="Number of values to draw"),
+    db: Session = Depends(get_db)
+):
+    try:
+        return {"values": get_next_values(db, seq_name, count)}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{seq_name}/allocate", summary="Get values from the in-process ID block allocator")
+async def allocate_values(seq_name: str, count: int = Query(1, ge=1, le=100000)):
+    """
+    Serve values from a locally buffered block of the sequence; only touches the
+    database when the buffer needs refilling.
+    """
+    try:
+        values = await run_in_threadpool(allocate_ids, seq_name, count)
+        return {"values": values, "allocator": allocator_stats(seq_name)}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/{seq_name}/current", summary="Get current value of a sequence")
 def current_value(seq_name: str, db: Session = Depends(get_db)):
     try:
@@ -1,21 +1,30 @@
-from fastapi import HTTPException, APIRouter
+from fastapi import HTTPException, APIRouter, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, Response
 from sqlalchemy import inspect, text
 from ..crud.tableop_crud import create_dynamic_table, delete_dynamic_table, add_column, drop_column, insert_row, delete_row, update_row
 from app.crud.selectop_crud import get_table_names
 from ..database import engine
 from typing import List, Dict, Any, Optional, Tuple
+import anyio
+import asyncio
+import json
 
 from ..schemas.tableop_schema import (
     TableRequest,
     ModifyTableRequest,
     InsertRowRequest,
     UpdateRowRequest,
-    DeleteRowRequest
-
+    DeleteRowRequest,
+    BulkInsertRequest
 )
 
-from ..crud import tableop_crud
-from app import database
+from ..crud import tableop_crud, async_tableop_crud
+from ..crud.export_crud import columnar_payload, arrow_ipc_bytes, require_pyarrow, EXPORT_MEDIA_TYPES
+from ..schemas.selectop_schema import ResponseFormat
+from app import database, schema_cache
+from app.config import BULK_INSERT_READ_TIMEOUT
+from app.notification_listener import listener, sse_events
 
 
 router = APIRouter(prefix="/table", tags=["Table"])
@@ -23,10 +32,9 @@ router = APIRouter(prefix="/table", tags=["Table"])
 @router.get("/get_table_schema")
 def get_table_schema(table_name: str):
     try:
-        inspector = inspect(database.engine)
-        if table_name not in inspector.get_table_names():
+        if not schema_cache.table_exists(table_name):
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
-        columns = inspector.get_columns(table_name)
+        columns = schema_cache.get_columns(table_name)
         schema = [
             {"column_name": col["name"], "column_type": str(col["type"])}
             for col in columns
@@ -36,21 +44,113 @@ def get_table_schema(table_name: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/get_table_data")
-def get_table_data(table_name: str):
+async def get_table_data(
+    table_name: str,
+    response_format: ResponseFormat = Query(ResponseFormat.ROWS, description="'rows', 'columnar' or 'arrow'")
+):
     try:
-        inspector = inspect(engine)
-        if table_name not in inspector.get_table_names():
+        if not await run_in_threadpool(schema_cache.table_exists, table_name):
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
+        if response_format == ResponseFormat.ARROW:
+            try:
+                require_pyarrow()
+            except ValueError as e:
+                # Same response as /select/select for a missing pyarrow.
+                raise HTTPException(status_code=400, detail=str(e))
 
-        query = text(f"SELECT * FROM {table_name}")
+        if response_format != ResponseFormat.ROWS:
+            keys, type_codes, rows = await database.run_db(tableop_crud.get_table_rows, async_tableop_crud.get_table_rows, table_name)
+            if response_format == ResponseFormat.ARROW:
+                return Response(arrow_ipc_bytes(keys, type_codes, rows), media_type=EXPORT_MEDIA_TYPES["arrow"])
+            return columnar_payload(keys, rows)
 
-        with engine.connect() as conn:
-            result = conn.execute(query)
-            # Convert SQLAlchemy Row objects correctly
-            rows = [dict(row._mapping) for row in result]
+        rows = await database.run_db(tableop_crud.get_table_data, async_tableop_crud.get_table_data, table_name)
 
         return {"data": rows}
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/get_table_data/page")
+async def get_table_data_page(
+    table_name: str,
+    limit: int = Query(100, ge=1, le=10000, description="Rows per page"),
+    after: Optional[str] = Query(None, description="JSON list of primary key values (next_cursor of the previous page)")
+):
+    """
+    Keyset-paginated table data ordered by primary key.
+    """
+    try:
+        if not await run_in_threadpool(schema_cache.table_exists, table_name):
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
+        cursor = json.loads(after) if after else None
+        if cursor is not None and not isinstance(cursor, list):
+            cursor = [cursor]
+        page = await database.run_db(tableop_crud.get_table_page, async_tableop_crud.get_table_page, table_name, limit, cursor)
+        page["next_cursor"] = json.dumps(page["next_cursor"], default=str) if page["next_cursor"] is not None else None
+        return page
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/get_table_data/stream")
+def stream_table_data(
+    table_name: str,
+    chunk_size: int = Query(1000, ge=1, le=100000, description="Rows fetched per server-side cursor round trip")
+):
+    """
+    Stream the whole table as newline-delimited JSON (one row object per line).
+    """
+    if not schema_cache.table_exists(table_name):
+        raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
+    if database.async_engine is not None:
+        async def async_lines():
+            async for row in async_tableop_crud.stream_table_rows(table_name, chunk_size):
+                yield json.dumps(row, default=str) + "\n"
+        return StreamingResponse(async_lines(), media_type="application/x-ndjson")
+    lines = (json.dumps(row, default=str) + "\n" for row in tableop_crud.stream_table_rows(table_name, chunk_size))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+@router.get("/get_table_data/changes")
+async def stream_table_changes(table_name: str):
+    """
+    Server-Sent Events stream of row-level deltas ({"table", "op", "old", "new"}) for the table.
+    Installs the change-notification trigger on first use.
+    """
+    try:
+        if not await run_in_threadpool(schema_cache.table_exists, table_name):
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
+        if not await run_in_threadpool(tableop_crud.change_notifications_enabled, table_name):
+            await run_in_threadpool(tableop_crud.enable_change_notifications, table_name)
+        subscription = await run_in_threadpool(
+            listener.subscribe, [tableop_crud.change_channel(table_name)], asyncio.get_running_loop()
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(
+        sse_events(subscription, decode_payload=True),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/change_notifications/enable")
+def enable_change_notifications_api(request: TableRequest):
+    try:
+        return tableop_crud.enable_change_notifications(request.table_name)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/change_notifications/disable")
+def disable_change_notifications_api(request: TableRequest):
+    try:
+        return tableop_crud.disable_change_notifications(request.table_name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -86,33 +186,86 @@ def modify_table(request: ModifyTableRequest):
 @router.get("/tables")
 def get_tables():
     try:
-        inspector = inspect(database.engine)
-        tables = inspector.get_table_names()
+        tables = schema_cache.get_table_names()
         return {"tables": tables}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/insert_row")
-def insert_row_api(request: InsertRowRequest):
+async def insert_row_api(request: InsertRowRequest):
     try:
-        tableop_crud.insert_row(request.table_name, request.row_data)
+        await database.run_db(tableop_crud.insert_row, async_tableop_crud.insert_row, request.table_name, request.row_data)
         return {"message": f"Row inserted into table '{request.table_name}' successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/update_row")
-def update_row_api(request: UpdateRowRequest):
+async def update_row_api(request: UpdateRowRequest):
     try:
-        tableop_crud.update_row(request.table_name, request.condition, request.new_values)
+        await database.run_db(tableop_crud.update_row, async_tableop_crud.update_row, request.table_name, request.condition, request.new_values)
         return {"message": f"Row(s) in '{request.table_name}' updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/delete_row")
-def delete_row_api(request: DeleteRowRequest):
+async def delete_row_api(request: DeleteRowRequest):
     try:
-        tableop_crud.delete_row(request.table_name, request.condition)
+        await database.run_db(tableop_crud.delete_row, async_tableop_crud.delete_row, request.table_name, request.condition)
         return {"message": f"Row(s) in '{request.table_name}' deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/bulk_insert_rows")
+def bulk_insert_rows_api(request: BulkInsertRequest):
+    try:
+        return tableop_crud.bulk_insert_rows(request.table_name, request.rows, request.batch_size, request.method)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _ndjson_row_chunks(request: Request):
+    # The rows of each received chunk of the body, without buffering the whole upload.
+    pending = b""
+    async for chunk in request.stream():
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        rows = [json.loads(line) for line in lines if line.strip()]
+        if rows:
+            yield rows
+    if pending.strip():
+        yield [json.loads(pending)]
+
+async def _next_row_chunk(row_chunks):
+    # A client that stops sending must not keep the insert's connection checked out.
+    with anyio.fail_after(BULK_INSERT_READ_TIMEOUT):
+        return await row_chunks.__anext__()
+
+def _rows_from_event_loop(row_chunks):
+    # Consume the async chunks from the worker thread bulk_insert_rows runs in.
+    while True:
+        try:
+            rows = anyio.from_thread.run(_next_row_chunk, row_chunks)
+        except StopAsyncIteration:
+            return
+        yield from rows
+
+@router.post("/bulk_insert_rows/ndjson")
+async def bulk_insert_rows_ndjson_api(
+    request: Request,
+    table_name: str,
+    batch_size: int = Query(1000, description="Rows per INSERT/COPY batch"),
+    method: str = Query("values", description="'values' or 'copy'")
+):
+    """
+    Bulk insert rows sent as newline-delimited JSON (one object per line). The body is
+    read as it arrives and inserted batch by batch.
+    """
+    try:
+        rows = _rows_from_event_loop(_ndjson_row_chunks(request))
+        return await run_in_threadpool(tableop_crud.bulk_insert_rows, table_name, rows, batch_size, method)
+    except TimeoutError:
+        raise HTTPException(
+            status_code=408,
+            detail=f"No data received for {BULK_INSERT_READ_TIMEOUT:g}s; the insert was rolled back."
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
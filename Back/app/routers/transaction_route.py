@@ -1,7 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from typing import Optional
+import asyncio
+from app import transaction_sessions
+from app.notification_listener import listener, sse_events
+from app.transaction_sessions import TransactionSessionError
 from app.crud.transaction_crud import (
     get_db,
+    get_transaction_db,
     begin_transaction,
     commit_transaction,
     rollback_transaction,
@@ -25,6 +33,9 @@ from app.crud.transaction_crud import (
     advisory_unlock,
     advisory_xact_lock,
     advisory_unlock_all,
+    advisory_try_lock,
+    advisory_timed_lock,
+    run_transaction_script,
 )
 from app.schemas.transaction_schema import (
     SavepointRequest,
@@ -34,167 +45,300 @@ from app.schemas.transaction_schema import (
     NotifyRequest,
     SnapshotRequest,
     AdvisoryLockRequest,
+    AdvisoryTryLockRequest,
+    AdvisoryTimedLockRequest,
+    TransactionSessionRequest,
+    TransactionScriptRequest,
 )
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
+# -----------------------------------
+# Transaction Sessions
+# -----------------------------------
+# Send the returned transaction_id as the X-Transaction-Id header on later calls so they
+# run on the same pinned connection.
+
+@router.post("/session/open", summary="Open a transaction session pinned to one connection")
+def open_session_route(request: Optional[TransactionSessionRequest] = None):
+    try:
+        return {"transaction_id": transaction_sessions.open_session(request.transaction_id if request else None)}
+    except TransactionSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/session/close", summary="Roll back and release a transaction session")
+def close_session_route(x_transaction_id: str = Header(...)):
+    try:
+        transaction_sessions.close_session(x_transaction_id)
+        return {"message": f"Transaction session '{x_transaction_id}' closed"}
+    except TransactionSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/session/list", summary="List open transaction sessions")
+def list_sessions_route():
+    return {"sessions": transaction_sessions.list_sessions()}
+
 @router.post("/begin", summary="Begin a new transaction")
-def begin_transaction_route(db: Session = Depends(get_db)):
+def begin_transaction_route(x_transaction_id: Optional[str] = Header(None)):
+    """
+    Begin a transaction on a pinned session. Without an X-Transaction-Id header (or with an
+    id that is not open yet) a session is opened first; its id is returned as transaction_id.
+    """
     try:
-        return begin_transaction(db)
+        if x_transaction_id is None or not transaction_sessions.exists(x_transaction_id):
+            x_transaction_id = transaction_sessions.open_session(x_transaction_id)
+        with transaction_sessions.use_session(x_transaction_id) as db:
+            result = begin_transaction(db)
+        return {**result, "transaction_id": x_transaction_id}
+    except TransactionSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/commit", summary="Commit the current transaction")
-def commit_transaction_route(db: Session = Depends(get_db)):
+def commit_transaction_route(db: Session = Depends(get_transaction_db)):
     try:
         return commit_transaction(db)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/rollback", summary="Rollback the current transaction")
-def rollback_transaction_route(db: Session = Depends(get_db)):
+def rollback_transaction_route(db: Session = Depends(get_transaction_db)):
     try:
         return rollback_transaction(db)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/savepoint", summary="Create a savepoint")
-def create_savepoint_route(request: SavepointRequest, db: Session = Depends(get_db)):
+def create_savepoint_route(request: SavepointRequest, db: Session = Depends(get_transaction_db)):
     try:
         return create_savepoint(db, request.savepoint_name)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/rollback_to_savepoint", summary="Rollback to a specific savepoint")
-def rollback_to_savepoint_route(request: SavepointRequest, db: Session = Depends(get_db)):
+def rollback_to_savepoint_route(request: SavepointRequest, db: Session = Depends(get_transaction_db)):
     try:
         return rollback_to_savepoint(db, request.savepoint_name)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/release_savepoint", summary="Release a specific savepoint")
-def release_savepoint_route(request: SavepointRequest, db: Session = Depends(get_db)):
+def release_savepoint_route(request: SavepointRequest, db: Session = Depends(get_transaction_db)):
     try:
         return release_savepoint(db, request.savepoint_name)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/end", summary="End the transaction (commit)")
-def end_transaction_route(db: Session = Depends(get_db)):
+def end_transaction_route(db: Session = Depends(get_transaction_db)):
     try:
         return end_transaction(db)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/abort", summary="Abort the transaction (rollback)")
-def abort_transaction_route(db: Session = Depends(get_db)):
+def abort_transaction_route(db: Session = Depends(get_transaction_db)):
     try:
         return abort_transaction(db)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/set_transaction_isolation", summary="Set transaction isolation level")
-def set_transaction_isolation_route(request: IsolationRequest, db: Session = Depends(get_db)):
+def set_transaction_isolation_route(request: IsolationRequest, db: Session = Depends(get_transaction_db)):
     try:
         return set_transaction_isolation(db, request.isolation_level)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/set_session_isolation", summary="Set session isolation level")
-def set_session_isolation_route(request: IsolationRequest, db: Session = Depends(get_db)):
+def set_session_isolation_route(request: IsolationRequest, db: Session = Depends(get_transaction_db)):
     try:
         return set_session_isolation(db, request.isolation_level)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/lock_table", summary="Lock a table")
-def lock_table_route(request: LockTableRequest, db: Session = Depends(get_db)):
+def lock_table_route(request: LockTableRequest, db: Session = Depends(get_transaction_db)):
     try:
         return lock_table(db, request.table_name)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/set_snapshot", summary="Set transaction snapshot")
-def set_snapshot_route(request: SnapshotRequest, db: Session = Depends(get_db)):
+def set_snapshot_route(request: SnapshotRequest, db: Session = Depends(get_transaction_db)):
     try:
         return set_transaction_snapshot(db, request.snapshot_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/export_snapshot", summary="Export transaction snapshot")
-def export_snapshot_route(db: Session = Depends(get_db)):
+def export_snapshot_route(db: Session = Depends(get_transaction_db)):
     try:
         return export_snapshot(db)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/prepare_transaction", summary="Prepare a two-phase transaction")
-def prepare_transaction_route(request: PreparedTransactionRequest, db: Session = Depends(get_db)):
+def prepare_transaction_route(request: PreparedTransactionRequest, db: Session = Depends(get_transaction_db)):
     try:
         return prepare_transaction(db, request.transaction_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/commit_prepared", summary="Commit a prepared transaction")
-def commit_prepared_route(request: PreparedTransactionRequest, db: Session = Depends(get_db)):
+def commit_prepared_route(request: PreparedTransactionRequest, db: Session = Depends(get_transaction_db)):
     try:
         return commit_prepared(db, request.transaction_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/rollback_prepared", summary="Rollback a prepared transaction")
-def rollback_prepared_route(request: PreparedTransactionRequest, db: Session = Depends(get_db)):
+def rollback_prepared_route(request: PreparedTransactionRequest, db: Session = Depends(get_transaction_db)):
     try:
         return rollback_prepared(db, request.transaction_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/listen", summary="Listen on a notification channel")
-def listen_channel_route(request: NotifyRequest, db: Session = Depends(get_db)):
+def listen_channel_route(request: NotifyRequest, db: Session = Depends(get_transaction_db)):
     try:
         return listen_channel(db, request.channel_name)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/notify", summary="Send a notification")
-def notify_channel_route(request: NotifyRequest, db: Session = Depends(get_db)):
+def notify_channel_route(request: NotifyRequest, db: Session = Depends(get_transaction_db)):
     try:
         return notify_channel(db, request.channel_name, request.message)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/unlisten", summary="Stop listening on a channel")
-def unlisten_channel_route(request: NotifyRequest, db: Session = Depends(get_db)):
+def unlisten_channel_route(request: NotifyRequest, db: Session = Depends(get_transaction_db)):
     try:
         return unlisten_channel(db, request.channel_name)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# -----------------------------------
+# Notification Push (SSE / WebSocket)
+# -----------------------------------
+# /listen above only LISTENs on a request-scoped session, so nothing is ever delivered there.
+# These endpoints subscribe to the app's dedicated listener connection instead.
+
+SSE_HEARTBEAT_SECONDS = 15
+
+async def _subscribe(channels: str):
+    try:
+        # LISTEN is a database round trip; keep it off the event loop.
+        return await run_in_threadpool(
+            listener.subscribe, [c.strip() for c in channels.split(",") if c.strip()], asyncio.get_running_loop()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Notification listener unavailable: {e}")
+
+@router.get("/notifications/stream", summary="Stream notifications as Server-Sent Events")
+async def notifications_sse_route(channels: str = Query(..., description="Comma-separated channel names")):
+    subscription = await _subscribe(channels)
+    return StreamingResponse(
+        sse_events(subscription, SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/notifications/ws")
+async def notifications_ws_route(websocket: WebSocket, channels: str = Query(...)):
+    try:
+        subscription = await _subscribe(channels)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=str(e.detail))
+        return
+    await websocket.accept()
+
+    async def watch_disconnect():
+        # Clients don't send anything; receiving only tells us when they go away.
+        while True:
+            await websocket.receive_text()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        while not watcher.done():
+            getter = asyncio.create_task(subscription.queue.get())
+            done, _ = await asyncio.wait({getter, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                break
+            await websocket.send_json(getter.result())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        watcher.cancel()
+        await run_in_threadpool(listener.unsubscribe, subscription)
+
+@router.get("/notifications/stats", summary="Listener connection and subscriber counts")
+def notifications_stats_route():
+    return listener.stats()
+
 @router.post("/advisory_lock", summary="Acquire an advisory lock")
-def advisory_lock_route(request: AdvisoryLockRequest, db: Session = Depends(get_db)):
+def advisory_lock_route(request: AdvisoryLockRequest, db: Session = Depends(get_transaction_db)):
     try:
-        return advisory_lock(db, request.key)
+        return advisory_lock(db, request.key, request.shared)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/advisory_unlock", summary="Release an advisory lock")
-def advisory_unlock_route(request: AdvisoryLockRequest, db: Session = Depends(get_db)):
+def advisory_unlock_route(request: AdvisoryLockRequest, db: Session = Depends(get_transaction_db)):
     try:
-        return advisory_unlock(db, request.key)
+        return advisory_unlock(db, request.key, request.shared)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/advisory_xact_lock", summary="Acquire an advisory transaction lock")
-def advisory_xact_lock_route(request: AdvisoryLockRequest, db: Session = Depends(get_db)):
+def advisory_xact_lock_route(request: AdvisoryLockRequest, db: Session = Depends(get_transaction_db)):
+    try:
+        return advisory_xact_lock(db, request.key, request.shared)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/advisory_try_lock", summary="Try to acquire an advisory lock without blocking")
+def advisory_try_lock_route(request: AdvisoryTryLockRequest, db: Session = Depends(get_transaction_db)):
     try:
-        return advisory_xact_lock(db, request.key)
+        return advisory_try_lock(
+            db, request.key, request.shared, request.xact,
+            request.retries, request.backoff_ms, request.max_backoff_ms, request.max_wait_ms
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/advisory_timed_lock", summary="Acquire an advisory lock, giving up after a timeout")
+def advisory_timed_lock_route(request: AdvisoryTimedLockRequest, db: Session = Depends(get_transaction_db)):
+    try:
+        return advisory_timed_lock(db, request.key, request.timeout_ms, request.shared, request.xact)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/advisory_unlock_all", summary="Release all advisory locks")
-def advisory_unlock_all_route(db: Session = Depends(get_db)):
+def advisory_unlock_all_route(db: Session = Depends(get_transaction_db)):
     try:
         return advisory_unlock_all(db)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/batch", summary="Run a script of operations atomically on one connection")
+def run_transaction_script_route(request: TransactionScriptRequest, db: Session = Depends(get_db)):
+    """
+    Execute the operations in order in a single transaction and return per-step results
+    and timings. A failing step rolls back the whole script (reported with status 400).
+    """
+    try:
+        report = run_transaction_script(db, request.operations)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not report["committed"] and "failed_step" in report:
+        raise HTTPException(status_code=400, detail=report)
+    return report
@@ -0,0 +1,97 @@
+# app/schema_cache.py
+
+import threading
+import time
+from sqlalchemy import inspect
+from .config import SCHEMA_CACHE_TTL
+from .database import engine
+from typing import List, Optional, Dict, Any
+
+# Process-wide cache of catalog metadata so the row write paths do not
+# re-inspect the database on every request.
+_lock = threading.Lock()
+_table_names: Optional[tuple] = None  # (expires_at, [table names])
+_tables: Dict[str, tuple] = {}  # table_name -> (expires_at, {"columns": [...], "primary_key": [...]})
+# Bumped by invalidate, so per-connection state derived from a table's shape (prepared
+# selects) can tell that DDL went through this API since it was built.
+_generations: Dict[str, int] = {}
+_global_generation = 0
+
+
+def _expired(expires_at: float) -> bool:
+    return time.monotonic() >= expires_at
+
+
+def get_table_names() -> List[str]:
+    """
+    Return the table names of the database, reading the catalog only when the cache is stale.
+    """
+    global _table_names
+    with _lock:
+        if _table_names is not None and not _expired(_table_names[0]):
+            return list(_table_names[1])
+    names = inspect(engine).get_table_names()
+    with _lock:
+        _table_names = (time.monotonic() + SCHEMA_CACHE_TTL, names)
+    return list(names)
+
+
+def table_exists(table_name: str) -> bool:
+    return table_name in get_table_names()
+
+
+def get_table_info(table_name: str) -> Dict[str, Any]:
+    """
+    Return the cached columns and primary key of a table.
+    Raises NoSuchTableError (from the inspector) if the table does not exist.
+    """
+    with _lock:
+        cached = _tables.get(table_name)
+        if cached is not None and not _expired(cached[0]):
+            return cached[1]
+    inspector = inspect(engine)
+    info = {
+        "columns": inspector.get_columns(table_name),
+        "primary_key": inspector.get_pk_constraint(table_name).get("constrained_columns") or [],
+    }
+    with _lock:
+        _tables[table_name] = (time.monotonic() + SCHEMA_CACHE_TTL, info)
+    return info
+
+
+def get_columns(table_name: str) -> List[Dict[str, Any]]:
+    return get_table_info(table_name)["columns"]
+
+
+def get_column_names(table_name: str) -> set:
+    return {col["name"] for col in get_columns(table_name)}
+
+
+def get_primary_key(table_name: str) -> List[str]:
+    return list(get_table_info(table_name)["primary_key"])
+
+
+def _generation_key(table_name: str) -> str:
+    return table_name.split(".")[-1].strip('"').lower()
+
+
+def generation(table_names: List[str]) -> tuple:
+    with _lock:
+        return (_global_generation,) + tuple(_generations.get(_generation_key(t), 0) for t in table_names)
+
+
+def invalidate(table_name: Optional[str] = None):
+    """
+    Drop cached metadata for one table (plus the table list), or everything when no table is given.
+    Call this after any DDL that creates, drops or alters a table.
+    """
+    global _table_names, _global_generation
+    with _lock:
+        _table_names = None
+        if table_name is None:
+            _tables.clear()
+            _global_generation += 1
+        else:
+            _tables.pop(table_name, None)
+            key = _generation_key(table_name)
+            _generations[key] = _generations.get(key, 0) + 1
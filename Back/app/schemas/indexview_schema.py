@@ -4,12 +4,26 @@ from typing import List, Optional, Dict, Any
 class IndexCreate(BaseModel):
     index_name: str
     table_name: str
-    column_name: str
-    index_type: str  # e.g., "BTREE", "HASH", "GIN", "GIST", "SPGIST", "BRIN"
+    column_name: Optional[str] = None  # comma-separated; or use `columns`
+    index_type: str = "BTREE"  # e.g., "BTREE", "HASH", "GIN", "GIST", "SPGIST", "BRIN"
+    columns: Optional[List[str]] = Field(None, description="Columns and/or expressions, e.g. ['customer_id', 'lower(email)']")
+    include: Optional[List[str]] = Field(None, description="Non-key columns stored in the index (INCLUDE)")
+    where: Optional[str] = Field(None, description="Predicate for a partial index")
+    unique: bool = False
+    concurrently: bool = Field(False, description="Build without blocking writes (CREATE INDEX CONCURRENTLY)")
+    background: bool = Field(False, description="Return a job id immediately and build on a background thread")
 
 class IndexDrop(BaseModel):
     index_name: str
 
+class IndexRecommendation(BaseModel):
+    table: str
+    columns: List[str]
+    index_name: Optional[str] = None
+
+class ApplyIndexRecommendations(BaseModel):
+    recommendations: List[IndexRecommendation]
+
 
 class IndexListItem(BaseModel):
     indexname: str = Field(..., description="Name of the index")
@@ -19,7 +33,7 @@ class IndexListItem(BaseModel):
 class ViewCreate(BaseModel):
     view_type: str = Field(
         ...,
-        description="Type of view to create. Allowed values: 'simple', 'materialized', 'updatable', 'recursive'."
+        description="Type of view to create. Allowed values: 'simple', 'materialized', 'updatable', 'recursive', 'incremental'."
     )
     view_name: str = Field(..., description="Name of the view to be created.")
     definition: str = Field(
@@ -40,12 +54,21 @@ class ViewCreate(BaseModel):
 class ViewDrop(BaseModel):
     view_type: str = Field(
         ...,
-        description="Type of view to drop. Allowed values: 'simple', 'materialized', 'updatable', 'recursive'."
+        description="Type of view to drop. Allowed values: 'simple', 'materialized', 'updatable', 'recursive', 'incremental'."
     )
     view_name: str = Field(..., description="Name of the view to be dropped.")
 
 class MaterializedViewRefresh(BaseModel):
     view_name: str = Field(..., description="Name of the materialized view to refresh.")
+    concurrently: Optional[bool] = Field(
+        None, description="Refresh CONCURRENTLY; by default it is used whenever the view has a unique index."
+    )
+    background: bool = Field(False, description="Start the refresh and return immediately.")
+    exact_count: bool = Field(False, description="Report an exact row count (a second full scan) instead of the estimate.")
+
+class MaterializedViewSchedule(BaseModel):
+    interval_seconds: float = Field(..., ge=1, description="Refresh the view this often.")
+    concurrently: Optional[bool] = None
 
 
 class RenameViewQuery(BaseModel):
@@ -69,4 +92,18 @@ class UpdateQuery(BaseModel):
 
 class DeleteQuery(BaseModel):
     # WHERE condition clause (without the WHERE keyword)
-    condition: str
\ No newline at end of file
+    condition: str
+
+class BulkViewInsert(BaseModel):
+    rows: List[Dict[str, Any]] = Field(..., description="Rows as column -> value objects")
+    batch_size: int = Field(1000, ge=1, le=100000, description="Rows per executemany batch")
+
+class BulkViewUpdate(BaseModel):
+    key_columns: List[str] = Field(..., min_length=1, description="Columns that identify the rows to update")
+    rows: List[Dict[str, Any]] = Field(..., description="Key column values plus the new values of other columns")
+    batch_size: int = Field(1000, ge=1, le=100000)
+
+class BulkViewDelete(BaseModel):
+    key_columns: List[str] = Field(..., min_length=1)
+    keys: List[Dict[str, Any]] = Field(..., description="One key column -> value object per row set to delete")
+    batch_size: int = Field(1000, ge=1, le=100000)
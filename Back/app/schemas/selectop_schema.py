@@ -1,5 +1,15 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+from enum import Enum
+
+class ExplainMode(str, Enum):
+    PLAN = "plan"        # EXPLAIN (FORMAT JSON): estimated plan, query not executed
+    ANALYZE = "analyze"  # EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON): executes and measures
+
+class ResponseFormat(str, Enum):
+    ROWS = "rows"          # {"data": [{column: value, ...}, ...]}
+    COLUMNAR = "columnar"  # {"columns": [...], "values": [[column values], ...]}
+    ARROW = "arrow"        # Arrow IPC stream body (requires pyarrow)
 
 # Request model for select queries
 class SelectQuerySchema(BaseModel):
@@ -15,6 +25,21 @@ class SelectQuerySchema(BaseModel):
     distinct: bool = False
     join: Optional[List[Dict[str, str]]] = None  # Change: Now includes 'join_type', 'join_table', and 'condition'
     aggregate: Optional[Dict[str, str]] = None
+    use_cache: bool = False  # Serve identical queries from the result cache until a referenced table changes
+    explain: Optional[ExplainMode] = None  # Return the query plan alongside the rows
+    include_data: bool = True  # With explain set, False returns only the plan (with "analyze", True runs the query twice)
+    response_format: ResponseFormat = ResponseFormat.ROWS
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    ARROW = "arrow"      # Arrow IPC stream (requires pyarrow)
+    PARQUET = "parquet"  # requires pyarrow
+
+# Request model for streaming exports of a select query
+class SelectExportSchema(SelectQuerySchema):
+    format: ExportFormat = ExportFormat.CSV
+    chunk_size: int = Field(10000, ge=1, le=1000000, description="Rows fetched per server-side cursor round trip")
 
 # Response model: data plus the SQL query that was executed
 class SelectResponse(BaseModel):
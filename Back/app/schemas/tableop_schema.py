@@ -26,4 +26,9 @@ class UpdateRowRequest(BaseModel):
 
 class DeleteRowRequest(BaseModel):
     table_name: str
-    condition: Dict[str, Any]
\ No newline at end of file
+    condition: Dict[str, Any]
+class BulkInsertRequest(BaseModel):
+    table_name: str
+    rows: List[Dict[str, Any]]
+    batch_size: int = 1000
+    method: str = "values"  # "values" (multi-row INSERT) or "copy" (COPY FROM STDIN)
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from enum import Enum
-from typing import Optional
+from typing import Optional, List, Dict, Any
 
 class IsolationLevel(str, Enum):
     READ_UNCOMMITTED = "READ UNCOMMITTED"
@@ -29,3 +29,42 @@ class SnapshotRequest(BaseModel):
 
 class AdvisoryLockRequest(BaseModel):
     key: int
+    shared: bool = False
+
+class AdvisoryTryLockRequest(BaseModel):
+    key: int
+    shared: bool = False
+    xact: bool = Field(False, description="Take a transaction-level lock instead of a session-level one")
+    retries: int = Field(0, ge=0, le=100, description="Extra attempts after the first one fails")
+    backoff_ms: int = Field(50, ge=1, le=5000, description="Delay before the first retry; doubles per retry")
+    max_backoff_ms: int = Field(1000, ge=1, le=5000)
+    max_wait_ms: int = Field(2000, ge=0, le=5000, description="Total time spent waiting between retries")
+
+class AdvisoryTimedLockRequest(BaseModel):
+    key: int
+    timeout_ms: int = Field(..., ge=1, le=600000, description="Give up (lock_timeout) after this long")
+    shared: bool = False
+    xact: bool = False
+
+class TransactionSessionRequest(BaseModel):
+    # Client-chosen id; omit to have the server issue one.
+    transaction_id: Optional[str] = None
+
+class TransactionOperation(BaseModel):
+    # One of: begin, set_transaction_isolation, savepoint, rollback_to_savepoint, release_savepoint,
+    # lock_table, advisory_lock, advisory_unlock, advisory_xact_lock, advisory_unlock_all, notify,
+    # insert_row, update_row, delete_row, and (last step only) commit or rollback.
+    op: str
+    savepoint_name: Optional[str] = None
+    isolation_level: Optional[IsolationLevel] = None
+    table_name: Optional[str] = None
+    key: Optional[int] = None
+    shared: bool = False
+    channel_name: Optional[str] = None
+    message: Optional[str] = ""
+    row_data: Optional[Dict[str, Any]] = None
+    condition: Optional[Dict[str, Any]] = None
+    new_values: Optional[Dict[str, Any]] = None
+
+class TransactionScriptRequest(BaseModel):
+    operations: List[TransactionOperation]
@@ -0,0 +1,212 @@
+# app/transaction_sessions.py
+
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from sqlalchemy.orm import Session
+from .config import (
+    TX_SESSION_IDLE_TIMEOUT,
+    TX_SESSION_MAX_LIFETIME,
+    TX_SESSION_MAX_OPEN,
+    TX_SESSION_WAIT_TIMEOUT,
+)
+from .database import engine
+from typing import Optional, Dict, Any, List
+
+# Registry of interactive transactions. Each entry pins one pooled connection to a
+# transaction id so BEGIN, SAVEPOINT, ... and COMMIT sent as separate HTTP requests
+# all run on the same backend.
+
+
+class TransactionSessionError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class TransactionSession:
+    def __init__(self, transaction_id: str):
+        self.transaction_id = transaction_id
+        self.connection = engine.connect()
+        self.db = Session(bind=self.connection)
+        self.db.info["transaction_session"] = self
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.lock = threading.Lock()
+        self.closed = False
+        self.release_requested = False
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.db.close()
+            self.connection.rollback()
+            # Session-level state would otherwise follow the connection back into the pool.
+            self.connection.exec_driver_sql("SELECT pg_advisory_unlock_all()")
+            self.connection.exec_driver_sql("UNLISTEN *")
+            self.connection.exec_driver_sql("RESET ALL")
+            self.connection.commit()
+        except Exception:
+            # Don't hand a connection in an unknown state back to the pool.
+            self.connection.invalidate()
+        finally:
+            self.connection.close()
+
+    def info(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "transaction_id": self.transaction_id,
+            "age_seconds": round(now - self.created_at, 3),
+            "idle_seconds": round(now - self.last_used, 3),
+            "in_use": self.lock.locked(),
+        }
+
+
+_lock = threading.Lock()
+_sessions: Dict[str, TransactionSession] = {}
+_reaper: Optional[threading.Thread] = None
+
+
+def _expired(session: TransactionSession, now: float) -> bool:
+    return (
+        now - session.last_used > TX_SESSION_IDLE_TIMEOUT
+        or now - session.created_at > TX_SESSION_MAX_LIFETIME
+    )
+
+
+def reap_expired() -> List[str]:
+    """
+    Roll back and release sessions past their idle timeout or maximum lifetime.
+    Sessions busy with a request are left for the next sweep.
+    """
+    now = time.monotonic()
+    reaped = []
+    with _lock:
+        candidates = [s for s in _sessions.values() if s is not None and _expired(s, now)]
+    for session in candidates:
+        if not session.lock.acquire(blocking=False):
+            continue
+        try:
+            # It may have been used between the scan and acquiring its lock.
+            if session.closed or not _expired(session, time.monotonic()):
+                continue
+            with _lock:
+                _sessions.pop(session.transaction_id, None)
+            session.close()
+            reaped.append(session.transaction_id)
+        finally:
+            session.lock.release()
+    return reaped
+
+
+def _reap_forever():
+    interval = max(1, min(TX_SESSION_IDLE_TIMEOUT, TX_SESSION_MAX_LIFETIME) // 4)
+    while True:
+        time.sleep(interval)
+        try:
+            reap_expired()
+        except Exception as e:
+            print("Error reaping transaction sessions:", str(e))
+
+
+def _start_reaper():
+    global _reaper
+    if _reaper is None:
+        _reaper = threading.Thread(target=_reap_forever, name="transaction-session-reaper", daemon=True)
+        _reaper.start()
+
+
+def open_session(transaction_id: Optional[str] = None) -> str:
+    """
+    Pin a pooled connection to `transaction_id` (or a new server-issued id) and return the id.
+    """
+    reap_expired()
+    transaction_id = transaction_id or uuid.uuid4().hex
+    with _lock:
+        if transaction_id in _sessions:
+            raise TransactionSessionError(409, f"Transaction '{transaction_id}' is already open.")
+        if len(_sessions) >= TX_SESSION_MAX_OPEN:
+            raise TransactionSessionError(429, f"Too many open transactions (limit {TX_SESSION_MAX_OPEN}).")
+        # Reserve the slot before connecting so the cap holds under concurrent opens.
+        _sessions[transaction_id] = None
+    try:
+        session = TransactionSession(transaction_id)
+    except Exception:
+        with _lock:
+            _sessions.pop(transaction_id, None)
+        raise
+    with _lock:
+        _sessions[transaction_id] = session
+    _start_reaper()
+    return transaction_id
+
+
+def exists(transaction_id: str) -> bool:
+    with _lock:
+        return _sessions.get(transaction_id) is not None
+
+
+@contextmanager
+def use_session(transaction_id: str):
+    """
+    Yield the pinned ORM session for `transaction_id`, serialising concurrent requests on it.
+    """
+    with _lock:
+        session = _sessions.get(transaction_id)
+    if session is None:
+        raise TransactionSessionError(404, f"Transaction '{transaction_id}' not found or expired.")
+    if not session.lock.acquire(timeout=TX_SESSION_WAIT_TIMEOUT):
+        raise TransactionSessionError(409, f"Transaction '{transaction_id}' is busy.")
+    try:
+        if session.closed:
+            raise TransactionSessionError(404, f"Transaction '{transaction_id}' not found or expired.")
+        session.last_used = time.monotonic()
+        yield session.db
+    finally:
+        session.last_used = time.monotonic()
+        try:
+            if session.release_requested and not session.closed:
+                with _lock:
+                    _sessions.pop(transaction_id, None)
+                session.close()
+        finally:
+            session.lock.release()
+
+
+def release_after_use(db: Session):
+    """
+    Close the pinned session `db` belongs to once the current request is done with it
+    (after COMMIT/ROLLBACK, so the connection is not held until the idle timeout).
+    No-op for sessions that are not pinned.
+    """
+    session = db.info.get("transaction_session")
+    if session is not None:
+        session.release_requested = True
+
+
+def close_session(transaction_id: str):
+    """
+    Roll back anything still open on the session and return its connection to the pool.
+    """
+    with _lock:
+        session = _sessions.get(transaction_id)
+    if session is None:
+        raise TransactionSessionError(404, f"Transaction '{transaction_id}' not found or expired.")
+    if not session.lock.acquire(timeout=TX_SESSION_WAIT_TIMEOUT):
+        raise TransactionSessionError(409, f"Transaction '{transaction_id}' is busy.")
+    try:
+        with _lock:
+            _sessions.pop(transaction_id, None)
+        session.close()
+    finally:
+        session.lock.release()
+
+
+def list_sessions() -> List[Dict[str, Any]]:
+    with _lock:
+        sessions = [s for s in _sessions.values() if s is not None]
+    return [s.info() for s in sessions]
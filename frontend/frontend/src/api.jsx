@@ -12,16 +12,29 @@ export const fetchTables = async () => {
     }
   };
   
+// Rebuild row objects from a columnar response ({columns, values}).
+export const columnarToRows = ({ columns, values, row_count }) => {
+  const rows = new Array(row_count);
+  for (let i = 0; i < row_count; i++) {
+    const row = {};
+    for (let c = 0; c < columns.length; c++) {
+      row[columns[c]] = values[c][i];
+    }
+    rows[i] = row;
+  }
+  return rows;
+};
+
   // Fetch table data using the new endpoint
 export const fetchTableData = async (tableName) => {
-  const response = await fetch(`http://localhost:8000/table/get_table_data?table_name=${encodeURIComponent(tableName)}`);
+  const response = await fetch(`http://localhost:8000/table/get_table_data?table_name=${encodeURIComponent(tableName)}&response_format=columnar`);
   if (!response.ok) {
     const errorData = await response.json();
     throw new Error(errorData.detail || "Error fetching table data");
   }
-  // Extract the data array from the response JSON
+  // Columnar payloads repeat no column names, so they are smaller to send and parse
   const json = await response.json();
-  return json.data;
+  return columnarToRows(json);
 };
   
   export const fetchTableSchema = async (tableName) => {
@@ -139,6 +152,56 @@ export const fetchTableData = async (tableName) => {
     }
   };
   
+// Subscribe to row-level deltas ({table, op, old, new}) for a table over Server-Sent Events.
+// onStatus(true/false) reports whether the stream is connected. Returns a function that closes it.
+export const subscribeTableChanges = (tableName, onDelta, onStatus) => {
+  let source = null;
+  let closed = false;
+  // Enabling returns the NOTIFY channel, which is also the SSE event name.
+  fetch("http://localhost:8000/table/change_notifications/enable", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ table_name: tableName })
+  })
+    .then((res) => {
+      if (!res.ok) {
+        throw new Error("Failed to enable change notifications");
+      }
+      return res.json();
+    })
+    .then(({ channel }) => {
+      if (closed) return;
+      source = new EventSource(`http://localhost:8000/table/get_table_data/changes?table_name=${encodeURIComponent(tableName)}`);
+      source.addEventListener(channel, (event) => {
+        onDelta(JSON.parse(event.data));
+      });
+      if (onStatus) {
+        source.onopen = () => onStatus(true);
+        source.onerror = () => onStatus(false);
+      }
+    })
+    .catch(() => onStatus && onStatus(false));
+  return () => {
+    closed = true;
+    if (source) source.close();
+  };
+};
+
+// Apply one delta to a list of row objects keyed by id.
+export const applyRowDelta = (rows, delta) => {
+  const key = (delta.old || delta.new || {}).id;
+  if (delta.op === "insert") {
+    return rows.some((row) => row.id === key) ? rows : [...rows, delta.new];
+  }
+  if (delta.op === "update") {
+    return rows.map((row) => (row.id === key ? delta.new : row));
+  }
+  if (delta.op === "delete") {
+    return rows.filter((row) => row.id !== key);
+  }
+  return rows;
+};
+
 
 
 
@@ -344,6 +407,11 @@ export const getNextValue = async (seq) => {
   return res.json();
 };
 
+export const getNextValues = async (seq, count) => {
+  const res = await fetch(`${BASE_URL}/sequences/${seq}/next_batch?count=${count}`);
+  return res.json();
+};
+
 export const getCurrentValue = async (seq) => {
   const res = await fetch(`${BASE_URL}/sequences/${seq}/current`);
   return res.json();
@@ -410,11 +478,29 @@ export const resetTableSequence = async (table, column) => {
 
 const API_BASE_URL = "http://localhost:8000/transactions";
 
+// Id of the server-side transaction session opened by /begin; sent on every later call so
+// the whole transaction runs on the same database connection.
+let transactionId = null;
+
+// Calls after which the server has released the pinned session.
+const SESSION_ENDING_ENDPOINTS = ["/commit", "/rollback", "/end", "/abort", "/session/close"];
+
 export const callApi = async (endpoint, method = "post", data = {}) => {
+  const sentTransactionId = transactionId;
   try {
-    const response = await axios({ method, url: `${API_BASE_URL}${endpoint}`, data });
+    const headers = sentTransactionId ? { "X-Transaction-Id": sentTransactionId } : {};
+    const response = await axios({ method, url: `${API_BASE_URL}${endpoint}`, data, headers });
+    if (response.data?.transaction_id) {
+      transactionId = response.data.transaction_id;
+    } else if (sentTransactionId && SESSION_ENDING_ENDPOINTS.includes(endpoint)) {
+      transactionId = null;
+    }
     return response.data;
   } catch (error) {
+    // 404 for our header: the session expired or was reaped; start over on the next /begin.
+    if (sentTransactionId && error.response?.status === 404 && transactionId === sentTransactionId) {
+      transactionId = null;
+    }
     throw error.response?.data?.detail
       ? { detail: error.response.data.detail }
       : { error: error.message };
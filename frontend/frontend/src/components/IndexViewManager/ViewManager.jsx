@@ -222,6 +222,7 @@ function ViewManager() {
             <option value="materialized">Materialized</option>
             <option value="updatable">Updatable</option>
             <option value="recursive">Recursive</option>
+            <option value="incremental">Incremental (aggregate)</option>
           </select>
           <input
             className={styles.inputField}
@@ -265,6 +266,7 @@ function ViewManager() {
             <option value="materialized">Materialized</option>
             <option value="updatable">Updatable</option>
             <option value="recursive">Recursive</option>
+            <option value="incremental">Incremental (aggregate)</option>
           </select>
           <input
             className={styles.inputField}
@@ -1,7 +1,14 @@
 // components/DataGrid.jsx
-import React, { useState } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import styles from "./datagrid.module.css";
-import { updateRow, deleteRow, insertRow, fetchTableData } from "../../api";
+import {
+  updateRow,
+  deleteRow,
+  insertRow,
+  fetchTableData,
+  subscribeTableChanges,
+  applyRowDelta
+} from "../../api";
 
 const DataGrid = ({
   selectedTable,
@@ -12,6 +19,38 @@ const DataGrid = ({
   setError
 }) => {
   const [newRowText, setNewRowText] = useState("");
+  // True while the change stream is connected; writes then arrive as deltas instead of a reload
+  const liveRef = useRef(false);
+
+  // Keep the grid in sync with row-level deltas from the server
+  useEffect(() => {
+    if (!selectedTable) return;
+    const close = subscribeTableChanges(
+      selectedTable,
+      async (delta) => {
+        if (delta.truncated) {
+          setTableData(await fetchTableData(selectedTable));
+        } else {
+          setTableData((rows) => applyRowDelta(rows, delta));
+        }
+      },
+      (connected) => {
+        liveRef.current = connected;
+      }
+    );
+    return () => {
+      close();
+      liveRef.current = false;
+    };
+  }, [selectedTable, setTableData]);
+
+  // Full reload, only needed when the change stream is not connected
+  const reloadIfOffline = async () => {
+    if (!liveRef.current) {
+      const updatedData = await fetchTableData(selectedTable);
+      setTableData(updatedData);
+    }
+  };
 
   // Handle inline cell changes
   const handleCellChange = (e, rowIndex, column) => {
@@ -33,8 +72,7 @@ const DataGrid = ({
     try {
       setError("");
       await updateRow(selectedTable, id, newValues);
-      const updatedData = await fetchTableData(selectedTable);
-      setTableData(updatedData);
+      await reloadIfOffline();
     } catch (err) {
       setError(err.message);
     }
@@ -48,8 +86,7 @@ const DataGrid = ({
     try {
       setError("");
       await deleteRow(selectedTable, rowId);
-      const updatedData = await fetchTableData(selectedTable);
-      setTableData(updatedData);
+      await reloadIfOffline();
     } catch (err) {
       setError(err.message);
     }
@@ -68,8 +105,7 @@ const DataGrid = ({
       setSqlQuery(query);
       setError("");
       await insertRow(selectedTable, rowData);
-      const updatedData = await fetchTableData(selectedTable);
-      setTableData(updatedData);
+      await reloadIfOffline();
       setNewRowText("");
     } catch (err) {
       setError("Error inserting row: " + err.message);
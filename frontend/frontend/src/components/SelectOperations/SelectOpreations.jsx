@@ -69,6 +69,8 @@ function SelectOperations() {
             acc[cur.column] = cur.function;
             return acc;
           }, {}),
+        // Auto-refreshes repeat the same query often; let the server answer from its cache.
+        use_cache: true,
       };
 
       // Build the "where" object from whereConditions